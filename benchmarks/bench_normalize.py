@@ -0,0 +1,67 @@
+"""
+规范化性能基准：在数 MB 的年报文本上比较 normalize_text / normalize_numbers
+与原先的 _normalize_text 写法、以及直接 str.translate 的写法。
+
+    python benchmarks/bench_normalize.py [--mb 8] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from govnianbao.normalize import (
+    _TEXT_TABLE,
+    normalize_numbers,
+    normalize_text,
+    normalize_with_offsets,
+)
+
+_SAMPLE = (
+    "三、收到和处理政府信息公开申请情况\r\n"
+    "本年新收政府信息公开申请数量\u3000１２，３４５件，\u00a0上年结转 ３ 件。\u200b\r\n"
+    "1,234 5 6 7 8 9 10．5 ０ ０ ０ ０ ０ ０\r\n"
+    "本机关认真贯彻落实政府信息公开条例，全年主动公开政府信息 1234 条。\r\n"
+)
+
+
+def _legacy(text: str) -> str:
+    # 原 _normalize_text：只处理换行和全角空格
+    return text.replace("\r\n", "\n").replace("\r", "\n").replace("\u3000", " ")
+
+
+def _translate(text: str) -> str:
+    return text.replace("\r\n", "\n").translate(_TEXT_TABLE)
+
+
+def _time(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = _SAMPLE * int(args.mb * 1024 * 1024 / len(_SAMPLE.encode("utf-8")))
+    size_mb = len(text.encode("utf-8")) / 1024 / 1024
+    print(f"text: {size_mb:.1f} MB, {len(text)} chars")
+
+    for name, func in [
+        ("legacy _normalize_text", _legacy),
+        ("str.translate", _translate),
+        ("normalize_text", normalize_text),
+        ("normalize_numbers", normalize_numbers),
+        ("normalize_with_offsets", normalize_with_offsets),
+    ]:
+        seconds = _time(func, text, args.repeat)
+        print(f"{name:28s} {seconds * 1000:8.1f} ms  {size_mb / seconds:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
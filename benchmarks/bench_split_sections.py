@@ -0,0 +1,58 @@
+"""
+标题定位的对抗性基准：数 MB 空白、大量“二、主动”半截标题等病态输入下
+split_sections 的耗时，可选与原先的 \\s* 正则写法对比。
+
+    python benchmarks/bench_split_sections.py [--mb 4] [--legacy-mb 0.005]
+
+原正则在这些输入上是平方级的，--legacy-mb 请保持很小。
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Callable, Dict
+
+from govnianbao.template_tables import SECTION_TITLES
+from govnianbao.text_parser import split_sections
+
+_CASES: Dict[str, str] = {
+    "spaces": " ",
+    "blank-lines": "\n ",
+    "title-prefixes": "\n二、主动 ",
+    "inline-prefixes": "x二、主动",
+    "spaced-prefixes": "\n二 、 主 动 公 开 政 府",
+}
+
+
+def _legacy_split(text: str) -> None:
+    # 原 _build_relaxed_pattern：(?:^|\n)\s* + 逐字 \s* 连接
+    for title in SECTION_TITLES.values():
+        body = r"\s*".join(re.escape(ch) for ch in title.strip())
+        re.compile(rf"(?:^|\n)\s*{body}", re.MULTILINE).search(text)
+
+
+def _time(func: Callable[[str], object], text: str) -> float:
+    start = time.perf_counter()
+    func(text)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=4)
+    parser.add_argument("--legacy-mb", type=float, default=0.005)
+    args = parser.parse_args()
+
+    for name, unit in _CASES.items():
+        text = unit * int(args.mb * 1024 * 1024 / len(unit.encode("utf-8")))
+        seconds = _time(split_sections, text)
+        line = f"{name:16s} {args.mb:5.2f} MB  split_sections {seconds * 1000:8.1f} ms"
+        if args.legacy_mb > 0:
+            small = unit * int(args.legacy_mb * 1024 * 1024 / len(unit.encode("utf-8")))
+            line += f"   legacy @ {args.legacy_mb} MB {_time(_legacy_split, small) * 1000:8.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from app.services.anomalies import DEFAULT_TABLES, DEFAULT_THRESHOLD, scan_anomalies
+from app.services.reparse import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_BUDGET_MS,
+    DEFAULT_MAX_WORKERS,
+    cancel_reparse_job,
+    get_reparse_job,
+    start_reparse_job,
+)
+from app.services.report_repository import review_queue
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+class ReparseRequest(BaseModel):
+    batch_size: int = Field(DEFAULT_BATCH_SIZE, gt=0, le=1000)
+    max_workers: int = Field(DEFAULT_MAX_WORKERS, gt=0, le=16)
+    max_rate: Optional[float] = Field(None, gt=0)  # 篇 / 秒
+    force: bool = False  # 版本戳已是最新的也重解析
+    budget_ms: Optional[float] = Field(DEFAULT_BUDGET_MS, gt=0)  # 每篇的解析时限
+
+
+@router.post("/reparse", status_code=202)
+def start_reparse(body: ReparseRequest):
+    try:
+        job = start_reparse_job(**body.model_dump())
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.progress()
+
+
+@router.get("/reparse")
+def read_reparse():
+    job = get_reparse_job()
+    if job is None:
+        raise HTTPException(status_code=404, detail="no reparse job")
+    return job.progress()
+
+
+@router.delete("/reparse")
+def cancel_reparse():
+    job = cancel_reparse_job()
+    if job is None:
+        raise HTTPException(status_code=404, detail="no reparse job")
+    return job.progress()
+
+
+class AnomalyScanRequest(BaseModel):
+    tables: List[str] = Field(default_factory=lambda: list(DEFAULT_TABLES))
+    threshold: float = Field(DEFAULT_THRESHOLD, gt=0)
+
+
+@router.post("/anomalies/scan")
+def run_anomaly_scan(body: AnomalyScanRequest):
+    try:
+        result = scan_anomalies(tables=body.tables, threshold=body.threshold)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    result.pop("flags")
+    return result
+
+
+@router.get("/review-queue")
+def read_review_queue(
+    limit: int = Query(50, gt=0, le=500),
+    offset: int = Query(0, ge=0),
+):
+    total, page = review_queue(limit=limit, offset=offset)
+    return {
+        "total": total,
+        "items": [
+            {
+                "id": report.id,
+                "agency": report.agency,
+                "year": report.year,
+                "score": flag["score"],
+                "flagged_cells": flag["flagged_cells"],
+                "cells": flag["cells"],
+            }
+            for report, flag in page
+        ],
+    }
@@ -1,20 +1,174 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import base64
+from typing import Optional
 
-from app.services.report_repository import get_report
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.services.compare import compare_reports
+from app.services.export import iter_export_records, parse_export_fields
+from app.services.parse_runner import parse_text_cancellable
+from app.services.report_repository import get_report_with_version, list_reports
+from app.services.response_cache import (
+    encode_json,
+    encoded_annual_struct,
+    negotiate_encoding,
+    parse_fields,
+)
+from govnianbao.template_tables import TEMPLATE_TABLES
 
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
+# 单次在线解析的时限上限（毫秒）
+MAX_PARSE_BUDGET_MS = 60_000
+# 单次在线解析的文本长度上限（字符）；年报全文一般在几万字以内
+MAX_PARSE_TEXT_CHARS = 2_000_000
+
+
+class ParseTextRequest(BaseModel):
+    text: str = Field(..., max_length=MAX_PARSE_TEXT_CHARS)
+    budget_ms: float = Field(10_000, gt=0, le=MAX_PARSE_BUDGET_MS)
+
+
+def _encode_cursor(report_id: str) -> str:
+    return base64.urlsafe_b64encode(report_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.b64decode(padded.encode("ascii"), altchars=b"-_", validate=True)
+        return raw.decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("")
+def list_report_summaries(
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    region: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    after = _decode_cursor(cursor) if cursor else None
+    # 多取一条，用来判断是否还有下一页
+    reports = list_reports(
+        agency=agency, year=year, region=region, after=after, limit=limit + 1
+    )
+    page = reports[:limit]
+    next_cursor = _encode_cursor(page[-1].id) if len(reports) > limit else None
+
+    return {
+        "items": [
+            {
+                "id": r.id,
+                "title": r.title,
+                "agency": r.agency,
+                "year": r.year,
+                "region": r.region,
+            }
+            for r in page
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.post("/parse")
+async def parse_report_text(body: ParseTextRequest, request: Request):
+    """
+    在线解析一篇年报文本（不入库）。
+    超过 budget_ms 或客户端断开时停止解析，返回已完成部分，
+    parse_diagnostics 中说明停在哪个阶段。
+    """
+    struct = await parse_text_cancellable(
+        body.text, budget_ms=body.budget_ms, is_disconnected=request.is_disconnected
+    )
+    return {"annual_struct": struct, "parse_diagnostics": struct.get("parse_diagnostics", {})}
+
+
+@router.get("/export.ndjson")
+def export_reports_ndjson(
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    region: Optional[str] = None,
+    fields: Optional[str] = None,
+    omit_text: bool = False,
+    cursor: Optional[str] = None,
+):
+    """
+    按筛选条件流式导出报告，每行一个 JSON 对象。
+    每行带 "_cursor"：中断后把最后收到的 _cursor 作为 cursor 参数即可从下一条继续。
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    try:
+        paths = parse_export_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    def lines():
+        records = iter_export_records(
+            paths, agency=agency, year=year, region=region, after=after, omit_text=omit_text
+        )
+        for report_id, record in records:
+            record["_cursor"] = _encode_cursor(report_id)
+            yield encode_json(record) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 
 @router.get("/{report_id}/annual_struct")
-def get_annual_struct(report_id: str):
-    report = get_report(report_id)
-    if report is None:
+def get_annual_struct(
+    report_id: str,
+    fields: Optional[str] = None,
+    omit_text: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    found = get_report_with_version(report_id)
+    if found is None:
         raise HTTPException(status_code=404, detail="Report not found")
+    report, version = found
 
-    if report.annual_struct is None:
+    try:
+        projection = (parse_fields(fields), omit_text)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid fields")
+
+    payload = encoded_annual_struct(report, version, projection)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Annual report structure not available")
 
-    return report.annual_struct
+    encoding = negotiate_encoding(accept_encoding, len(payload.body))
+    headers = {
+        "ETag": payload.etag(encoding),
+        "Vary": "Accept-Encoding",
+        # 允许缓存，但每次都要带 If-None-Match 回来校验
+        "Cache-Control": "no-cache",
+    }
+    if payload.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=payload.variant(encoding), media_type="application/json", headers=headers
+    )
+
+
+@router.get("/{report_id}/compare/{other_id}")
+def compare_report(
+    report_id: str,
+    other_id: str,
+    table: Optional[str] = None,
+    changed_only: bool = False,
+):
+    if table is not None and table not in TEMPLATE_TABLES:
+        raise HTTPException(status_code=400, detail="Unknown table")
+    result = compare_reports(report_id, other_id, table=table, changed_only=changed_only)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return result
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from app.services.rollups import get_rollups
+
+
+router = APIRouter(prefix="/api/rollups", tags=["rollups"])
+
+
+@router.get("")
+def read_rollups(
+    region: Optional[str] = None,
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    table: Optional[str] = None,
+):
+    if not region and not agency:
+        raise HTTPException(status_code=400, detail="region or agency is required")
+    return {"items": get_rollups(region=region, agency=agency, year=year, table=table)}
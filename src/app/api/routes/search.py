@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.search_index import search
+
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("")
+def search_reports(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, gt=0, le=200),
+    offset: int = Query(0, ge=0),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="empty query")
+    return {"query": q, **search(q, limit=limit, offset=offset)}
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.compare import agency_trend
+from govnianbao.template_tables import TEMPLATE_TABLES
+
+
+router = APIRouter(prefix="/api/trends", tags=["trends"])
+
+# 一次最多查询的机关数
+MAX_TREND_AGENCIES = 50
+
+
+@router.get("")
+def read_trends(
+    agency: List[str] = Query(...),
+    table: Optional[str] = None,
+):
+    if len(agency) > MAX_TREND_AGENCIES:
+        raise HTTPException(status_code=400, detail="too many agencies")
+    if table is not None and table not in TEMPLATE_TABLES:
+        raise HTTPException(status_code=400, detail="Unknown table")
+    return {"items": [agency_trend(name, table=table) for name in dict.fromkeys(agency)]}
@@ -2,12 +2,20 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 
+from app.api.routes.admin import router as admin_router
 from app.api.routes.reports import router as reports_router
+from app.api.routes.rollups import router as rollups_router
+from app.api.routes.search import router as search_router
+from app.api.routes.trends import router as trends_router
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="Annual Report Backend")
     app.include_router(reports_router)
+    app.include_router(rollups_router)
+    app.include_router(search_router)
+    app.include_router(trends_router)
+    app.include_router(admin_router)
     return app
 
 
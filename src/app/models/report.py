@@ -2,11 +2,121 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
-from pydantic import BaseModel
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    PrivateAttr,
+    SerializationInfo,
+    model_serializer,
+    model_validator,
+)
+
+from app.models.text_store import CompressedStruct, CompressedText
+
+# 压缩保存、通过同名 property 读写的字段及其类型
+_COMPRESSED_FIELDS = {"full_text": str, "annual_struct": dict, "source_html": str}
+
+
+def _compressed_fields_schema(schema: Dict[str, Any]) -> None:
+    """压缩字段不是 pydantic 字段，手动补进 JSON Schema。"""
+    schema.setdefault("properties", {}).update(
+        full_text={
+            "anyOf": [{"type": "string"}, {"type": "null"}],
+            "default": None,
+            "title": "Full Text",
+        },
+        annual_struct={
+            "anyOf": [{"type": "object", "additionalProperties": True}, {"type": "null"}],
+            "default": None,
+            "title": "Annual Struct",
+        },
+        source_html={
+            "anyOf": [{"type": "string"}, {"type": "null"}],
+            "default": None,
+            "title": "Source Html",
+        },
+    )
+
+
+def _wanted(name: str, info: SerializationInfo) -> bool:
+    include, exclude = info.include, info.exclude
+    if include is not None and name not in include:
+        return False
+    return exclude is None or name not in exclude
 
 
 class Report(BaseModel):
+    model_config = ConfigDict(json_schema_extra=_compressed_fields_schema)
+
     id: str
     title: Optional[str] = None
-    full_text: Optional[str] = None
-    annual_struct: Optional[Dict[str, Any]] = None  # 年报解析后的结构
+    agency: Optional[str] = None  # 发布机关（带索引）
+    year: Optional[int] = None  # 报告年度（带索引）
+    region: Optional[str] = None  # 行政区划，如“江苏省苏州市”（按各级前缀建索引）
+    duplicate_of: Optional[str] = None  # 近重复时指向已有报告的 id，表格复用其解析结果
+    # 原始来源："text"（纯文本）/ "pdf" / "html"；重解析时按它选解析器，旧数据为 None 按纯文本处理
+    source_format: Optional[str] = None
+
+    # full_text、annual_struct 中的正文和网页原文 source_html 压缩保存，读取时才解压（见 text_store）；
+    # 构造 / model_validate 时照常传入，序列化（model_dump / API 响应）时输出解压后的内容
+    _full_text: Optional[CompressedText] = PrivateAttr(default=None)
+    _annual_struct: Optional[CompressedStruct] = PrivateAttr(default=None)
+    _source_html: Optional[CompressedText] = PrivateAttr(default=None)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _take_compressed(cls, data: Any, handler: Any) -> "Report":
+        if not isinstance(data, dict) or not any(name in data for name in _COMPRESSED_FIELDS):
+            return handler(data)
+        data = dict(data)
+        values = {name: data.pop(name, None) for name in _COMPRESSED_FIELDS}
+        for name, expected in _COMPRESSED_FIELDS.items():
+            if values[name] is not None and not isinstance(values[name], expected):
+                raise ValueError(f"{name} must be a {expected.__name__}")
+        report = handler(data)
+        for name, value in values.items():
+            setattr(report, name, value)
+        return report
+
+    @model_serializer(mode="wrap")
+    def _dump_compressed(self, handler: Any, info: SerializationInfo) -> Dict[str, Any]:
+        data = handler(self)
+        for name in _COMPRESSED_FIELDS:
+            if _wanted(name, info):
+                data[name] = getattr(self, name)
+        return data
+
+    @property
+    def full_text(self) -> Optional[str]:
+        stored = self._full_text
+        return stored.text() if stored is not None else None
+
+    @full_text.setter
+    def full_text(self, value: Optional[str]) -> None:
+        self._full_text = CompressedText(value) if value is not None else None
+
+    @property
+    def annual_struct(self) -> Optional[Dict[str, Any]]:
+        """年报解析后的完整结构（含各部分正文，按需解压）；每次返回新的副本。"""
+        stored = self._annual_struct
+        return stored.materialize() if stored is not None else None
+
+    @annual_struct.setter
+    def annual_struct(self, value: Optional[Dict[str, Any]]) -> None:
+        self._annual_struct = CompressedStruct(value) if value is not None else None
+
+    @property
+    def source_html(self) -> Optional[str]:
+        """HTML 来源的网页原文，重解析时交给 HTML 解析器。"""
+        stored = self._source_html
+        return stored.text() if stored is not None else None
+
+    @source_html.setter
+    def source_html(self, value: Optional[str]) -> None:
+        self._source_html = CompressedText(value) if value is not None else None
+
+    @property
+    def tables_struct(self) -> Optional[Dict[str, Any]]:
+        """不含正文的 annual_struct（表格、标题等），读取不需要解压；与 annual_struct 一样每次返回副本。"""
+        stored = self._annual_struct
+        return stored.tables() if stored is not None else None
@@ -0,0 +1,211 @@
+"""
+报告全文和各部分正文的压缩存储。
+
+- 文本按 UTF-8 编码后用 zlib 压缩，可带一份共享的预置字典（zdict）：
+  年报的标题、表格行列名称在每篇里都会出现，放进字典后短文本也能压得很小；
+- 压缩块首字节记录所用字典的编号，解压时按编号取回字典；
+- 只有真正读取 full_text / 正文时才解压，最近用过的解压文本放在一个小 LRU 里；
+  还原出的 annual_struct 和不含正文的表格视图每次都是新的 dict，
+  调用方修改它们不会影响其他读者或缓存。
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from govnianbao.template_tables import SECTION_TITLES, TEMPLATE_TABLES
+
+# 压缩块首字节 = 字典编号；0 表示不带字典
+_DICTIONARIES: Dict[int, bytes] = {0: b""}
+_DICT_LOCK = threading.Lock()
+
+# zlib 只会引用窗口（32KB）内的字典内容
+MAX_DICTIONARY_SIZE = 32 * 1024
+COMPRESS_LEVEL = 6
+# LRU 按文本块计：每篇报告的全文和各部分正文各占一项
+HOT_CACHE_SIZE = 128
+
+# 需要压缩的 section 文本字段
+_TEXT_FIELDS = ("text", "raw_text")
+
+
+def register_dictionary(zdict: bytes) -> int:
+    """登记一份压缩字典，返回其编号。编号写进压缩块，字典登记后不可修改。"""
+    if len(zdict) > MAX_DICTIONARY_SIZE:
+        zdict = zdict[-MAX_DICTIONARY_SIZE:]
+    with _DICT_LOCK:
+        for dict_id, existing in _DICTIONARIES.items():
+            if existing == zdict:
+                return dict_id
+        dict_id = len(_DICTIONARIES)
+        if dict_id > 255:
+            raise ValueError("too many compression dictionaries")
+        _DICTIONARIES[dict_id] = zdict
+        return dict_id
+
+
+def train_dictionary(samples: Iterable[str], max_size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    用样本报告训练字典：取在多篇样本中重复出现的行，出现越多越靠后
+    （zlib 引用距离越近越省，最常用的内容放在字典末尾）。
+    """
+    counts: Counter = Counter()
+    for text in samples:
+        counts.update({line.strip() for line in text.splitlines() if len(line.strip()) >= 4})
+
+    lines = [line for line, n in counts.most_common() if n >= 2]
+    chunks: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = (line + "\n").encode("utf-8")
+        if size + len(data) > max_size:
+            break
+        chunks.append(data)
+        size += len(data)
+    return b"".join(reversed(chunks))
+
+
+def _template_dictionary() -> bytes:
+    """模板自带的字典：各部分标题和表格行列名称。"""
+    phrases: List[str] = ["政府信息公开工作年度报告", "中华人民共和国政府信息公开条例"]
+    for table_def in TEMPLATE_TABLES.values():
+        phrases += [col["label"] for col in table_def["columns"] if col.get("label")]
+        phrases += [row["label"] for row in table_def["rows"] if row.get("label")]
+    phrases += list(SECTION_TITLES.values())
+    return "\n".join(dict.fromkeys(phrases)).encode("utf-8")
+
+
+_default_dict_id = register_dictionary(_template_dictionary())
+
+
+def use_dictionary(dict_id: int) -> None:
+    """切换新压缩文本使用的字典（已压缩的文本不受影响）。"""
+    global _default_dict_id
+    if dict_id not in _DICTIONARIES:
+        raise KeyError(f"unknown dictionary id: {dict_id}")
+    _default_dict_id = dict_id
+
+
+def compress_text(text: str, dict_id: Optional[int] = None) -> bytes:
+    dict_id = _default_dict_id if dict_id is None else dict_id
+    zdict = _DICTIONARIES[dict_id]
+    if zdict:
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(COMPRESS_LEVEL)
+    return bytes([dict_id]) + compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+def decompress_text(blob: bytes) -> str:
+    zdict = _DICTIONARIES[blob[0]]
+    decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    return (decompressor.decompress(blob[1:]) + decompressor.flush()).decode("utf-8")
+
+
+class _HotCache:
+    """最近解压结果的 LRU；键是压缩对象本身。"""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, owner: Any) -> Any:
+        with self._lock:
+            value = self._items.get(owner)
+            if value is not None:
+                self._items.move_to_end(owner)
+            return value
+
+    def put(self, owner: Any, value: Any) -> None:
+        with self._lock:
+            self._items[owner] = value
+            self._items.move_to_end(owner)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_HOT = _HotCache(HOT_CACHE_SIZE)
+
+
+def _copy_tree(value: Any) -> Any:
+    """只含 dict / list / 标量的结构的快速深拷贝；其他类型退回 copy.deepcopy。"""
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return copy.deepcopy(value)
+
+
+class CompressedText:
+    __slots__ = ("blob", "length")
+
+    def __init__(self, text: str) -> None:
+        self.blob = compress_text(text)
+        self.length = len(text)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.blob)
+
+    def text(self) -> str:
+        value = _HOT.get(self)
+        if value is None:
+            value = decompress_text(self.blob)
+            _HOT.put(self, value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"<CompressedText {self.length} chars, {self.nbytes} bytes>"
+
+
+class CompressedStruct:
+    """
+    annual_struct 的压缩形态：各 section 的 text / raw_text 单独压缩，
+    其余部分（表格、标题、机关等）原样保存在 skeleton 里，读表格不需要解压。
+    """
+
+    __slots__ = ("skeleton", "texts")
+
+    def __init__(self, struct: Dict[str, Any]) -> None:
+        self.skeleton: Dict[str, Any] = {}
+        self.texts: Dict[tuple, CompressedText] = {}
+        for key, value in struct.items():
+            if key.startswith("section") and isinstance(value, dict):
+                section = {}
+                for field, item in value.items():
+                    if field in _TEXT_FIELDS and isinstance(item, str):
+                        self.texts[(key, field)] = CompressedText(item)
+                    else:
+                        section[field] = item
+                self.skeleton[key] = section
+            else:
+                self.skeleton[key] = value
+
+    def tables(self) -> Dict[str, Any]:
+        """不含正文的部分：每次返回新的副本，不需要解压。"""
+        return _copy_tree(self.skeleton)
+
+    def materialize(self) -> Dict[str, Any]:
+        """还原完整的 annual_struct：每次返回新的副本，正文解压结果经 LRU 复用。"""
+        value = _copy_tree(self.skeleton)
+        for (key, field), text in self.texts.items():
+            value[key][field] = text.text()
+        return value
+
+    def __repr__(self) -> str:
+        return f"<CompressedStruct {len(self.texts)} texts>"
+
+
+def clear_hot_cache() -> None:
+    _HOT.clear()
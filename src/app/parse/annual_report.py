@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
 
+from app.models.report import Report
 from govnianbao import parse_annual_report_text_to_dict
+from govnianbao.deadline import Deadline
+from govnianbao.html_parser import HtmlReportExtractor
+from govnianbao.metadata import (
+    ReportMetadata,
+    extract_region_path,
+    extract_report_metadata,
+)
 
 
-def parse_annual_report_from_text(full_text: str) -> Dict[str, Any]:
+def parse_annual_report_from_text(
+    full_text: str, *, deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
     """
     输入：整篇年度报告的纯文本（来自 PDF/URL 抽取）
     输出：govnianbao 返回的结构化 dict：
@@ -23,6 +34,56 @@ def parse_annual_report_from_text(full_text: str) -> Dict[str, Any]:
         "section4": {...},
         "section5": {"text": "..."},
         "section6": {"text": "..."},
+        "parse_diagnostics": {...},   # 超时 / 取消时非空
       }
     """
-    return parse_annual_report_text_to_dict(full_text, with_tables=True)
+    return parse_annual_report_text_to_dict(full_text, with_tables=True, deadline=deadline)
+
+
+def read_annual_report_html(html: str) -> HtmlReportExtractor:
+    """
+    把年报网页 HTML 拍平：返回的提取器 .text 为纯文本，
+    需要结构化结果时再调用 .to_report()（去重命中时可以省掉这一步）。
+    """
+    extractor = HtmlReportExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor
+
+
+def parse_annual_report_from_html(html: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    输入：年报网页 HTML
+    输出：(拍平后的纯文本, 与 parse_annual_report_from_text 相同结构的 dict)
+
+    表格优先按网页 <table> 的行标签直接映射，映射不上的才走文本解析。
+    """
+    extractor = read_annual_report_html(html)
+    return extractor.text, asdict(extractor.to_report(with_tables=True))
+
+
+def fill_report_metadata(
+    report: Report, full_text: str, annual_struct: Optional[Dict[str, Any]]
+) -> None:
+    """
+    填充 report 的标题 / 发布机关 / 年度 / 行政区划。
+    调用方给的标题优先；其次用解析结果里的字段；解析失败时直接从原文提取。
+    """
+    meta = ReportMetadata()
+    if report.title:
+        meta = extract_report_metadata("", title=report.title)
+    if annual_struct is None:
+        fallback = extract_report_metadata(full_text, title=report.title)
+        struct: Dict[str, Any] = {
+            "title": fallback.title,
+            "agency": fallback.agency,
+            "year": fallback.year,
+        }
+    else:
+        struct = annual_struct
+
+    report.title = report.title or struct.get("title")
+    report.agency = meta.agency or struct.get("agency")
+    report.year = meta.year or struct.get("year")
+    region_path = extract_region_path(report.agency)
+    report.region = region_path[-1] if region_path else None
@@ -0,0 +1,204 @@
+"""
+全库表格数据的统计异常检测（需要 numpy）。
+
+第三、四部分表格错位时，常见的表现是某个单元格比同类报告大几个数量级。
+这里把所有报告的表格按单元格布局拍平，按年度堆成矩阵，逐列计算稳健统计量：
+
+- 数值先取 log10(max(|x|, VALUE_FLOOR))，比较的是数量级（0 和个位数视为同一量级）；
+- 每列的中位数和 MAD（中位数绝对偏差）按 (年度, 省级区划) 分组计算，
+  分组不足 MIN_GROUP_SIZE 篇的报告改用整个年度；年度也不足时不参与检测；
+- 稳健 z 值 = 0.6745·|y - 中位数| / max(MAD, MIN_MAD)，超过 threshold 的单元格记为异常，
+  报告的严重程度取其异常单元格中最大的 z 值；
+- 结果通过 set_anomaly_flags 写回仓库（按检测时的版本号，期间被重新保存的报告不写），
+  review_queue 按严重程度排序。
+
+每个年度只在内存中保留一个 float32 矩阵，统计量都是整列一次算完。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import warnings
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.report_repository import (
+    get_report_with_version,
+    iter_reports,
+    set_anomaly_flags,
+)
+from govnianbao.layout import compile_layout
+from govnianbao.metadata import extract_region_path
+from govnianbao.template_tables import TEMPLATE_TABLES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLES = ("section3_applications", "section4_review_litigation")
+DEFAULT_THRESHOLD = 3.5
+MIN_GROUP_SIZE = 20
+# 小于这个值的数值视为同一量级，0 与 25 不算异常
+VALUE_FLOOR = 10.0
+# MAD 下限（log10 单位）：同组数值几乎相同时，不把小幅变化当成异常
+MIN_MAD = 0.25
+# 每篇报告最多记录的异常单元格数
+MAX_FLAGGED_CELLS = 10
+
+_MAD_SCALE = 0.6745
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - 取决于运行环境
+        raise ImportError(
+            "anomaly scanning requires numpy; install it with `pip install numpy`"
+        ) from exc
+    return numpy
+
+
+def robust_scores(np, values):
+    """
+    values 为 (报告数, 单元格数) 的原始数值矩阵（NaN 表示缺失）。
+    返回 (z 值矩阵, 每列中位数)，均在 log 空间；非空值不足 MIN_GROUP_SIZE 的列 z 值为 NaN。
+    """
+    logged = np.log10(np.maximum(np.abs(values), VALUE_FLOOR))
+    counts = (~np.isnan(logged)).sum(axis=0)
+    with warnings.catch_warnings():
+        # 全为 NaN 的列 nanmedian 会告警，结果本来就是 NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(logged, axis=0)
+        mad = np.nanmedian(np.abs(logged - median), axis=0)
+    scores = _MAD_SCALE * np.abs(logged - median) / np.maximum(mad, MIN_MAD)
+    scores[:, counts < MIN_GROUP_SIZE] = np.nan
+    return scores, median
+
+
+def _province(region: Optional[str]) -> Optional[str]:
+    path = extract_region_path(region)
+    return path[0] if path else None
+
+
+class _YearBucket:
+    __slots__ = ("ids", "versions", "provinces", "values")
+
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.versions: List[int] = []
+        self.provinces: List[Optional[str]] = []
+        self.values = array("f")
+
+
+def _collect(layout) -> Tuple[Dict[int, _YearBucket], int]:
+    buckets: Dict[int, _YearBucket] = {}
+    scanned = 0
+    for report in iter_reports(batch_size=1000):
+        scanned += 1
+        if report.year is None:
+            continue
+        found = get_report_with_version(report.id)
+        if found is None:
+            continue
+        report, version = found
+        struct = report.tables_struct
+        if not struct:
+            continue
+        bucket = buckets.setdefault(report.year, _YearBucket())
+        bucket.ids.append(report.id)
+        bucket.versions.append(version)
+        bucket.provinces.append(_province(report.region or report.agency))
+        bucket.values.extend(layout.flatten(struct, "f"))
+    return buckets, scanned
+
+
+def _flags_for_rows(
+    np, layout, bucket: _YearBucket, rows, scores, median, threshold: float, flags: Dict[str, Any]
+) -> None:
+    values = np.frombuffer(bucket.values, dtype=np.float32).reshape(len(bucket.ids), -1)
+    with np.errstate(invalid="ignore"):
+        hits = np.nan_to_num(scores, nan=0.0) > threshold
+    for local in np.flatnonzero(hits.any(axis=1)):
+        row = rows[local]
+        cols = np.flatnonzero(hits[local])
+        cols = cols[np.argsort(-scores[local, cols])][:MAX_FLAGGED_CELLS]
+        cells = []
+        for col in cols:
+            table_key, row_key, col_key = layout.keys[col]
+            m = float(median[col])
+            cells.append(
+                {
+                    "table": table_key,
+                    "row": row_key,
+                    "col": col_key,
+                    "value": float(values[row, col]),
+                    "median": round(10 ** m, 3),
+                    "score": round(float(scores[local, col]), 3),
+                }
+            )
+        report_id = bucket.ids[row]
+        flags[report_id] = {
+            "version": bucket.versions[row],
+            "score": cells[0]["score"],
+            "flagged_cells": int(hits[local].sum()),
+            "cells": cells,
+        }
+
+
+def scan_anomalies(
+    *,
+    tables: Sequence[str] = DEFAULT_TABLES,
+    threshold: float = DEFAULT_THRESHOLD,
+    write: bool = True,
+) -> Dict[str, Any]:
+    """
+    扫描全库并（write=True 时）把结果写回仓库，替换上一次的标记。
+    返回 {"scanned", "scored", "flagged_reports", "written", "elapsed_seconds", "flags"}。
+    """
+    np = _require_numpy()
+    for table_key in tables:
+        if table_key not in TEMPLATE_TABLES:
+            raise ValueError(f"unknown table: {table_key}")
+    started = time.perf_counter()
+    layout = compile_layout({key: TEMPLATE_TABLES[key] for key in tables})
+
+    buckets, scanned = _collect(layout)
+    flags: Dict[str, Any] = {}
+    scored = 0
+    for year, bucket in sorted(buckets.items()):
+        n = len(bucket.ids)
+        if n < MIN_GROUP_SIZE:
+            continue
+        matrix = np.frombuffer(bucket.values, dtype=np.float32).reshape(n, -1).astype(np.float64)
+
+        groups: Dict[Optional[str], List[int]] = {}
+        for row, province in enumerate(bucket.provinces):
+            groups.setdefault(province, []).append(row)
+        fallback: List[int] = []
+        for province, rows in groups.items():
+            if province is None or len(rows) < MIN_GROUP_SIZE:
+                fallback.extend(rows)
+                continue
+            scores, median = robust_scores(np, matrix[rows])
+            _flags_for_rows(np, layout, bucket, rows, scores, median, threshold, flags)
+            scored += len(rows)
+        if fallback:
+            # 小分组用整个年度的统计量
+            scores, median = robust_scores(np, matrix)
+            _flags_for_rows(
+                np, layout, bucket, fallback, scores[fallback], median, threshold, flags
+            )
+            scored += len(fallback)
+
+    written = set_anomaly_flags(flags) if write else 0
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"anomaly scan: {scanned} reports, {scored} scored, {len(flags)} flagged in {elapsed:.1f}s"
+    )
+    return {
+        "scanned": scanned,
+        "scored": scored,
+        "flagged_reports": len(flags),
+        "written": written,
+        "elapsed_seconds": round(elapsed, 3),
+        "flags": flags,
+    }
@@ -0,0 +1,259 @@
+"""
+报告之间、机关历年之间的表格对比。
+
+表格先按编译好的单元格布局（govnianbao.layout）拍平成一维向量，
+差值和变化百分比对整条向量一次算完（有 numpy 时向量化，否则逐元素），
+最后再还原成 {table: {row: {col: ...}}}。
+
+- 两篇报告对比的结果按 (id, 版本号) 缓存，任一报告重新保存后版本号变化，旧结果自然失效；
+- 机关历年序列（每年一篇）按机关缓存（LRU，最多 TREND_CACHE_SIZE 个机关，没有报告的机关不缓存），
+  该机关的报告保存 / 删除时通过仓库回调失效。
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.models.report import Report
+from app.services.report_repository import (
+    add_delete_hook,
+    add_save_hook,
+    get_report_with_version,
+    iter_reports,
+)
+from govnianbao.layout import DEFAULT_LAYOUT
+
+try:  # numpy 为可选依赖：未安装时逐元素计算，结果相同
+    import numpy
+except ImportError:  # pragma: no cover - 取决于运行环境
+    numpy = None
+
+COMPARE_CACHE_SIZE = 256
+TREND_CACHE_SIZE = 256
+
+_NAN = float("nan")
+_LAYOUT = DEFAULT_LAYOUT
+
+
+def _vector(report: Report) -> array:
+    # 只读表格，不需要解压正文
+    return _LAYOUT.flatten(report.tables_struct or {})
+
+
+def _deltas(base: Sequence[float], other: Sequence[float]) -> Tuple[List[float], List[float]]:
+    """other - base，以及相对 base 的变化百分比（base 为 0 或缺失时为 NaN）。"""
+    if numpy is not None:
+        b = numpy.asarray(base, dtype=float)
+        o = numpy.asarray(other, dtype=float)
+        delta = o - b
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            pct = numpy.where(b != 0, delta / numpy.abs(b) * 100.0, _NAN)
+        return delta.tolist(), pct.tolist()
+    delta = [o - b for b, o in zip(base, other)]
+    pct = [d / abs(b) * 100.0 if b != 0 and not math.isnan(b) else _NAN for b, d in zip(base, delta)]
+    return delta, pct
+
+
+def _value(value: float, col_type: str) -> Optional[float]:
+    if math.isnan(value):
+        return None
+    if col_type == "int" and value.is_integer():
+        return int(value)
+    return round(value, 6)
+
+
+def _nest(
+    cells: Dict[Tuple[str, str, str], Any], table: Optional[str]
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (table_key, row_key, col_key), value in cells.items():
+        if table is not None and table_key != table:
+            continue
+        tables.setdefault(table_key, {}).setdefault(row_key, {})[col_key] = value
+    return tables
+
+
+def _compare_vectors(
+    base: array, other: array, *, table: Optional[str], changed_only: bool
+) -> Dict[str, Any]:
+    delta, pct = _deltas(base, other)
+    cells: Dict[Tuple[str, str, str], Any] = {}
+    for i, (key, col_type) in enumerate(zip(_LAYOUT.keys, _LAYOUT.types)):
+        if math.isnan(base[i]) and math.isnan(other[i]):
+            continue
+        if changed_only and delta[i] == 0:
+            continue
+        cells[key] = {
+            "base": _value(base[i], col_type),
+            "other": _value(other[i], col_type),
+            "delta": _value(delta[i], col_type),
+            "pct": _value(pct[i], "float"),
+        }
+    return _nest(cells, table)
+
+
+_COMPARE_CACHE: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def compare_reports(
+    report_id: str,
+    other_id: str,
+    *,
+    table: Optional[str] = None,
+    changed_only: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    两篇报告逐单元格对比（other - base）；任一报告不存在时返回 None。
+    cells 中每个单元格为 {"base", "other", "delta", "pct"}，两边都缺失的单元格省略。
+    """
+    found = get_report_with_version(report_id)
+    other_found = get_report_with_version(other_id)
+    if found is None or other_found is None:
+        return None
+    (base, version), (other, other_version) = found, other_found
+
+    key = (report_id, version, other_id, other_version, table, changed_only)
+    with _LOCK:
+        cached = _COMPARE_CACHE.get(key)
+        if cached is not None:
+            _COMPARE_CACHE.move_to_end(key)
+            return cached
+
+    result = {
+        "base": {"id": base.id, "agency": base.agency, "year": base.year},
+        "other": {"id": other.id, "agency": other.agency, "year": other.year},
+        "cells": _compare_vectors(
+            _vector(base), _vector(other), table=table, changed_only=changed_only
+        ),
+    }
+    with _LOCK:
+        _COMPARE_CACHE[key] = result
+        if len(_COMPARE_CACHE) > COMPARE_CACHE_SIZE:
+            _COMPARE_CACHE.popitem(last=False)
+    return result
+
+
+class _Series:
+    """一个机关每年一篇报告的表格向量。"""
+
+    __slots__ = ("years", "report_ids", "vectors")
+
+    def __init__(self, years: List[int], report_ids: List[str], vectors: List[array]) -> None:
+        self.years = years
+        self.report_ids = report_ids
+        self.vectors = vectors
+
+
+# 机关 -> 序列 / 按表格过滤后的趋势结果；两者同进同出，按机关 LRU 淘汰
+_SERIES: "OrderedDict[str, _Series]" = OrderedDict()
+_TRENDS: "OrderedDict[str, Dict[Optional[str], Dict[str, Any]]]" = OrderedDict()
+# 机关 -> 失效次数；构建期间发生过失效的结果不写回缓存
+_GENERATIONS: Dict[str, int] = {}
+
+
+def _build_series(agency: str) -> _Series:
+    by_year: Dict[int, Report] = {}
+    for report in iter_reports(agency=agency):
+        if report.year is None:
+            continue
+        current = by_year.get(report.year)
+        # 同一年有多篇时，优先不是近重复副本的那篇，其次按 id 取最小的
+        if current is None or (current.duplicate_of and not report.duplicate_of):
+            by_year[report.year] = report
+    years = sorted(by_year)
+    return _Series(
+        years,
+        [by_year[y].id for y in years],
+        [_vector(by_year[y]) for y in years],
+    )
+
+
+def _trend_cells(series: _Series, table: Optional[str]) -> Dict[str, Any]:
+    n = len(series.years)
+    width = len(_LAYOUT.keys)
+    if n == 0:
+        return {}
+    # 相邻年度整条向量求差；第一年没有上一年，记为 NaN
+    yoy: List[Tuple[List[float], List[float]]] = [([_NAN] * width, [_NAN] * width)]
+    for prev, cur in zip(series.vectors, series.vectors[1:]):
+        yoy.append(_deltas(prev, cur))
+
+    cells: Dict[Tuple[str, str, str], Any] = {}
+    for i, (key, col_type) in enumerate(zip(_LAYOUT.keys, _LAYOUT.types)):
+        if table is not None and key[0] != table:
+            continue
+        values = [vector[i] for vector in series.vectors]
+        if all(math.isnan(v) for v in values):
+            continue
+        cells[key] = {
+            "values": [_value(v, col_type) for v in values],
+            "delta": [_value(d[i], col_type) for d, _ in yoy],
+            "pct": [_value(p[i], "float") for _, p in yoy],
+        }
+    return _nest(cells, table)
+
+
+def agency_trend(agency: str, *, table: Optional[str] = None) -> Dict[str, Any]:
+    """
+    某机关历年表格数据：每个单元格给出逐年数值、同比差值和同比百分比（与 years 对齐）。
+    结果按 (机关, table) 缓存，该机关有报告保存 / 删除时失效。
+    """
+    with _LOCK:
+        if agency in _SERIES:
+            _SERIES.move_to_end(agency)
+            _TRENDS.move_to_end(agency)
+        cached = _TRENDS.get(agency, {}).get(table)
+        if cached is not None:
+            return cached
+        series = _SERIES.get(agency)
+        generation = _GENERATIONS.get(agency, 0)
+    if series is None:
+        series = _build_series(agency)
+
+    result = {
+        "agency": agency,
+        "years": series.years,
+        "report_ids": series.report_ids,
+        "cells": _trend_cells(series, table),
+    }
+    # 没有报告的机关（拼错的、还没入库的）不占缓存
+    if not series.years:
+        return result
+    with _LOCK:
+        if _GENERATIONS.get(agency, 0) == generation:
+            _SERIES[agency] = series
+            _TRENDS.setdefault(agency, {})[table] = result
+            _SERIES.move_to_end(agency)
+            _TRENDS.move_to_end(agency)
+            while len(_SERIES) > TREND_CACHE_SIZE:
+                evicted, _ = _SERIES.popitem(last=False)
+                _TRENDS.pop(evicted, None)
+    return result
+
+
+def _invalidate(agency: Optional[str]) -> None:
+    if not agency:
+        return
+    with _LOCK:
+        _GENERATIONS[agency] = _GENERATIONS.get(agency, 0) + 1
+        _SERIES.pop(agency, None)
+        _TRENDS.pop(agency, None)
+
+
+def _on_save(old: Optional[Report], report: Report) -> None:
+    if old is not None and old.agency != report.agency:
+        _invalidate(old.agency)
+    _invalidate(report.agency)
+
+
+def _install() -> None:
+    add_save_hook(_on_save)
+    add_delete_hook(lambda report: _invalidate(report.agency))
+
+
+_install()
@@ -0,0 +1,264 @@
+"""
+抓取 / 上传文本的近重复检测。
+
+同一篇年报经常在多个 URL 重复发布，或只改了页码、空白后重新发布。
+这里在解析前先算两种指纹：
+- 规范化内容指纹：去掉空白、页码等噪声后的 SHA-1，命中即完全重复；
+- MinHash 签名（one-permutation hashing，每篇只哈希一次 shingle），
+  配合 LSH 分桶找近重复候选，再用签名估算 Jaccard 相似度确认。
+
+另外记录全文数字序列的指纹：近重复只有在数字完全相同（表格没改过）时才复用已有报告的
+解析结果（副本），标题 / 机关 / 年度仍从新文本提取。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import unicodedata
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.report import Report
+from app.services.report_repository import get_report
+from govnianbao.metadata import extract_report_metadata
+
+_PAGE_LINE_PATTERN = re.compile(r"(?m)^\s*-\s*\d+\s*-\s*$")
+_PAGE_TEXT_PATTERN = re.compile(r"第\s*\d+\s*页(?:\s*[/／]?\s*共\s*\d+\s*页)?")
+_WS_PATTERN = re.compile(r"\s+")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+_MASK32 = 0xFFFFFFFF
+_EMPTY_BIN = _MASK32
+
+
+def _strip_page_marks(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)
+    text = _PAGE_LINE_PATTERN.sub("", text)
+    return _PAGE_TEXT_PATTERN.sub("", text)
+
+
+def normalize_for_fingerprint(text: str) -> str:
+    """去掉页码、空白并做 NFKC 规范化（全角数字 / 标点统一成半角）。"""
+    return _WS_PATTERN.sub("", _strip_page_marks(text))
+
+
+def content_fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def numbers_fingerprint(stripped: str) -> str:
+    """全文数字序列（按出现顺序）的 SHA-1；任何一个表格数字变了指纹就不同。"""
+    numbers = _NUMBER_PATTERN.findall(stripped)
+    return hashlib.sha1(",".join(numbers).encode("utf-8")).hexdigest()
+
+
+def minhash_signature(normalized: str, *, num_perm: int = 128, shingle: int = 5) -> array:
+    """
+    one-permutation MinHash：每个 shingle 只哈希一次，按哈希值分到 num_perm 个桶，
+    每个桶保留最小值；空桶从右侧最近的非空桶借值（densification）。
+    """
+    bins = array("I", [_EMPTY_BIN]) * num_perm
+    if not normalized:
+        return bins
+
+    shingles = {normalized[i:i + shingle] for i in range(max(1, len(normalized) - shingle + 1))}
+    for piece in shingles:
+        # crc32 后再乘一个奇数常数打散，避免分布不均
+        h = (zlib.crc32(piece.encode("utf-8")) * 0x9E3779B1) & _MASK32
+        b = h % num_perm
+        value = h // num_perm
+        if value < bins[b]:
+            bins[b] = value
+
+    if _EMPTY_BIN in bins:
+        original = bins[:]
+        for i in range(num_perm):
+            if original[i] != _EMPTY_BIN:
+                continue
+            # 向右找最近的非空桶，加上距离偏移以区分借来的值
+            for step in range(1, num_perm):
+                value = original[(i + step) % num_perm]
+                if value != _EMPTY_BIN:
+                    bins[i] = (value + step * 0x01000193) % _MASK32
+                    break
+    return bins
+
+
+def estimate_similarity(sig_a: array, sig_b: array) -> float:
+    if len(sig_a) != len(sig_b) or not sig_a:
+        return 0.0
+    same = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+    return same / len(sig_a)
+
+
+@dataclass
+class DedupMatch:
+    report_id: str
+    similarity: float
+    exact: bool
+    # 数字序列是否与命中的报告完全相同
+    same_numbers: bool = True
+
+
+class DedupIndex:
+    """
+    内存中的去重索引：精确指纹字典 + MinHash LSH 分桶。
+
+    - bands × rows 必须等于 num_perm；默认 16 × 8，候选阈值约 0.7，
+      再用 threshold（默认 0.9）确认；
+    - 每个桶最多检查最近登记的 max_bucket_checks 个候选（新的在前），
+      套用同一模板的大量报告不会让单次查询退化成全量比较，新入库报告的近重复也找得到。
+    """
+
+    def __init__(
+        self,
+        *,
+        num_perm: int = 128,
+        bands: int = 16,
+        threshold: float = 0.9,
+        max_bucket_checks: int = 32,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_bucket_checks = max_bucket_checks
+
+        self._lock = threading.Lock()
+        self._exact: Dict[str, str] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._numbers: Dict[str, str] = {}
+        self._signatures: Dict[str, array] = {}
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, sig: array) -> List[int]:
+        rows = self.rows
+        return [hash(tuple(sig[b * rows:(b + 1) * rows])) for b in range(self.bands)]
+
+    def _prepare(self, text: str) -> Tuple[str, str, array]:
+        stripped = _strip_page_marks(text)
+        normalized = _WS_PATTERN.sub("", stripped)
+        return (
+            content_fingerprint(normalized),
+            numbers_fingerprint(stripped),
+            minhash_signature(normalized, num_perm=self.num_perm),
+        )
+
+    def find(self, text: str, *, same_numbers: bool = False) -> Optional[DedupMatch]:
+        """same_numbers=True 时只接受数字序列完全相同的近重复。"""
+        return self._find_prepared(*self._prepare(text), same_numbers=same_numbers)
+
+    def _find_prepared(
+        self, fingerprint: str, numbers: str, sig: array, *, same_numbers: bool = False
+    ) -> Optional[DedupMatch]:
+        with self._lock:
+            exact_id = self._exact.get(fingerprint)
+            if exact_id is not None:
+                return DedupMatch(report_id=exact_id, similarity=1.0, exact=True)
+
+            best: Optional[DedupMatch] = None
+            seen = set()
+            for band, key in enumerate(self._band_keys(sig)):
+                bucket = self._buckets[band].get(key, [])
+                for report_id in reversed(bucket[-self.max_bucket_checks :]):
+                    if report_id in seen:
+                        continue
+                    seen.add(report_id)
+                    matches_numbers = self._numbers[report_id] == numbers
+                    if same_numbers and not matches_numbers:
+                        continue
+                    similarity = estimate_similarity(sig, self._signatures[report_id])
+                    if similarity >= self.threshold and (
+                        best is None or similarity > best.similarity
+                    ):
+                        best = DedupMatch(
+                            report_id=report_id,
+                            similarity=similarity,
+                            exact=False,
+                            same_numbers=matches_numbers,
+                        )
+            return best
+
+    def add(self, report_id: str, text: str) -> None:
+        self._add_prepared(report_id, *self._prepare(text))
+
+    def _add_prepared(self, report_id: str, fingerprint: str, numbers: str, sig: array) -> None:
+        with self._lock:
+            self._remove_locked(report_id)
+            self._exact.setdefault(fingerprint, report_id)
+            self._fingerprints[report_id] = fingerprint
+            self._numbers[report_id] = numbers
+            self._signatures[report_id] = sig
+            for band, key in enumerate(self._band_keys(sig)):
+                self._buckets[band].setdefault(key, []).append(report_id)
+
+    def remove(self, report_id: str) -> None:
+        with self._lock:
+            self._remove_locked(report_id)
+
+    def _remove_locked(self, report_id: str) -> None:
+        sig = self._signatures.pop(report_id, None)
+        if sig is None:
+            return
+        fingerprint = self._fingerprints.pop(report_id)
+        self._numbers.pop(report_id, None)
+        if self._exact.get(fingerprint) == report_id:
+            del self._exact[fingerprint]
+        for band, key in enumerate(self._band_keys(sig)):
+            bucket = self._buckets[band].get(key)
+            if bucket and report_id in bucket:
+                bucket.remove(report_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def find_or_add(
+        self, report_id: str, text: str, *, same_numbers: bool = False
+    ) -> Optional[DedupMatch]:
+        """查找近重复；没有命中时把这篇登记进索引。指纹只计算一次。"""
+        prepared = self._prepare(text)
+        match = self._find_prepared(*prepared, same_numbers=same_numbers)
+        if match is not None and match.report_id != report_id:
+            return match
+        self._add_prepared(report_id, *prepared)
+        return None
+
+
+_DEDUP_INDEX = DedupIndex()
+
+
+def get_dedup_index() -> DedupIndex:
+    return _DEDUP_INDEX
+
+
+def link_duplicate(full_text: str, report: Report) -> Optional[Dict[str, Any]]:
+    """
+    解析前的去重步骤：
+    - 命中数字序列完全相同的已有报告（且其解析结果可用）时，设置 report.duplicate_of，
+      返回已有 annual_struct 的副本，其中标题 / 机关 / 年度 / 区划按新文本重新提取；
+    - 否则把这篇登记进索引，返回 None，由调用方继续完整解析。
+    """
+    match = _DEDUP_INDEX.find_or_add(report.id, full_text, same_numbers=True)
+    report.duplicate_of = None
+    if match is None:
+        return None
+
+    existing = get_report(match.report_id)
+    struct = existing.annual_struct if existing is not None else None
+    if struct is None or existing.tables_struct is None:
+        _DEDUP_INDEX.add(report.id, full_text)
+        return None
+
+    # annual_struct 每次读取都是新副本，直接改写元数据即可
+    report.duplicate_of = match.report_id
+    meta = extract_report_metadata(full_text)
+    struct.update(title=meta.title, agency=meta.agency, year=meta.year, region=meta.region)
+    return struct
@@ -0,0 +1,66 @@
+"""
+批量导出：按筛选条件逐条产出报告的（投影后的）字典，供 NDJSON 等流式输出使用。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.models.report import Report
+from app.services.report_repository import iter_reports
+from app.services.response_cache import build_struct_view
+
+METADATA_FIELDS = ("id", "title", "agency", "year", "region", "duplicate_of")
+EXPORT_FIELDS = METADATA_FIELDS + ("full_text", "annual_struct")
+DEFAULT_EXPORT_FIELDS = ("id", "title", "agency", "year", "region", "annual_struct")
+
+
+def parse_export_fields(fields: Optional[str]) -> List[str]:
+    """
+    "id,annual_struct.section3.tables" -> ["id", "annual_struct.section3.tables"]；
+    顶层字段必须是 EXPORT_FIELDS 之一，否则抛 ValueError。
+    """
+    if not fields:
+        return list(DEFAULT_EXPORT_FIELDS)
+    paths = list(dict.fromkeys(path.strip() for path in fields.split(",") if path.strip()))
+    if not paths:
+        raise ValueError("fields must not be empty")
+    for path in paths:
+        head = path.split(".", 1)[0]
+        if head not in EXPORT_FIELDS or ("." in path and head != "annual_struct"):
+            raise ValueError(f"unknown field: {path}")
+    return paths
+
+
+def export_record(report: Report, paths: Sequence[str], *, omit_text: bool = False) -> Dict[str, Any]:
+    record: Dict[str, Any] = {}
+    struct_paths: Optional[List[str]] = []
+    for path in paths:
+        if path == "annual_struct":
+            struct_paths = None
+        elif path.startswith("annual_struct."):
+            if struct_paths is not None:
+                struct_paths.append(path[len("annual_struct."):])
+        elif path == "full_text":
+            record["full_text"] = report.full_text
+        else:
+            record[path] = getattr(report, path)
+
+    if struct_paths is None or struct_paths:
+        projection = (tuple(sorted(struct_paths)) if struct_paths else None, omit_text)
+        record["annual_struct"] = build_struct_view(report, projection)
+    return record
+
+
+def iter_export_records(
+    paths: Sequence[str],
+    *,
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    region: Optional[str] = None,
+    after: Optional[str] = None,
+    omit_text: bool = False,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """逐条产出 (report_id, 导出记录)，底层是仓库游标，不会一次性取出全部结果。"""
+    for report in iter_reports(agency=agency, year=year, region=region, after=after):
+        yield report.id, export_record(report, paths, omit_text=omit_text)
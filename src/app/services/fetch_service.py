@@ -0,0 +1,510 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import ssl
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.models.report import Report
+from app.services.fetch_url import (
+    handle_fetched_annual_report,
+    handle_fetched_annual_report_html,
+)
+from app.services.report_repository import get_report
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_REDIRECT_STATUS = {301, 302, 303, 307, 308}
+
+# 读到 EOF 的响应体每次读这么多字节
+_READ_CHUNK = 64 * 1024
+
+
+class BodyTooLarge(ValueError):
+    """响应体（解压前或解压后）超过 max_body_bytes。不重试，直接判定任务失败。"""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"response body exceeds {limit} bytes")
+        self.limit = limit
+
+
+@dataclass
+class FetchJob:
+    """一次抓取任务：URL 以及解析结果要写入的报告 id。"""
+
+    url: str
+    report_id: str
+    title: Optional[str] = None
+
+
+@dataclass
+class FetchResult:
+    url: str
+    # "parsed"：抓到新内容并已解析；"not_modified"：304，跳过解析；"failed"：失败
+    status: str
+    http_status: Optional[int] = None
+    report: Optional[Report] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class CacheEntry:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ConditionalCache:
+    """
+    记录每个 URL 上次成功解析时的 ETag / Last-Modified，
+    下次抓取时带上 If-None-Match / If-Modified-Since。
+
+    path 不为空时可用 load() / save() 持久化为 JSON 文件，
+    方便每周复查任务跨进程复用。
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._entries: Dict[str, CacheEntry] = {}
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        return self._entries.get(url)
+
+    def put(self, url: str, entry: Optional[CacheEntry]) -> None:
+        if entry is None or (entry.etag is None and entry.last_modified is None):
+            self._entries.pop(url, None)
+        else:
+            self._entries[url] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as fh:
+            raw = json.load(fh)
+        self._entries = {url: CacheEntry(**value) for url, value in raw.items()}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({url: asdict(e) for url, e in self._entries.items()}, fh)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class _Response:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    reused: bool = False
+
+    def is_usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+@dataclass
+class _HostPool:
+    """单个 (scheme, host, port) 的连接池 + 并发上限。"""
+
+    scheme: str
+    host: str
+    port: int
+    semaphore: asyncio.Semaphore
+    idle: List[_Connection] = field(default_factory=list)
+    opened: int = 0
+
+    async def acquire(self, ssl_context: Optional[ssl.SSLContext]) -> _Connection:
+        while self.idle:
+            conn = self.idle.pop()
+            if conn.is_usable():
+                conn.reused = True
+                return conn
+            conn.close()
+        reader, writer = await asyncio.open_connection(
+            self.host,
+            self.port,
+            ssl=ssl_context if self.scheme == "https" else None,
+            server_hostname=self.host if self.scheme == "https" else None,
+        )
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def release(self, conn: _Connection, reusable: bool) -> None:
+        if reusable and conn.is_usable():
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+    def close(self) -> None:
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+
+async def _read_chunked(reader: asyncio.StreamReader, limit: int) -> bytes:
+    parts: List[bytes] = []
+    total = 0
+    while True:
+        size_line = await reader.readline()
+        if not size_line:
+            raise ConnectionError("connection closed inside chunked body")
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            # 丢弃 trailer
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            return b"".join(parts)
+        total += size
+        if total > limit:
+            raise BodyTooLarge(limit)
+        parts.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+async def _read_to_eof(reader: asyncio.StreamReader, limit: int) -> bytes:
+    parts: List[bytes] = []
+    total = 0
+    while True:
+        chunk = await reader.read(_READ_CHUNK)
+        if not chunk:
+            return b"".join(parts)
+        total += len(chunk)
+        if total > limit:
+            raise BodyTooLarge(limit)
+        parts.append(chunk)
+
+
+def _decompress(body: bytes, wbits: int, limit: int) -> bytes:
+    """按 wbits 解压（gzip 可能有多段），解压后的总长度同样受 limit 限制。"""
+    parts: List[bytes] = []
+    total = 0
+    while body:
+        decompressor = zlib.decompressobj(wbits)
+        # 最多解出剩余额度 + 1 个字节：超出即说明内容过大，不必解完
+        chunk = decompressor.decompress(body, limit - total + 1)
+        if decompressor.unconsumed_tail or total + len(chunk) > limit:
+            raise BodyTooLarge(limit)
+        chunk += decompressor.flush()
+        total += len(chunk)
+        if total > limit:
+            raise BodyTooLarge(limit)
+        if not decompressor.eof:
+            raise zlib.error("truncated compressed body")
+        parts.append(chunk)
+        body = decompressor.unused_data
+    return b"".join(parts)
+
+
+async def _read_response(reader: asyncio.StreamReader, max_body_bytes: int) -> _Response:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed before response")
+    version, status_text, *_ = status_line.decode("latin-1").split(" ", 2) + [""]
+    status = int(status_text)
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    keep_alive = version.upper() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+    # 原始响应体与解压后的内容都不能超过 max_body_bytes，超出时连接不再复用
+    if status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        body = await _read_chunked(reader, max_body_bytes)
+    elif "content-length" in headers:
+        length = int(headers["content-length"])
+        if length > max_body_bytes:
+            raise BodyTooLarge(max_body_bytes)
+        body = await reader.readexactly(length)
+    else:
+        body = await _read_to_eof(reader, max_body_bytes)
+        keep_alive = False
+
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding == "gzip":
+        body = _decompress(body, 16 + zlib.MAX_WBITS, max_body_bytes)
+    elif encoding == "deflate":
+        body = _decompress(body, zlib.MAX_WBITS, max_body_bytes)
+
+    return _Response(status=status, headers=headers, body=body, keep_alive=keep_alive)
+
+
+def _decode_body(body: bytes, content_type: str) -> str:
+    """按 Content-Type 里的 charset 解码；没有时先试 UTF-8，再退回 GB18030。"""
+    for part in content_type.split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            try:
+                return body.decode(value.strip("\"'"), errors="replace")
+            except LookupError:
+                break
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        return body.decode("gb18030", errors="replace")
+
+
+class AsyncFetchService:
+    """
+    基于 asyncio 的年报抓取服务。
+
+    - 按 host 维护 keep-alive 连接池，并限制全局 / 单 host 并发；
+    - 超时（只计建连和收发，不计排队）、5xx / 429 时按指数退避重试；
+    - 响应体（解压前后）超过 max_body_bytes 时不重试，直接判定失败；
+    - fetch_many 同时处理的任务数不超过 max_jobs；
+    - 报告已入库时用 ConditionalCache 发送条件请求，304 直接跳过解析；
+    - 抓到新内容后交给 handle_fetched_annual_report（在线程中执行，避免阻塞事件循环）；
+      Content-Type 为 HTML 时交给 html_handler，直接按网页表格结构解析。
+
+    用法：
+        async with AsyncFetchService() as service:
+            results = await service.fetch_many(jobs)
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 64,
+        max_per_host: int = 4,
+        timeout: float = 30.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_redirects: int = 5,
+        max_body_bytes: int = 32 * 1024 * 1024,
+        max_jobs: int = 256,
+        cache: Optional[ConditionalCache] = None,
+        user_agent: str = "govnianbao-fetcher/0.1",
+        handler: Callable[[str, Report], Report] = handle_fetched_annual_report,
+        html_handler: Optional[
+            Callable[[str, Report], Report]
+        ] = handle_fetched_annual_report_html,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_redirects = max_redirects
+        self.max_body_bytes = max_body_bytes
+        self.max_jobs = max_jobs
+        self.cache = cache if cache is not None else ConditionalCache()
+        self.user_agent = user_agent
+        self.handler = handler
+        self.html_handler = html_handler
+
+        self._pools: Dict[Tuple[str, str, int], _HostPool] = {}
+        self._global: Optional[asyncio.Semaphore] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    async def __aenter__(self) -> "AsyncFetchService":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+
+    @property
+    def connections_opened(self) -> int:
+        return sum(pool.opened for pool in self._pools.values())
+
+    def _pool_for(self, scheme: str, host: str, port: int) -> _HostPool:
+        key = (scheme, host, port)
+        pool = self._pools.get(key)
+        if pool is None:
+            # Semaphore 需要在事件循环内创建（兼容 Python 3.9）
+            pool = _HostPool(scheme, host, port, asyncio.Semaphore(self.max_per_host))
+            self._pools[key] = pool
+        return pool
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.max_backoff, float(retry_after))
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _send_once(self, url: str, headers: Dict[str, str]) -> _Response:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"unsupported url scheme: {url}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        if scheme == "https" and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+
+        host_header = host if parts.port is None else f"{host}:{port}"
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host_header}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        pool = self._pool_for(scheme, host, port)
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_connections)
+        # 先排单 host 的队，再占全局名额：慢 host 上排队的请求不占用全局名额；
+        # 排队时间不计入超时，timeout 只限制建连和收发
+        async with pool.semaphore, self._global:
+            return await asyncio.wait_for(
+                self._exchange(pool, url, request), timeout=self.timeout
+            )
+
+    async def _exchange(self, pool: _HostPool, url: str, request: bytes) -> _Response:
+        # 复用的连接可能已被服务端关闭：此时换一条新连接再试一次，不计入重试次数
+        for _ in range(2):
+            conn = await pool.acquire(self._ssl_context)
+            try:
+                conn.writer.write(request)
+                await conn.writer.drain()
+                response = await _read_response(conn.reader, self.max_body_bytes)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pool.release(conn, reusable=False)
+                if conn.reused:
+                    continue
+                raise
+            except BaseException:
+                pool.release(conn, reusable=False)
+                raise
+            pool.release(conn, reusable=response.keep_alive)
+            return response
+        raise ConnectionError(f"unable to reuse or open connection for {url}")
+
+    async def _get(self, url: str, entry: Optional[CacheEntry]) -> Tuple[str, _Response]:
+        """带重试、重定向和条件请求头的 GET，返回 (最终 URL, 响应)。"""
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        redirects = 0
+        attempt = 0
+        while True:
+            try:
+                response = await self._send_once(url, headers)
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError) as exc:
+                if attempt >= self.retries:
+                    raise
+                delay = self._backoff_delay(attempt, None)
+                logger.warning("Fetch %s failed (%r), retrying in %.2fs", url, exc, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status in _RETRYABLE_STATUS and attempt < self.retries:
+                delay = self._backoff_delay(attempt, response.headers.get("retry-after"))
+                logger.warning(
+                    "Fetch %s returned %s, retrying in %.2fs", url, response.status, delay
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            location = response.headers.get("location")
+            if response.status in _REDIRECT_STATUS and location and redirects < self.max_redirects:
+                redirects += 1
+                url = urljoin(url, location)
+                continue
+
+            return url, response
+
+    async def fetch(self, job: FetchJob) -> FetchResult:
+        # 只有已入库的报告才发条件请求：否则 304 之后没有可用的解析结果
+        stored = get_report(job.report_id)
+        entry = self.cache.get(job.url) if stored is not None else None
+        try:
+            _, response = await self._get(job.url, entry)
+        except Exception as exc:
+            logger.warning("Failed to fetch %s: %r", job.url, exc)
+            return FetchResult(url=job.url, status="failed", error=repr(exc))
+
+        if response.status == 304 and stored is not None:
+            return FetchResult(
+                url=job.url,
+                status="not_modified",
+                http_status=304,
+                report=stored,
+            )
+
+        if response.status != 200:
+            return FetchResult(
+                url=job.url,
+                status="failed",
+                http_status=response.status,
+                error=f"unexpected HTTP status {response.status}",
+            )
+
+        content_type = response.headers.get("content-type", "")
+        text = _decode_body(response.body, content_type)
+        handler = self.handler
+        if self.html_handler is not None and "html" in content_type.lower():
+            handler = self.html_handler
+        report = Report(id=job.report_id, title=job.title)
+        try:
+            report = await asyncio.to_thread(handler, text, report)
+        except Exception as exc:
+            logger.exception("Failed to handle fetched report %s", job.url)
+            return FetchResult(
+                url=job.url, status="failed", http_status=200, error=repr(exc)
+            )
+
+        # 只有解析入库成功后才记录校验器，失败的页面下次仍会完整重抓
+        self.cache.put(
+            job.url,
+            CacheEntry(
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            ),
+        )
+        return FetchResult(url=job.url, status="parsed", http_status=200, report=report)
+
+    async def fetch_many(self, jobs: Iterable[FetchJob]) -> List[FetchResult]:
+        # 限制同时在途的任务数：排队的任务不占连接，也不会同时持有响应体和解析结果
+        semaphore = asyncio.Semaphore(self.max_jobs)
+
+        async def bounded(job: FetchJob) -> FetchResult:
+            async with semaphore:
+                return await self.fetch(job)
+
+        return list(await asyncio.gather(*(bounded(job) for job in jobs)))
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import asdict
 
 from app.models.report import Report
-from app.parse.annual_report import parse_annual_report_from_text
+from app.parse.annual_report import (
+    fill_report_metadata,
+    parse_annual_report_from_text,
+    read_annual_report_html,
+)
+from app.services.dedup import link_duplicate
 from app.services.report_repository import save_report
 
 logger = logging.getLogger(__name__)
@@ -12,12 +18,45 @@ logger = logging.getLogger(__name__)
 def handle_fetched_annual_report(full_text: str, report: Report) -> Report:
     """处理 URL 抓取到的年度报告文本并填充解析结果。"""
 
+    # 近重复的文本直接复用已有解析结果
+    annual_struct = link_duplicate(full_text, report)
+    if annual_struct is None:
+        try:
+            annual_struct = parse_annual_report_from_text(full_text)
+        except Exception:
+            logger.exception("Failed to parse annual report text for report %s", report.id)
+            annual_struct = None
+
+    report.full_text = full_text
+    report.annual_struct = annual_struct
+    report.source_format = "text"
+    fill_report_metadata(report, full_text, annual_struct)
+    return save_report(report)
+
+
+def handle_fetched_annual_report_html(html: str, report: Report) -> Report:
+    """处理 URL 抓取到的年报网页 HTML，直接按网页表格结构解析。"""
+
     try:
-        annual_struct = parse_annual_report_from_text(full_text)
+        extractor = read_annual_report_html(html)
+        full_text = extractor.text
     except Exception:
-        logger.exception("Failed to parse annual report text for report %s", report.id)
-        annual_struct = None
+        logger.exception("Failed to parse annual report html for report %s", report.id)
+        extractor, full_text = None, html
+
+    # 与纯文本入口相同：拍平后的正文近重复时直接复用已有解析结果
+    annual_struct = link_duplicate(full_text, report)
+    if annual_struct is None and extractor is not None:
+        try:
+            annual_struct = asdict(extractor.to_report(with_tables=True))
+        except Exception:
+            logger.exception("Failed to parse annual report html for report %s", report.id)
+            annual_struct = None
 
     report.full_text = full_text
     report.annual_struct = annual_struct
+    # 保留网页原文：重解析时仍按网页表格结构解析
+    report.source_format = "html"
+    report.source_html = html
+    fill_report_metadata(report, full_text, annual_struct)
     return save_report(report)
@@ -3,8 +3,13 @@ from __future__ import annotations
 import logging
 
 from app.models.report import Report
-from app.parse.annual_report import parse_annual_report_from_text
+from app.parse.annual_report import (
+    fill_report_metadata,
+    parse_annual_report_from_text,
+)
+from app.services.dedup import link_duplicate
 from app.services.report_repository import save_report
+from govnianbao.pdf_text import extract_pdf_text
 
 logger = logging.getLogger(__name__)
 
@@ -12,12 +17,23 @@ logger = logging.getLogger(__name__)
 def handle_uploaded_annual_report(full_text: str, report: Report) -> Report:
     """处理上传 PDF 抽取的文本并填充年度报告结构。"""
 
-    try:
-        annual_struct = parse_annual_report_from_text(full_text)
-    except Exception:
-        logger.exception("Failed to parse annual report text for report %s", report.id)
-        annual_struct = None
+    # 近重复的文本直接复用已有解析结果
+    annual_struct = link_duplicate(full_text, report)
+    if annual_struct is None:
+        try:
+            annual_struct = parse_annual_report_from_text(full_text)
+        except Exception:
+            logger.exception("Failed to parse annual report text for report %s", report.id)
+            annual_struct = None
 
     report.full_text = full_text
     report.annual_struct = annual_struct
+    report.source_format = report.source_format or "text"
+    fill_report_metadata(report, full_text, annual_struct)
     return save_report(report)
+
+
+def handle_uploaded_pdf(data: bytes, report: Report) -> Report:
+    """从上传的 PDF 抽取文本（按页缓存，重复上传或重跑时不再重新抽取）后入库。"""
+    report.source_format = "pdf"
+    return handle_uploaded_annual_report(extract_pdf_text(data), report)
@@ -0,0 +1,47 @@
+"""
+在线程池里解析年报文本，并把时限 / 客户端断开接到 govnianbao 的协作式取消上。
+
+解析本身是同步 CPU 代码，不能被 asyncio 取消；这里在等待时定期检查客户端
+是否已断开，断开就 cancel() 对应的 Deadline，解析会在下一个检查点停下，
+工作线程随即释放。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.parse.annual_report import parse_annual_report_from_text
+from govnianbao.deadline import Deadline
+
+# 检查客户端是否断开的间隔（秒）
+DISCONNECT_POLL_SECONDS = 0.05
+
+
+async def parse_text_cancellable(
+    full_text: str,
+    *,
+    budget_ms: Optional[float] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> Dict[str, Any]:
+    """
+    解析并返回 annual_struct。超时或被取消时返回已完成部分，
+    annual_struct["parse_diagnostics"] 中记录状态（"timeout" / "cancelled"）和停止的阶段。
+    """
+    deadline = Deadline.from_budget(budget_ms)
+    work = asyncio.ensure_future(
+        run_in_threadpool(parse_annual_report_from_text, full_text, deadline=deadline)
+    )
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return work.result()
+            if is_disconnected is not None and not deadline.cancelled and await is_disconnected():
+                deadline.cancel()
+    finally:
+        # 等待方自己被取消（或出错）时，让工作线程也停下来
+        if not work.done():
+            deadline.cancel()
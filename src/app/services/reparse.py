@@ -0,0 +1,252 @@
+"""
+解析器 / 模板升级后的后台重解析。
+
+按 id 顺序分批遍历仓库中的报告，跳过 annual_struct 版本戳已是最新的，
+其余报告交给 govnianbao.batch 的进程池重新解析：按入库时记录的 source_format
+选解析器（HTML 来源用保存的网页原文走 HTML 解析器，其余解析 full_text），
+每篇限时 budget_ms，超时的报告保留原有结果（计为 timed_out）。
+新结果用 save_report_if_version 原子替换（期间被重新入库的报告不覆盖，计为冲突），
+发布机关 / 年度 / 行政区划按新结果重新填写，仓库索引和各保存回调随之更新。
+
+不挤占在线入库：
+- 解析在子进程里做，进程数默认只有 2；在途任务有上限，不会把整个库读进内存；
+- max_rate（篇 / 秒）限速；替换时只短暂持有仓库锁，保存回调（检索、汇总等）
+  在锁外执行，不阻塞读者；
+- 同一时间只允许一个任务，可随时取消。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.models.report import Report
+from app.parse.annual_report import fill_report_metadata
+from app.services.report_repository import (
+    get_report_with_version,
+    iter_reports,
+    save_report_if_version,
+)
+from govnianbao import parse_annual_reports_batch
+from govnianbao.batch import Source
+from govnianbao.versions import current_versions, is_current
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_WORKERS = 2
+# 每篇报告的解析时限（毫秒）
+DEFAULT_BUDGET_MS = 30_000
+
+
+def _needs_reparse(report: Report, force: bool) -> bool:
+    if force:
+        return True
+    struct = report.tables_struct
+    return struct is None or not is_current(struct.get("versions"))
+
+
+def _source_of(report: Report) -> Optional[Source]:
+    """按来源格式取重解析的输入；没有可解析的原文时返回 None。"""
+    if report.source_format == "html":
+        html = report.source_html
+        if html:
+            return ("html", html)
+    full_text = report.full_text
+    return full_text or None
+
+
+class ReparseJob:
+    """一次后台重解析任务；progress() 可在任意线程读取。"""
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_rate: Optional[float] = None,
+        force: bool = False,
+        budget_ms: Optional[float] = DEFAULT_BUDGET_MS,
+    ) -> None:
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_rate = max_rate
+        self.force = force
+        self.budget_ms = budget_ms
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.counts: Dict[str, int] = {
+            "scanned": 0,
+            "reparsed": 0,
+            "skipped_current": 0,
+            "skipped_no_text": 0,
+            "timed_out": 0,
+            "conflicts": 0,
+            "failed": 0,
+        }
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ---- 控制 ----
+
+    def start(self) -> "ReparseJob":
+        self._thread = threading.Thread(target=self.run, name="reparse-job", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.status not in ("pending", "running")
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def progress(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "status": self.status,
+            "error": self.error,
+            "versions": current_versions(),
+            "force": self.force,
+            "batch_size": self.batch_size,
+            "max_workers": self.max_workers,
+            "max_rate": self.max_rate,
+            "budget_ms": self.budget_ms,
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            **counts,
+        }
+
+    # ---- 执行 ----
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def _stale_sources(self, pending: List[Tuple[str, int]]) -> Iterator[Source]:
+        """遍历仓库，产出需要重解析的原文；对应的 (id, 版本号) 按同样顺序放进 pending。"""
+        for report in iter_reports(batch_size=self.batch_size):
+            if self._cancel.is_set():
+                return
+            self._count("scanned")
+            if not _needs_reparse(report, self.force):
+                self._count("skipped_current")
+                continue
+            found = get_report_with_version(report.id)
+            if found is None:
+                continue
+            report, version = found
+            source = _source_of(report)
+            if source is None:
+                self._count("skipped_no_text")
+                continue
+            pending.append((report.id, version))
+            yield source
+
+    def _throttle(self, done: int) -> None:
+        if not self.max_rate or self.started_at is None:
+            return
+        ahead = done / self.max_rate - (time.time() - self.started_at)
+        if ahead > 0:
+            self._cancel.wait(ahead)
+
+    def _swap(self, report_id: str, version: int, annual_struct: Dict[str, Any]) -> None:
+        found = get_report_with_version(report_id)
+        if found is None or found[1] != version:
+            self._count("conflicts")
+            return
+        stored = found[0]
+        # 浅拷贝：压缩后的全文直接共用，不再解压 / 重新压缩
+        report = stored.model_copy()
+        report.annual_struct = annual_struct
+        # 旧解析结果填的标题随新结果更新，调用方给的标题保留
+        old_struct = stored.tables_struct or {}
+        if report.title and report.title == old_struct.get("title"):
+            report.title = None
+        fill_report_metadata(report, report.full_text or "", annual_struct)
+        if save_report_if_version(report, version):
+            self._count("reparsed")
+        else:
+            self._count("conflicts")
+
+    def run(self) -> None:
+        """在当前线程里执行（start() 会放到后台线程）。"""
+        self.status = "running"
+        self.started_at = time.time()
+        pending: List[Tuple[str, int]] = []
+        done = 0
+        try:
+            results = parse_annual_reports_batch(
+                self._stale_sources(pending),
+                max_workers=self.max_workers,
+                chunksize=max(1, self.batch_size // max(1, self.max_workers)),
+                max_pending_chunks=max(1, self.max_workers),
+                budget_ms=self.budget_ms,
+            )
+            for parsed in results:
+                report_id, version = pending.pop(0)
+                if parsed.parse_diagnostics:
+                    # 超时只拿到部分结果：不替换已有的完整结果
+                    logger.warning(
+                        "reparse: report %s stopped at %s",
+                        report_id,
+                        parsed.parse_diagnostics.get("stage"),
+                    )
+                    self._count("timed_out")
+                else:
+                    try:
+                        self._swap(report_id, version, asdict(parsed))
+                    except Exception:
+                        logger.exception("reparse: failed to replace report %s", report_id)
+                        self._count("failed")
+                done += 1
+                if self._cancel.is_set():
+                    break
+                self._throttle(done)
+            self.status = "cancelled" if self._cancel.is_set() else "finished"
+        except Exception as exc:
+            logger.exception("reparse job failed")
+            self.status = "failed"
+            self.error = repr(exc)
+        finally:
+            self.finished_at = time.time()
+            logger.info(f"reparse job {self.status}: {self.progress()}")
+
+
+_CURRENT_JOB: Optional[ReparseJob] = None
+_JOB_LOCK = threading.Lock()
+
+
+def start_reparse_job(**options: Any) -> ReparseJob:
+    """启动后台重解析；已有任务在跑时抛 RuntimeError。"""
+    global _CURRENT_JOB
+    with _JOB_LOCK:
+        if _CURRENT_JOB is not None and _CURRENT_JOB.running:
+            raise RuntimeError("a reparse job is already running")
+        _CURRENT_JOB = ReparseJob(**options)
+        return _CURRENT_JOB.start()
+
+
+def get_reparse_job() -> Optional[ReparseJob]:
+    return _CURRENT_JOB
+
+
+def cancel_reparse_job() -> Optional[ReparseJob]:
+    job = _CURRENT_JOB
+    if job is not None:
+        job.cancel()
+    return job
@@ -1,17 +1,248 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+import itertools
+import threading
+from bisect import bisect_right, insort
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from app.models.report import Report
+from govnianbao.metadata import extract_region_path
 
 
 _REPORT_STORE: Dict[str, Report] = {}
 
+# 按 id 有序的索引，列表查询用 keyset 分页（id > cursor）
+_ALL_IDS: List[str] = []
+_INDEXES: Dict[str, Dict[Any, List[str]]] = {
+    "agency": {},
+    "year": {},
+    "agency_year": {},
+    # 行政区划的每一级前缀都建索引：“江苏省”“江苏省苏州市”
+    "region": {},
+    "region_year": {},
+}
+# 记录每个 id 当时写入了哪些索引项：调用方可能直接改了已存对象的字段再保存
+_INDEXED_KEYS: Dict[str, List[Tuple[str, Any]]] = {}
+# 每次保存分配一个全局递增的版本号，用于响应缓存 / ETag（删除后重建也不会撞号）
+_VERSIONS: Dict[str, int] = {}
+_VERSION_SEQ = itertools.count(1)
+# 异常检测写回的标记：report_id -> {"version", "score", "cells", ...}；报告重新保存或删除时清除
+_ANOMALIES: Dict[str, Dict[str, Any]] = {}
+_LOCK = threading.RLock()
+# 写入（保存 / 删除及其回调）串行执行，回调按写入顺序生效；
+# 回调在 _LOCK 之外运行，切分正文、更新汇总等开销不会阻塞读者
+_WRITE_LOCK = threading.RLock()
 
-def save_report(report: Report) -> Report:
+# 保存 / 删除后的回调，供汇总、检索等派生数据增量更新
+# save 回调参数为 (旧报告或 None, 新报告)，delete 回调参数为被删除的报告；
+# 回调执行时新数据已对读者可见，派生数据稍后才跟上
+SaveHook = Callable[[Optional[Report], Report], None]
+DeleteHook = Callable[[Report], None]
+_SAVE_HOOKS: List[SaveHook] = []
+_DELETE_HOOKS: List[DeleteHook] = []
+
+
+def add_save_hook(hook: SaveHook) -> None:
+    _SAVE_HOOKS.append(hook)
+
+
+def add_delete_hook(hook: DeleteHook) -> None:
+    _DELETE_HOOKS.append(hook)
+
+
+def _index_keys(report: Report) -> List[Tuple[str, Any]]:
+    keys: List[Tuple[str, Any]] = []
+    if report.agency:
+        keys.append(("agency", report.agency))
+    if report.year is not None:
+        keys.append(("year", report.year))
+    if report.agency and report.year is not None:
+        keys.append(("agency_year", (report.agency, report.year)))
+    for region in extract_region_path(report.region):
+        keys.append(("region", region))
+        if report.year is not None:
+            keys.append(("region_year", (region, report.year)))
+    return keys
+
+
+def _unindex(report_id: str) -> None:
+    for name, value in _INDEXED_KEYS.pop(report_id, []):
+        ids = _INDEXES[name].get(value)
+        if not ids:
+            continue
+        pos = bisect_right(ids, report_id) - 1
+        if pos >= 0 and ids[pos] == report_id:
+            del ids[pos]
+        if not ids:
+            del _INDEXES[name][value]
+
+
+def _store(report: Report) -> Optional[Report]:
+    """写入报告和索引（调用方持有 _LOCK），返回被覆盖的旧报告。"""
+    old = _REPORT_STORE.get(report.id)
+    if old is not None:
+        _unindex(report.id)
+    else:
+        insort(_ALL_IDS, report.id)
     _REPORT_STORE[report.id] = report
+    _VERSIONS[report.id] = next(_VERSION_SEQ)
+    _ANOMALIES.pop(report.id, None)
+
+    keys = _index_keys(report)
+    for name, value in keys:
+        insort(_INDEXES[name].setdefault(value, []), report.id)
+    _INDEXED_KEYS[report.id] = keys
+    return old
+
+
+def _run_save_hooks(old: Optional[Report], report: Report) -> None:
+    for hook in _SAVE_HOOKS:
+        hook(old, report)
+
+
+def save_report(report: Report) -> Report:
+    with _WRITE_LOCK:
+        with _LOCK:
+            old = _store(report)
+        _run_save_hooks(old, report)
     return report
 
 
+def save_report_if_version(report: Report, expected_version: int) -> bool:
+    """
+    compare-and-swap：只有当前版本号仍是 expected_version 时才保存，返回是否保存。
+    供后台任务替换结果：读取之后若报告已被重新入库，就不用旧数据算出的结果覆盖它。
+    """
+    with _WRITE_LOCK:
+        with _LOCK:
+            if _VERSIONS.get(report.id) != expected_version:
+                return False
+            old = _store(report)
+        _run_save_hooks(old, report)
+        return True
+
+
+def set_anomaly_flags(flags: Dict[str, Dict[str, Any]], *, replace: bool = True) -> int:
+    """
+    写入异常检测结果：flags 为 report_id -> {"version": 检测时的版本号, "score": 严重程度, ...}。
+    版本号与当前不一致（检测期间被重新保存）的条目丢弃；replace=True 时先清空旧标记。
+    返回实际写入的条数。
+    """
+    with _LOCK:
+        if replace:
+            _ANOMALIES.clear()
+        written = 0
+        for report_id, flag in flags.items():
+            if _VERSIONS.get(report_id) == flag.get("version"):
+                _ANOMALIES[report_id] = flag
+                written += 1
+        return written
+
+
+def get_anomaly_flags(report_id: str) -> Optional[Dict[str, Any]]:
+    return _ANOMALIES.get(report_id)
+
+
+def review_queue(*, limit: int = 50, offset: int = 0) -> Tuple[int, List[Tuple[Report, Dict[str, Any]]]]:
+    """按严重程度从高到低列出被标记的报告，返回 (总数, 这一页的 (报告, 标记))。"""
+    with _LOCK:
+        ranked = sorted(_ANOMALIES.items(), key=lambda item: (-item[1]["score"], item[0]))
+        page = ranked[offset:offset + limit]
+        return len(ranked), [(_REPORT_STORE[report_id], flag) for report_id, flag in page]
+
+
 def get_report(report_id: str) -> Optional[Report]:
     return _REPORT_STORE.get(report_id)
+
+
+def get_report_with_version(report_id: str) -> Optional[Tuple[Report, int]]:
+    """同时取出报告和它当前的版本号（同一把锁内读取，二者一致）。"""
+    with _LOCK:
+        report = _REPORT_STORE.get(report_id)
+        if report is None:
+            return None
+        return report, _VERSIONS[report_id]
+
+
+def delete_report(report_id: str) -> bool:
+    with _WRITE_LOCK:
+        with _LOCK:
+            report = _REPORT_STORE.pop(report_id, None)
+            if report is None:
+                return False
+            _unindex(report_id)
+            _VERSIONS.pop(report_id, None)
+            _ANOMALIES.pop(report_id, None)
+            pos = bisect_right(_ALL_IDS, report_id) - 1
+            if pos >= 0 and _ALL_IDS[pos] == report_id:
+                del _ALL_IDS[pos]
+
+        for hook in _DELETE_HOOKS:
+            hook(report)
+    return True
+
+
+def all_reports() -> List[Report]:
+    """当前所有报告的快照（按 id 升序），供派生数据首次构建时回填。"""
+    with _LOCK:
+        return [_REPORT_STORE[report_id] for report_id in _ALL_IDS]
+
+
+def _ids_for(
+    agency: Optional[str], year: Optional[int], region: Optional[str] = None
+) -> List[str]:
+    if region:
+        if year is not None:
+            ids = _INDEXES["region_year"].get((region, year), [])
+        else:
+            ids = _INDEXES["region"].get(region, [])
+        if agency:
+            # 区划 + 机关同时给定时，以机关索引为准再按区划过滤
+            allowed = set(ids)
+            return [rid for rid in _ids_for(agency, year) if rid in allowed]
+        return ids
+    if agency and year is not None:
+        return _INDEXES["agency_year"].get((agency, year), [])
+    if agency:
+        return _INDEXES["agency"].get(agency, [])
+    if year is not None:
+        return _INDEXES["year"].get(year, [])
+    return _ALL_IDS
+
+
+def list_reports(
+    *,
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    region: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 50,
+) -> List[Report]:
+    """
+    按发布机关 / 年度 / 行政区划筛选报告，按 id 升序返回 id > after 的前 limit 条。
+    直接走有序索引，不需要遍历所有报告。
+    """
+    with _LOCK:
+        ids = _ids_for(agency, year, region)
+        start = bisect_right(ids, after) if after is not None else 0
+        return [_REPORT_STORE[report_id] for report_id in ids[start:start + limit]]
+
+
+def iter_reports(
+    *,
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    region: Optional[str] = None,
+    after: Optional[str] = None,
+    batch_size: int = 200,
+) -> Iterator[Report]:
+    """
+    按 id 升序逐条产出符合条件的报告（游标方式）：每次只在锁内取一批，
+    批与批之间释放锁，内存占用与结果总数无关；期间新写入 / 删除的报告按 id 位置自然可见或跳过。
+    """
+    while True:
+        batch = list_reports(agency=agency, year=year, region=region, after=after, limit=batch_size)
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1].id
@@ -0,0 +1,247 @@
+"""
+annual_struct 等大响应的编码结果缓存。
+
+同一份报告在同一版本、同一投影下，JSON 编码结果和 gzip / br 压缩结果都只计算一次：
+- 缓存键为 (report_id, 版本号, 投影)，报告重新保存后版本号变化，旧条目自然失效；
+- ETag 取编码结果的摘要（强校验），不同压缩变体带不同后缀；
+- 压缩变体在第一次被请求时生成，之后直接复用。
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models.report import Report
+from app.services.report_repository import add_delete_hook, add_save_hook
+
+try:  # brotli 为可选依赖：未安装时只提供 gzip
+    import brotli
+except ImportError:  # pragma: no cover - 取决于运行环境
+    brotli = None
+
+CACHE_SIZE = 256
+# 小于这个字节数的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+
+# 需要“去掉正文”时移除的 section 字段
+TEXT_FIELDS = ("text", "raw_text")
+
+Projection = Tuple[Optional[Tuple[str, ...]], bool]
+
+
+def encode_json(value: Any) -> bytes:
+    # 与 FastAPI 默认 JSONResponse 的输出保持一致
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """把 "section3.tables,title" 解析成有序去重的路径元组；为空表示不投影。"""
+    if not fields:
+        return None
+    paths = [path.strip() for path in fields.split(",") if path.strip()]
+    if not paths:
+        raise ValueError("fields must not be empty")
+    return tuple(sorted(set(paths)))
+
+
+def project(value: Dict[str, Any], paths: Iterable[str]) -> Dict[str, Any]:
+    """
+    按点分路径取出子结构，保持原有嵌套：
+        project(struct, ["section3.tables"]) -> {"section3": {"tables": {...}}}
+    不存在的路径直接忽略。
+    """
+    result: Dict[str, Any] = {}
+    for path in paths:
+        parts = path.split(".")
+        node: Any = value
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                break
+            node = node[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = node
+    return result
+
+
+def _omit_texts(struct: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: {f: v for f, v in value.items() if f not in TEXT_FIELDS}
+        if key.startswith("section") and isinstance(value, dict)
+        else value
+        for key, value in struct.items()
+    }
+
+
+def _needs_text(paths: Optional[Sequence[str]]) -> bool:
+    if paths is None:
+        return True
+    for path in paths:
+        parts = path.split(".")
+        # "section1" 或 "section1.text" 都会用到正文
+        if len(parts) == 1 and parts[0].startswith("section"):
+            return True
+        if len(parts) >= 2 and parts[1] in TEXT_FIELDS:
+            return True
+    return False
+
+
+def build_struct_view(report: Report, projection: Projection) -> Optional[Dict[str, Any]]:
+    """按投影取出 annual_struct；不需要正文时只读表格视图，不解压。"""
+    paths, omit_text = projection
+    if omit_text or not _needs_text(paths):
+        struct = report.tables_struct
+        if struct is not None and omit_text:
+            struct = _omit_texts(struct)
+    else:
+        struct = report.annual_struct
+    if struct is None:
+        return None
+    return project(struct, paths) if paths is not None else struct
+
+
+class EncodedPayload:
+    """一份编码好的响应体及其按需生成的压缩变体。"""
+
+    __slots__ = ("body", "digest", "_variants", "_lock")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self._variants: Dict[str, bytes] = {"identity": body}
+        self._lock = threading.Lock()
+
+    def etag(self, encoding: str = "identity") -> str:
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match 与任一变体的 ETag 匹配即可返回 304（GET 按弱比较处理）。"""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag.strip('"').split("-", 1)[0] == self.digest:
+                return True
+        return False
+
+    def variant(self, encoding: str) -> bytes:
+        data = self._variants.get(encoding)
+        if data is not None:
+            return data
+        with self._lock:
+            data = self._variants.get(encoding)
+            if data is None:
+                if encoding == "gzip":
+                    data = gzip.compress(self.body, compresslevel=6, mtime=0)
+                elif encoding == "br" and brotli is not None:
+                    data = brotli.compress(self.body, quality=5)
+                else:
+                    raise ValueError(f"unsupported encoding: {encoding}")
+                self._variants[encoding] = data
+        return data
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], size: int) -> str:
+    """按 Accept-Encoding（含 q 值）选择压缩方式；同等权重时 br 优先。"""
+    if not accept_encoding or size < MIN_COMPRESS_SIZE:
+        return "identity"
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = "identity", 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class ResponseCache:
+    def __init__(self, capacity: int = CACHE_SIZE) -> None:
+        self.capacity = capacity
+        self._items: "OrderedDict[Tuple[str, int, Projection], EncodedPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int, Projection]) -> Optional[EncodedPayload]:
+        with self._lock:
+            payload = self._items.get(key)
+            if payload is not None:
+                self._items.move_to_end(key)
+            return payload
+
+    def put(self, key: Tuple[str, int, Projection], payload: EncodedPayload) -> None:
+        with self._lock:
+            self._items[key] = payload
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def discard(self, report_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._items if key[0] == report_id]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_STRUCT_CACHE = ResponseCache()
+
+
+def get_struct_cache() -> ResponseCache:
+    return _STRUCT_CACHE
+
+
+def encoded_annual_struct(
+    report: Report, version: int, projection: Projection
+) -> Optional[EncodedPayload]:
+    """取出（或生成并缓存）这份报告在该版本、该投影下的 annual_struct 编码结果。"""
+    key = (report.id, version, projection)
+    payload = _STRUCT_CACHE.get(key)
+    if payload is not None:
+        return payload
+
+    struct = build_struct_view(report, projection)
+    if struct is None:
+        return None
+    payload = EncodedPayload(encode_json(struct))
+    _STRUCT_CACHE.put(key, payload)
+    return payload
+
+
+def _install() -> None:
+    # 版本号已经区分了新旧内容，这里只是尽早释放不会再命中的条目
+    add_save_hook(lambda old, report: _STRUCT_CACHE.discard(report.id))
+    add_delete_hook(lambda report: _STRUCT_CACHE.discard(report.id))
+
+
+_install()
@@ -0,0 +1,154 @@
+"""
+按 (区划, 年度) 和 (机关, 年度) 预先汇总的表格数据。
+
+报告保存 / 覆盖 / 删除时，通过仓库回调增量更新：
+先减去这份报告上一次的贡献，再加上新的贡献。
+查询时直接读汇总结果，不再遍历每篇报告的 annual_struct。
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.models.report import Report
+from app.services.report_repository import add_delete_hook, add_save_hook, all_reports
+from govnianbao.metadata import extract_region_path
+from govnianbao.template_tables import TEMPLATE_TABLES
+
+CellKey = Tuple[str, str, str]  # (table_key, row_key, col_key)
+ScopeKey = Tuple[str, str, int]  # ("region" | "agency", 名称, 年度)
+
+
+class _Rollup:
+    __slots__ = ("reports", "sums", "counts")
+
+    def __init__(self) -> None:
+        self.reports = 0
+        # 每个单元格的合计值，以及参与合计的非空单元格数
+        self.sums: Dict[CellKey, float] = {}
+        self.counts: Dict[CellKey, int] = {}
+
+    def apply(self, cells: List[Tuple[CellKey, float]], sign: int) -> None:
+        self.reports += sign
+        for key, value in cells:
+            self.sums[key] = self.sums.get(key, 0) + sign * value
+            count = self.counts.get(key, 0) + sign
+            if count:
+                self.counts[key] = count
+            else:
+                self.counts.pop(key, None)
+                self.sums.pop(key, None)
+
+    def to_dict(self, table: Optional[str] = None) -> Dict[str, Any]:
+        tables: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (table_key, row_key, col_key), value in self.sums.items():
+            if table is not None and table_key != table:
+                continue
+            tables.setdefault(table_key, {}).setdefault(row_key, {})[col_key] = value
+        return {"reports": self.reports, "tables": tables}
+
+
+# (作用域, 名称) -> {年度: 汇总}
+_ROLLUPS: Dict[Tuple[str, str], Dict[int, _Rollup]] = {}
+# 每篇报告上一次计入汇总的 (作用域, 单元格) 快照，用于覆盖 / 删除时精确扣减
+_CONTRIBUTIONS: Dict[str, Tuple[List[ScopeKey], List[Tuple[CellKey, float]]]] = {}
+_LOCK = threading.Lock()
+
+
+def iter_struct_cells(annual_struct: Optional[Dict[str, Any]]) -> Iterator[Tuple[CellKey, float]]:
+    """按 TEMPLATE_TABLES 遍历 annual_struct 中所有非空数值单元格。"""
+    if not annual_struct:
+        return
+    for table_key, table_def in TEMPLATE_TABLES.items():
+        section = annual_struct.get(f"section{table_def['section']}") or {}
+        table = (section.get("tables") or {}).get(table_key) or {}
+        for row_key, row in (table.get("cells") or {}).items():
+            for col_key, value in (row or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield (table_key, row_key, col_key), value
+
+
+def _scopes(report: Report) -> List[ScopeKey]:
+    if report.year is None:
+        return []
+    scopes: List[ScopeKey] = [
+        ("region", region, report.year) for region in extract_region_path(report.region)
+    ]
+    if report.agency:
+        scopes.append(("agency", report.agency, report.year))
+    return scopes
+
+
+def _retract(report_id: str) -> None:
+    previous = _CONTRIBUTIONS.pop(report_id, None)
+    if previous is None:
+        return
+    scopes, cells = previous
+    for scope, name, year in scopes:
+        by_year = _ROLLUPS.get((scope, name))
+        rollup = by_year.get(year) if by_year else None
+        if rollup is None:
+            continue
+        rollup.apply(cells, -1)
+        if rollup.reports <= 0:
+            del by_year[year]
+            if not by_year:
+                del _ROLLUPS[(scope, name)]
+
+
+def _on_save(old: Optional[Report], report: Report) -> None:
+    scopes = _scopes(report)
+    # 只读表格，不需要解压正文
+    cells = list(iter_struct_cells(report.tables_struct)) if scopes else []
+    with _LOCK:
+        _retract(report.id)
+        if not scopes:
+            return
+        for scope, name, year in scopes:
+            by_year = _ROLLUPS.setdefault((scope, name), {})
+            by_year.setdefault(year, _Rollup()).apply(cells, 1)
+        _CONTRIBUTIONS[report.id] = (scopes, cells)
+
+
+def _on_delete(report: Report) -> None:
+    with _LOCK:
+        _retract(report.id)
+
+
+def get_rollups(
+    *,
+    region: Optional[str] = None,
+    agency: Optional[str] = None,
+    year: Optional[int] = None,
+    table: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    读取预汇总结果。region 与 agency 二选一；year 为空时返回所有年度（按年度升序）。
+    """
+    if region:
+        scope, name = "region", region
+    elif agency:
+        scope, name = "agency", agency
+    else:
+        raise ValueError("region or agency is required")
+
+    with _LOCK:
+        by_year = _ROLLUPS.get((scope, name), {})
+        years = [year] if year is not None else sorted(by_year)
+        return [
+            {"scope": scope, "name": name, "year": y, **by_year[y].to_dict(table)}
+            for y in years
+            if y in by_year
+        ]
+
+
+def _install() -> None:
+    add_save_hook(_on_save)
+    add_delete_hook(_on_delete)
+    # 模块首次导入时，仓库里可能已有报告：先回填一次
+    for report in all_reports():
+        _on_save(None, report)
+
+
+_install()
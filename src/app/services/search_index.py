@@ -0,0 +1,346 @@
+"""
+第一、五、六部分正文的全文检索（汉字二元组倒排索引）。
+
+- 每篇报告的每个部分是一个文档；正文去掉空白后（PDF 抽取常在字间插空格）
+  按相邻两个字切成二元组，记录每个二元组在文档里出现的位置；
+  标点等非文字字符切断二元组，每段连续文字的最后一个字（含孤立的单字）单独登记，
+  这样每个字都能作为某个词条的开头被单字查询找到；
+- 报告保存 / 覆盖 / 删除时通过仓库回调增量更新；
+- 查询语法：空格分隔的词都要出现（AND），OR 表示或，-词 / NOT 词 表示排除；
+  带引号的 "短语" 要求原文连续出现，不带引号的词只要求所有二元组出现在同一部分；
+- 排序用 BM25，按报告汇总各部分得分；只为返回的这一页报告解压正文计算摘要位置。
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.models.report import Report
+from app.services.report_repository import (
+    add_delete_hook,
+    add_save_hook,
+    all_reports,
+    get_report,
+)
+
+SECTIONS = ("section1", "section5", "section6")
+
+# BM25 参数
+_K1 = 1.2
+_B = 0.75
+# 每篇报告最多返回的摘要数，以及摘要前后各带的字数
+MAX_SNIPPETS = 3
+SNIPPET_CONTEXT = 20
+
+_WORD_CHAR = re.compile(r"[0-9a-z\u3400-\u9fff\uf900-\ufaff]")
+_WORD_RUN = re.compile(r"[0-9a-z\u3400-\u9fff\uf900-\ufaff]+")
+_SPACE = re.compile(r"\s+")
+_QUERY_TOKEN = re.compile(r'-?"[^"]*"?|\S+')
+# 只转换 ASCII 大写：str.lower() 对个别字符会改变长度，字符流位置就对不上了
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _is_word(ch: str) -> bool:
+    return _WORD_CHAR.match(ch) is not None
+
+
+def normalize(text: str) -> str:
+    """去掉空白、ASCII 转小写后的字符流。"""
+    return _SPACE.sub("", text).translate(_ASCII_LOWER)
+
+
+def stream_offsets(text: str) -> List[int]:
+    """字符流中每个字符在原文中的位置（只在生成摘要时计算）。"""
+    return [i for i, ch in enumerate(text) if not ch.isspace()]
+
+
+def terms_with_positions(stream: str) -> Dict[str, List[int]]:
+    """字符流中的二元组（及每段末尾的单字）和它们的起始位置。"""
+    terms: Dict[str, List[int]] = {}
+    for run in _WORD_RUN.finditer(stream):
+        start, end = run.span()
+        for i in range(start, end - 1):
+            terms.setdefault(stream[i : i + 2], []).append(i)
+        terms.setdefault(stream[end - 1], []).append(end - 1)
+    return terms
+
+
+def query_terms(stream: str) -> List[Tuple[int, str]]:
+    """查询词的 (相对位置, 二元组)；只有一个字时返回这个字本身。"""
+    if len(stream) == 1:
+        return [(0, stream)] if _is_word(stream) else []
+    return [
+        (i, stream[i : i + 2])
+        for i in range(len(stream) - 1)
+        if _is_word(stream[i]) and _is_word(stream[i + 1])
+    ]
+
+
+# 文档号 -> (report_id, section)；删除后置 None，文档号不复用
+_DOCS: List[Optional[Tuple[str, str]]] = []
+_DOC_LENGTHS: Dict[int, int] = {}
+_DOC_TERMS: Dict[int, List[str]] = {}
+_REPORT_DOCS: Dict[str, List[int]] = {}
+# 二元组 -> {文档号: 位置}
+_POSTINGS: Dict[str, Dict[int, array]] = {}
+# 首字 -> 以它开头的二元组，单字查询时用
+_BY_FIRST_CHAR: Dict[str, Set[str]] = {}
+_TOTAL_LENGTH = 0
+_LOCK = threading.RLock()
+
+
+def _section_texts(report: Report) -> List[Tuple[str, str]]:
+    struct = report.annual_struct or {}
+    texts = []
+    for section in SECTIONS:
+        text = (struct.get(section) or {}).get("text")
+        if isinstance(text, str) and text.strip():
+            texts.append((section, text))
+    return texts
+
+
+def _remove(report_id: str) -> None:
+    global _TOTAL_LENGTH
+    for doc in _REPORT_DOCS.pop(report_id, []):
+        for term in _DOC_TERMS.pop(doc, []):
+            postings = _POSTINGS.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc, None)
+            if not postings:
+                del _POSTINGS[term]
+                if len(term) == 2:
+                    first = _BY_FIRST_CHAR.get(term[0])
+                    if first is not None:
+                        first.discard(term)
+                        if not first:
+                            del _BY_FIRST_CHAR[term[0]]
+        _TOTAL_LENGTH -= _DOC_LENGTHS.pop(doc, 0)
+        _DOCS[doc] = None
+
+
+# (section, 字符流长度, 二元组 -> 位置)
+_Prepared = Tuple[str, int, Dict[str, List[int]]]
+
+
+def _prepare(report: Report) -> List[_Prepared]:
+    prepared = []
+    for section, text in _section_texts(report):
+        stream = normalize(text)
+        prepared.append((section, len(stream), terms_with_positions(stream)))
+    return prepared
+
+
+def _add(report_id: str, prepared: List[_Prepared]) -> None:
+    global _TOTAL_LENGTH
+    docs = []
+    for section, length, terms in prepared:
+        doc = len(_DOCS)
+        _DOCS.append((report_id, section))
+        _DOC_LENGTHS[doc] = length
+        _DOC_TERMS[doc] = list(terms)
+        _TOTAL_LENGTH += length
+        for term, positions in terms.items():
+            _POSTINGS.setdefault(term, {})[doc] = array("I", positions)
+            if len(term) == 2:
+                _BY_FIRST_CHAR.setdefault(term[0], set()).add(term)
+        docs.append(doc)
+    if docs:
+        _REPORT_DOCS[report_id] = docs
+
+
+def _on_save(old: Optional[Report], report: Report) -> None:
+    # 仓库在自己的锁外调用回调；解压和切分也放在本模块的锁外
+    prepared = _prepare(report)
+    with _LOCK:
+        _remove(report.id)
+        _add(report.id, prepared)
+
+
+def _on_delete(report: Report) -> None:
+    with _LOCK:
+        _remove(report.id)
+
+
+# ---- 查询 ----
+
+
+class _Clause:
+    __slots__ = ("text", "phrase", "negated")
+
+    def __init__(self, text: str, phrase: bool, negated: bool) -> None:
+        self.text = text
+        self.phrase = phrase
+        self.negated = negated
+
+
+def parse_query(q: str) -> List[List[_Clause]]:
+    """解析为 OR 连接的若干组，每组内的子句是 AND 关系。"""
+    groups: List[List[_Clause]] = [[]]
+    negate_next = False
+    for token in _QUERY_TOKEN.findall(q):
+        if token == "OR":
+            if groups[-1]:
+                groups.append([])
+            continue
+        if token == "AND":
+            continue
+        if token == "NOT":
+            negate_next = True
+            continue
+        negated = negate_next
+        negate_next = False
+        if token.startswith("-") and len(token) > 1:
+            negated = True
+            token = token[1:]
+        phrase = token.startswith('"')
+        text = token.strip('"')
+        if normalize(text):
+            groups[-1].append(_Clause(text, phrase, negated))
+    return [group for group in groups if any(not c.negated for c in group)]
+
+
+def _single_char_postings(ch: str) -> Dict[int, List[int]]:
+    merged: Dict[int, List[int]] = {}
+    for term in [ch] + sorted(_BY_FIRST_CHAR.get(ch, ())):
+        for doc, positions in _POSTINGS.get(term, {}).items():
+            merged.setdefault(doc, []).extend(positions)
+    return {doc: sorted(positions) for doc, positions in merged.items()}
+
+
+def _match_clause(clause: _Clause) -> Dict[int, List[int]]:
+    """子句命中的文档 -> 命中起始位置（短语：每处连续出现；普通词：首个二元组的位置）。"""
+    stream = normalize(clause.text)
+    terms = query_terms(stream)
+    if not terms:
+        return {}
+    if len(terms) == 1 and len(terms[0][1]) == 1:
+        return _single_char_postings(terms[0][1])
+
+    lists = [(offset, _POSTINGS.get(term)) for offset, term in terms]
+    if any(postings is None for _, postings in lists):
+        return {}
+    # 从最短的倒排表开始求交
+    lists.sort(key=lambda item: len(item[1]))
+    docs = set(lists[0][1])
+    for _, postings in lists[1:]:
+        docs.intersection_update(postings)
+        if not docs:
+            return {}
+
+    first_term = terms[0][1]
+    matches: Dict[int, List[int]] = {}
+    for doc in docs:
+        if not clause.phrase:
+            matches[doc] = list(_POSTINGS[first_term][doc])
+            continue
+        others = [(offset, set(_POSTINGS[term][doc])) for offset, term in terms[1:]]
+        hits = [
+            p
+            for p in _POSTINGS[first_term][doc]
+            if all(p + offset in positions for offset, positions in others)
+        ]
+        if hits:
+            matches[doc] = hits
+    return matches
+
+
+def _bm25(tf: int, doc_length: int, df: int, total_docs: int, avg_length: float) -> float:
+    idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+    norm = _K1 * (1 - _B + _B * doc_length / avg_length) if avg_length else _K1
+    return idf * tf * (_K1 + 1) / (tf + norm)
+
+
+def _snippets(report_id: str, hits: List[Tuple[str, int, int]]) -> List[Dict[str, Any]]:
+    """hits 为 (section, 字符流位置, 字符流长度)，换算回原文位置。"""
+    report = get_report(report_id)
+    if report is None:
+        return []
+    texts = dict(_section_texts(report))
+    offsets_cache: Dict[str, List[int]] = {}
+    snippets = []
+    for section, pos, length in hits[:MAX_SNIPPETS]:
+        text = texts.get(section)
+        if text is None:
+            continue
+        offsets = offsets_cache.get(section)
+        if offsets is None:
+            offsets = offsets_cache[section] = stream_offsets(text)
+        if pos + length > len(offsets):
+            continue
+        start, end = offsets[pos], offsets[pos + length - 1] + 1
+        snippets.append(
+            {
+                "section": section,
+                "start": start,
+                "end": end,
+                "text": text[max(0, start - SNIPPET_CONTEXT) : end + SNIPPET_CONTEXT],
+            }
+        )
+    return snippets
+
+
+def search(q: str, *, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """
+    检索第一、五、六部分正文，返回 {"total": 命中报告数, "items": [{"id", "score", "snippets"}]}。
+    snippets 里的 start / end 是该部分原文（annual_struct[section]["text"]）中的位置。
+    """
+    groups = parse_query(q)
+    scores: Dict[str, float] = {}
+    hits: Dict[str, List[Tuple[str, int, int]]] = {}
+    with _LOCK:
+        total_docs = len(_DOC_LENGTHS)
+        avg_length = _TOTAL_LENGTH / total_docs if total_docs else 0.0
+        for group in groups:
+            matched: Optional[Set[str]] = None
+            excluded: Set[str] = set()
+            group_scores: Dict[str, float] = {}
+            group_hits: Dict[str, List[Tuple[str, int, int]]] = {}
+            for clause in sorted(group, key=lambda c: c.negated):
+                docs = _match_clause(clause)
+                reports = {_DOCS[doc][0] for doc in docs}
+                if clause.negated:
+                    excluded |= reports
+                    continue
+                matched = reports if matched is None else matched & reports
+                length = len(normalize(clause.text))
+                for doc, positions in docs.items():
+                    report_id, section = _DOCS[doc]
+                    if report_id not in matched:
+                        continue
+                    group_scores[report_id] = group_scores.get(report_id, 0.0) + _bm25(
+                        len(positions), _DOC_LENGTHS[doc], len(docs), total_docs, avg_length
+                    )
+                    group_hits.setdefault(report_id, []).append((section, positions[0], length))
+            for report_id in (matched or set()) - excluded:
+                scores[report_id] = max(scores.get(report_id, 0.0), group_scores[report_id])
+                hits.setdefault(report_id, []).extend(group_hits[report_id])
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    page = ranked[offset : offset + limit]
+    return {
+        "total": len(ranked),
+        "items": [
+            {
+                "id": report_id,
+                "score": round(score, 6),
+                "snippets": _snippets(report_id, sorted(hits[report_id])),
+            }
+            for report_id, score in page
+        ],
+    }
+
+
+def _install() -> None:
+    add_save_hook(_on_save)
+    add_delete_hook(_on_delete)
+    # 模块首次导入时，仓库里可能已有报告：先回填一次
+    for report in all_reports():
+        _on_save(None, report)
+
+
+_install()
@@ -3,9 +3,30 @@ from .annual_report_parser import (
     parse_annual_report_text,
     parse_annual_report_text_to_dict,
 )
+from .batch import parse_annual_reports_batch
+from .columnar import ColumnarWriter, load_columnar, write_columnar
+from .deadline import Deadline, DeadlineExceeded
+from .frames import columnar_to_arrow, to_frame
+from .html_parser import parse_annual_report_html
+from .pdf_text import PdfTextCache, extract_pdf_pages, extract_pdf_text
+from .stream_reader import iter_annual_reports, iter_report_texts
 
 __all__ = [
     "AnnualReport",
     "parse_annual_report_text",
     "parse_annual_report_text_to_dict",
+    "parse_annual_reports_batch",
+    "parse_annual_report_html",
+    "iter_annual_reports",
+    "iter_report_texts",
+    "ColumnarWriter",
+    "write_columnar",
+    "load_columnar",
+    "Deadline",
+    "DeadlineExceeded",
+    "PdfTextCache",
+    "extract_pdf_pages",
+    "extract_pdf_text",
+    "to_frame",
+    "columnar_to_arrow",
 ]
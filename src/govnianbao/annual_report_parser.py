@@ -1,22 +1,35 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import asdict
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+from .deadline import Deadline, DeadlineExceeded, check_deadline, deadline_diagnostics
+from .metadata import extract_report_metadata
 from .models import AnnualReport
-from .text_parser import split_sections
 from .tables_parser import (
     parse_section2_tables,
     parse_section3_applications,
     parse_section4_review_litigation,
 )
+from .text_parser import split_sections
+from .versions import current_versions
+
+logger = logging.getLogger(__name__)
 
 
-def parse_annual_report_text(raw_text: str, *, with_tables: bool = True) -> AnnualReport:
+def parse_annual_report_text(
+    raw_text: str,
+    *,
+    with_tables: bool = True,
+    deadline: Optional[Deadline] = None,
+    budget_ms: Optional[float] = None,
+) -> AnnualReport:
     """
     将整篇年度报告纯文本解析成 AnnualReport 结构。
 
     当前版本步骤：
+    0. 从标题 / 第一部分开头提取发布机关、报告年度；
     1. 使用 split_sections 按标题切成 6 段；
     2. 把每一段原文填入 AnnualReport：
        - 第一、五、六部分：写入 section.text；
@@ -24,9 +37,41 @@ def parse_annual_report_text(raw_text: str, *, with_tables: bool = True) -> Annu
     3. 如果 with_tables=True，再尝试从第二～四部分的文本中
        按模板顺序抽取数字，填入对应表格 cells。
        （若数字数量不匹配会在内部吞掉异常，保持空表）
+
+    时限：给 deadline（或 budget_ms，毫秒）后，切分和各表格解析会在阶段之间
+    及长循环中检查；到期或被取消时停止，返回已完成的部分，
+    并在 report.parse_diagnostics 中记录停在哪个阶段。
     """
-    sections = split_sections(raw_text)
-    report = AnnualReport()
+    if deadline is None and budget_ms is not None:
+        deadline = Deadline.from_budget(budget_ms)
+    report = AnnualReport(versions=current_versions())
+    stages: List[str] = []
+    try:
+        _parse_into(report, raw_text, with_tables, deadline, stages)
+    except DeadlineExceeded as exc:
+        report.parse_diagnostics = deadline_diagnostics(exc, deadline, stages)
+        logger.warning(
+            f"parse_annual_report_text stopped at {exc.stage} "
+            f"after {report.parse_diagnostics['elapsed_ms']} ms ({exc})"
+        )
+    return report
+
+
+def _parse_into(
+    report: AnnualReport,
+    raw_text: str,
+    with_tables: bool,
+    deadline: Optional[Deadline],
+    stages: List[str],
+) -> None:
+    check_deadline(deadline, "metadata")
+    meta = extract_report_metadata(raw_text)
+    report.title, report.agency, report.year = meta.title, meta.agency, meta.year
+    report.region = meta.region
+    stages.append("metadata")
+
+    sections = split_sections(raw_text, deadline=deadline)
+    stages.append("split_sections")
 
     # 1,5,6 纯文字
     report.section1.text = sections.get(1, "").strip()
@@ -39,53 +84,74 @@ def parse_annual_report_text(raw_text: str, *, with_tables: bool = True) -> Annu
     report.section4.raw_text = sections.get(4, "").strip()
 
     if with_tables:
-        _fill_tables_best_effort(report)
-
-    return report
+        _fill_tables_best_effort(report, deadline=deadline, stages=stages)
 
 
-def _fill_tables_best_effort(report: AnnualReport) -> None:
+def _fill_tables_best_effort(
+    report: AnnualReport,
+    *,
+    deadline: Optional[Deadline] = None,
+    stages: Optional[List[str]] = None,
+) -> None:
     """
     尝试解析第二～四部分表格。
     - 若数字数量完全匹配模板，则填入 cells；
     - 若不匹配，则保持原有空表，不抛异常（方便先跑通主流程）。
     将来如果你希望严格校验，可以直接调用 tables_parser 里的函数。
+    超时（DeadlineExceeded）不吞掉，向上抛给 parse_annual_report_text。
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     # 第二部分
     try:
         if report.section2.raw_text.strip():
-            parsed = parse_section2_tables(report.section2.raw_text)
+            parsed = parse_section2_tables(report.section2.raw_text, deadline=deadline)
             report.section2.tables.update(parsed)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.warning(f"解析第二部分表格失败: {e}")
+    if stages is not None:
+        stages.append("section2_tables")
 
     # 第三部分
     try:
         if report.section3.raw_text.strip():
-            parsed = parse_section3_applications(report.section3.raw_text)
+            parsed = parse_section3_applications(report.section3.raw_text, deadline=deadline)
             report.section3.tables.update(parsed)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.warning(f"解析第三部分表格失败: {e}")
+    if stages is not None:
+        stages.append("section3_tables")
 
     # 第四部分
     try:
         if report.section4.raw_text.strip():
-            parsed = parse_section4_review_litigation(report.section4.raw_text)
+            parsed = parse_section4_review_litigation(report.section4.raw_text, deadline=deadline)
             report.section4.tables.update(parsed)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.warning(f"解析第四部分表格失败: {e}")
+    if stages is not None:
+        stages.append("section4_tables")
 
 
 def parse_annual_report_text_to_dict(
-    raw_text: str, *, with_tables: bool = True
+    raw_text: str,
+    *,
+    with_tables: bool = True,
+    deadline: Optional[Deadline] = None,
+    budget_ms: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
     方便给 FastAPI / 前端用的字典版本。
     """
-    return asdict(parse_annual_report_text(raw_text, with_tables=with_tables))
+    return asdict(
+        parse_annual_report_text(
+            raw_text, with_tables=with_tables, deadline=deadline, budget_ms=budget_ms
+        )
+    )
 
 
 def _demo_from_stdin() -> None:
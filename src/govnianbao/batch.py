@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .annual_report_parser import parse_annual_report_text
+from .codec import encode
+from .deadline import Deadline
+from .html_parser import parse_annual_report_html
+from .models import AnnualReport
+
+# 待解析的年报：纯文本，或 (来源格式, 内容)，来源格式为 "text" / "pdf" / "html"
+Source = Union[str, Tuple[str, str]]
+
+
+def _parse_source(
+    source: Source, *, with_tables: bool, budget_ms: Optional[float] = None
+) -> AnnualReport:
+    """按来源格式选解析器；每篇年报单独计时。"""
+    source_format, content = ("text", source) if isinstance(source, str) else source
+    deadline = Deadline.from_budget(budget_ms) if budget_ms is not None else None
+    if source_format == "html":
+        return parse_annual_report_html(content, with_tables=with_tables, deadline=deadline)
+    return parse_annual_report_text(content, with_tables=with_tables, deadline=deadline)
+
+
+def _parse_chunk(
+    sources: List[Source], *, with_tables: bool, budget_ms: Optional[float] = None
+) -> List[AnnualReport]:
+    return [
+        _parse_source(source, with_tables=with_tables, budget_ms=budget_ms)
+        for source in sources
+    ]
+
+
+def _parse_chunk_encoded(
+    sources: List[Source], *, with_tables: bool, budget_ms: Optional[float] = None
+) -> List[bytes]:
+    return [
+        encode(_parse_source(source, with_tables=with_tables, budget_ms=budget_ms))
+        for source in sources
+    ]
+
+
+def _chunked(texts: Iterable[Source], size: int) -> Iterator[List[Source]]:
+    chunk: List[Source] = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_annual_reports_batch(
+    texts: Iterable[Source],
+    *,
+    with_tables: bool = True,
+    max_workers: Optional[int] = None,
+    chunksize: int = 8,
+    max_pending_chunks: Optional[int] = None,
+    encoded: bool = False,
+    budget_ms: Optional[float] = None,
+) -> Iterator[Union[AnnualReport, bytes]]:
+    """
+    多进程批量解析年报文本，按输入顺序逐个产出 AnnualReport。
+
+    - texts 可以是任意（惰性）可迭代对象，例如 stream_reader.iter_report_texts；
+      元素为纯文本，或 (来源格式, 内容)：("html", 网页) 用 HTML 解析器，其余按纯文本解析；
+    - 与 Executor.map 不同，这里只保持有限个 chunk 在途，
+      不会一次性把整个输入读进内存；
+    - max_workers=1 时直接在当前进程内串行解析，方便调试；
+    - encoded=True 时产出 codec.encode 后的 bytes：子进程里直接编码，
+      主进程不再还原对象，适合解析结果直接落盘 / 入库的场景；
+    - budget_ms 为每篇年报的解析时限（毫秒），超时的年报只含已完成部分，
+      见 AnnualReport.parse_diagnostics。
+    """
+    chunk_parser = _parse_chunk_encoded if encoded else _parse_chunk
+    if max_workers == 1:
+        for text in texts:
+            yield from chunk_parser([text], with_tables=with_tables, budget_ms=budget_ms)
+        return
+
+    workers = max_workers or os.cpu_count() or 1
+    limit = max_pending_chunks or workers * 2
+    worker = partial(chunk_parser, with_tables=with_tables, budget_ms=budget_ms)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for chunk in _chunked(texts, chunksize):
+            pending.append(pool.submit(worker, chunk))
+            if len(pending) >= limit:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
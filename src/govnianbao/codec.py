@@ -0,0 +1,325 @@
+"""
+AnnualReport 的紧凑二进制编码，用于进程间传递和落盘缓存。
+
+整体结构（小端）：
+
+    头部   magic "GNAR" | 格式版本 u8 | 保留 u8 | 布局指纹 8B | 表格数 u16
+    目录   每张表一项 (offset u32, length u32)，其后是附加块、元数据块；offset=0xFFFFFFFF 表示该表不存在
+    表格块 has_key 位图 | has_value 位图 | is_int 位图 | 有值单元格的 float64 数组
+    附加块 JSON（布局之外的内容，通常为空）
+    元数据 标题 / 机关 / 区划（长度前缀 UTF-8）| 年度 i32 | 板块标题 | 6 段正文
+
+单元格按编译后的模板布局（layout.DEFAULT_LAYOUT）排列，不再重复写行列 key；
+布局之外的单元格、表格上的其他字段（如 parse_warnings）放进附加 JSON，保证往返无损。
+decode_table 只读目录、目标表格块和附加块，不解码正文。
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from .layout import DEFAULT_LAYOUT, CellLayout
+from .models import AnnualReport
+from .template_tables import SECTION_TITLES
+
+MAGIC = b"GNAR"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBx8sH")
+_ENTRY = struct.Struct("<II")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+
+_ABSENT = 0xFFFFFFFF
+_NONE_LEN = 0xFFFFFFFF
+_YEAR_NONE = -(2 ** 31)
+
+# 正文字段的固定顺序
+_TEXT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("section1", "text"),
+    ("section2", "raw_text"),
+    ("section3", "raw_text"),
+    ("section4", "raw_text"),
+    ("section5", "text"),
+    ("section6", "text"),
+)
+
+
+class CodecError(ValueError):
+    """数据不是本编码格式，或格式版本 / 模板布局与当前不一致。"""
+
+
+def _bitmap(bits: List[bool]) -> bytes:
+    # 第 i 个单元格对应第 i 位（字节内低位在前）
+    value = int("".join("1" if bit else "0" for bit in reversed(bits)) or "0", 2)
+    return value.to_bytes((len(bits) + 7) // 8, "little")
+
+
+def _bit_string(data: bytes, offset: int, count: int) -> str:
+    """把位图展开成 "0"/"1" 字符串，第 i 个字符对应第 i 位；逐字符比较比逐位移位快得多。"""
+    width = (count + 7) // 8
+    value = int.from_bytes(data[offset:offset + width], "little")
+    return format(value, "b").zfill(count)[::-1]
+
+
+def _pack_str(out: bytearray, value: Optional[str]) -> None:
+    if value is None:
+        out += _U32.pack(_NONE_LEN)
+        return
+    raw = value.encode("utf-8")
+    out += _U32.pack(len(raw))
+    out += raw
+
+
+def _unpack_str(data: bytes, pos: int) -> Tuple[Optional[str], int]:
+    (length,) = _U32.unpack_from(data, pos)
+    pos += 4
+    if length == _NONE_LEN:
+        return None, pos
+    return data[pos:pos + length].decode("utf-8"), pos + length
+
+
+def _encode_table(
+    table: Dict[str, Any], table_key: str, layout: CellLayout
+) -> Tuple[bytes, Dict[str, Any]]:
+    """返回 (表格块, 布局之外的附加内容)。"""
+    start, end = layout.table_slices[table_key]
+    keys = layout.keys[start:end]
+    cells = table.get("cells") or {}
+
+    has_key: List[bool] = []
+    has_value: List[bool] = []
+    is_int: List[bool] = []
+    values = array("d")
+    for _, row_key, col_key in keys:
+        row = cells.get(row_key)
+        present = row is not None and col_key in row
+        value = row[col_key] if present else None
+        has_key.append(present)
+        has_value.append(value is not None)
+        is_int.append(isinstance(value, int) and not isinstance(value, bool))
+        if value is not None:
+            values.append(value)
+
+    known = set(keys)
+    extra_cells: Dict[str, Any] = {}
+    for row_key, row in cells.items():
+        if not row:
+            # 空行在布局里无从表达，原样放进附加内容
+            extra_cells[row_key] = row
+            continue
+        for col_key, value in row.items():
+            if (table_key, row_key, col_key) not in known:
+                extra_cells.setdefault(row_key, {})[col_key] = value
+
+    extras = {k: v for k, v in table.items() if k != "cells"}
+    if extra_cells:
+        extras["cells"] = extra_cells
+    if sys.byteorder == "big":
+        values.byteswap()
+    block = _bitmap(has_key) + _bitmap(has_value) + _bitmap(is_int) + values.tobytes()
+    return block, extras
+
+
+def _decode_table_block(
+    data: bytes, offset: int, length: int, table_key: str, layout: CellLayout
+) -> Dict[str, Any]:
+    start, end = layout.table_slices[table_key]
+    keys = layout.keys[start:end]
+    count = len(keys)
+    width = (count + 7) // 8
+    has_key = _bit_string(data, offset, count)
+    has_value = _bit_string(data, offset + width, count)
+    is_int = _bit_string(data, offset + 2 * width, count)
+    values = array("d")
+    values.frombytes(data[offset + 3 * width:offset + length])
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    cells: Dict[str, Dict[str, Any]] = {}
+    n = 0
+    for (_, row_key, col_key), key_bit, value_bit, int_bit in zip(keys, has_key, has_value, is_int):
+        if key_bit == "0":
+            continue
+        value: Any = None
+        if value_bit == "1":
+            value = values[n]
+            n += 1
+            if int_bit == "1":
+                value = int(value)
+        row = cells.get(row_key)
+        if row is None:
+            row = cells[row_key] = {}
+        row[col_key] = value
+    return {"cells": cells}
+
+
+def _merge_extras(table: Dict[str, Any], extras: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not extras:
+        return table
+    extras = dict(extras)
+    for row_key, row in (extras.pop("cells", None) or {}).items():
+        if not row:
+            table["cells"].setdefault(row_key, row)
+        else:
+            table["cells"].setdefault(row_key, {}).update(row)
+    table.update(extras)
+    return table
+
+
+def encode(report: AnnualReport, *, layout: CellLayout = DEFAULT_LAYOUT) -> bytes:
+    """把 AnnualReport 编码为 bytes。"""
+    table_keys = list(layout.table_slices)
+    blocks: List[Optional[bytes]] = []
+    extras: Dict[str, Any] = {}
+
+    section_tables = {
+        section: getattr(report, f"section{section}").tables for section in (2, 3, 4)
+    }
+    for table_key in table_keys:
+        table = section_tables[layout.table_sections[table_key]].get(table_key)
+        if table is None:
+            blocks.append(None)
+            continue
+        block, table_extras = _encode_table(table, table_key, layout)
+        blocks.append(block)
+        if table_extras:
+            extras.setdefault("tables", {})[table_key] = table_extras
+
+    # 布局之外的整张表
+    for section, tables in section_tables.items():
+        for table_key, table in tables.items():
+            if table_key not in layout.table_slices:
+                extras.setdefault("other_tables", {}).setdefault(str(section), {})[table_key] = table
+
+    if report.parse_diagnostics:
+        extras["diagnostics"] = report.parse_diagnostics
+    if report.versions:
+        extras["versions"] = report.versions
+
+    meta = bytearray()
+    _pack_str(meta, report.title)
+    _pack_str(meta, report.agency)
+    _pack_str(meta, report.region)
+    meta += _I32.pack(_YEAR_NONE if report.year is None else report.year)
+    if report.sections_title == SECTION_TITLES:
+        _pack_str(meta, None)
+    else:
+        _pack_str(meta, json.dumps(report.sections_title, ensure_ascii=False))
+    for section, field_name in _TEXT_FIELDS:
+        _pack_str(meta, getattr(getattr(report, section), field_name))
+    extra_block = json.dumps(extras, ensure_ascii=False).encode("utf-8") if extras else b""
+
+    header_size = _HEADER.size + _ENTRY.size * (len(table_keys) + 2)
+    out = bytearray(
+        _HEADER.pack(MAGIC, FORMAT_VERSION, bytes.fromhex(layout.fingerprint), len(table_keys))
+    )
+    offset = header_size
+    for block in blocks:
+        if block is None:
+            out += _ENTRY.pack(_ABSENT, 0)
+        else:
+            out += _ENTRY.pack(offset, len(block))
+            offset += len(block)
+    out += _ENTRY.pack(offset, len(extra_block))
+    out += _ENTRY.pack(offset + len(extra_block), len(meta))
+    for block in blocks:
+        if block is not None:
+            out += block
+    out += extra_block
+    out += meta
+    return bytes(out)
+
+
+def _read_directory(data: bytes, layout: CellLayout) -> List[Tuple[int, int]]:
+    if len(data) < _HEADER.size:
+        raise CodecError("data too short")
+    magic, version, fingerprint, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise CodecError("not an encoded annual report")
+    if version != FORMAT_VERSION:
+        raise CodecError(f"unsupported format version: {version}")
+    if fingerprint.hex() != layout.fingerprint or count != len(layout.table_slices):
+        raise CodecError("template layout mismatch")
+    return [
+        _ENTRY.unpack_from(data, _HEADER.size + _ENTRY.size * i) for i in range(count + 2)
+    ]
+
+
+def _read_extras(data: bytes, entry: Tuple[int, int]) -> Dict[str, Any]:
+    offset, length = entry
+    return json.loads(data[offset:offset + length].decode("utf-8")) if length else {}
+
+
+def _read_meta(data: bytes, offset: int) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {}
+    pos = offset
+    for name in ("title", "agency", "region"):
+        fields[name], pos = _unpack_str(data, pos)
+    (year,) = _I32.unpack_from(data, pos)
+    pos += 4
+    fields["year"] = None if year == _YEAR_NONE else year
+    sections_title, pos = _unpack_str(data, pos)
+    fields["sections_title"] = (
+        SECTION_TITLES.copy()
+        if sections_title is None
+        else {int(k): v for k, v in json.loads(sections_title).items()}
+    )
+    for section, field_name in _TEXT_FIELDS:
+        fields[(section, field_name)], pos = _unpack_str(data, pos)
+    return fields
+
+
+def decode(data: bytes, *, layout: CellLayout = DEFAULT_LAYOUT) -> AnnualReport:
+    """把 encode 的结果还原为 AnnualReport。"""
+    directory = _read_directory(data, layout)
+    fields = _read_meta(data, directory[-1][0])
+    extras = _read_extras(data, directory[-2])
+
+    report = AnnualReport(
+        title=fields["title"],
+        agency=fields["agency"],
+        year=fields["year"],
+        region=fields["region"],
+        sections_title=fields["sections_title"],
+    )
+    for section, field_name in _TEXT_FIELDS:
+        value = fields[(section, field_name)]
+        if value is not None:
+            setattr(getattr(report, section), field_name, value)
+
+    table_extras = extras.get("tables", {})
+    for (offset, length), table_key in zip(directory, layout.table_slices):
+        tables = getattr(report, f"section{layout.table_sections[table_key]}").tables
+        if offset == _ABSENT:
+            tables.pop(table_key, None)
+            continue
+        table = _decode_table_block(data, offset, length, table_key, layout)
+        tables[table_key] = _merge_extras(table, table_extras.get(table_key))
+
+    for section, tables in extras.get("other_tables", {}).items():
+        getattr(report, f"section{section}").tables.update(tables)
+    report.parse_diagnostics = extras.get("diagnostics", {})
+    report.versions = extras.get("versions", {})
+    return report
+
+
+def decode_table(
+    data: bytes, table_key: str, *, layout: CellLayout = DEFAULT_LAYOUT
+) -> Optional[Dict[str, Any]]:
+    """
+    只解码一张模板表格，返回 {"cells": {...}}；表格不存在时返回 None。
+    不会解码元数据和正文。
+    """
+    directory = _read_directory(data, layout)
+    index = list(layout.table_slices).index(table_key)
+    offset, length = directory[index]
+    if offset == _ABSENT:
+        return None
+    table = _decode_table_block(data, offset, length, table_key, layout)
+    extras = _read_extras(data, directory[-2])
+    return _merge_extras(table, extras.get("tables", {}).get(table_key))
@@ -0,0 +1,305 @@
+"""
+把一批报告的表格导出为列式数据，并能零拷贝地读回 NumPy 数组。
+
+输出是一个目录，每列一个标准 .npy 文件（numpy.load 可直接打开）：
+- 每个模板单元格 (table, row, col) 一列 float64，缺失记为 NaN；
+- year 一列 int32，缺失记为 -1；
+- id / agency / region 为字符串列，拆成 <name>.offsets.npy（int64，n+1 个偏移）
+  和 <name>.data.npy（uint8，UTF-8 拼接）；
+- _meta.json 记录行数、列名、布局指纹等。
+
+写入按行组缓冲，写满 row_group_size 行就追加到各列文件末尾，
+内存占用与总行数无关；.npy 头部预留固定长度，关闭时回写真实行数。
+写入只用标准库，读取需要 numpy。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .layout import DEFAULT_LAYOUT, CellLayout, report_field
+
+FORMAT_NAME = "govnianbao-columnar"
+FORMAT_VERSION = 1
+
+META_FILE = "_meta.json"
+STRING_COLUMNS = ("id", "agency", "region")
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+# 头部（含 magic）固定 128 字节，足够容纳任意行数，且按 64 字节对齐
+_NPY_HEADER_SIZE = 128
+_ENDIAN = "<" if sys.byteorder == "little" else ">"
+
+
+def _npy_header(descr: str, length: int) -> bytes:
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, length)
+    pad = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError("npy header too long")
+    body = (header + " " * pad + "\n").encode("latin1")
+    return _NPY_MAGIC + struct.pack("<H", len(body)) + body
+
+
+def _safe_file_name(name: str) -> str:
+    # 列名只含 ASCII 字母数字、下划线和点，直接作文件名
+    return name.replace(os.sep, "_")
+
+
+class _ColumnFile:
+    __slots__ = ("path", "descr", "length")
+
+    def __init__(self, path: str, descr: str) -> None:
+        self.path = path
+        self.descr = descr
+        self.length = 0
+        with open(path, "wb") as f:
+            f.write(_npy_header(descr, 0))
+
+    def append(self, data: array) -> None:
+        if not data:
+            return
+        with open(self.path, "ab") as f:
+            data.tofile(f)
+        self.length += len(data)
+
+    def finish(self) -> None:
+        with open(self.path, "r+b") as f:
+            f.write(_npy_header(self.descr, self.length))
+
+
+class ColumnarWriter:
+    """
+    流式列式写入器：
+
+        with ColumnarWriter("out/2024") as writer:
+            for report_id, report in items:
+                writer.append(report_id, report)
+
+    report 可以是 AnnualReport 或其 dict 形式；agency / year / region 未显式给出时从报告本身读取。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        layout: CellLayout = DEFAULT_LAYOUT,
+        row_group_size: int = 4096,
+    ) -> None:
+        if row_group_size <= 0:
+            raise ValueError("row_group_size must be positive")
+        os.makedirs(path, exist_ok=True)
+        # 旧的 _meta.json 会让写到一半的目录看起来完整，先删掉，关闭时再写
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            os.unlink(meta_path)
+        self.path = path
+        self.layout = layout
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._row_groups: List[int] = []
+        self._closed = False
+
+        self._cell_names = layout.column_names()
+        self._cell_files = [
+            _ColumnFile(os.path.join(path, _safe_file_name(name) + ".npy"), _ENDIAN + "f8")
+            for name in self._cell_names
+        ]
+        self._year_file = _ColumnFile(os.path.join(path, "year.npy"), _ENDIAN + "i4")
+        self._offset_files = {
+            name: _ColumnFile(os.path.join(path, name + ".offsets.npy"), _ENDIAN + "i8")
+            for name in STRING_COLUMNS
+        }
+        self._data_files = {
+            name: _ColumnFile(os.path.join(path, name + ".data.npy"), "|u1")
+            for name in STRING_COLUMNS
+        }
+        # 字符串列的偏移从 0 开始，共 n+1 个
+        self._string_ends = {name: 0 for name in STRING_COLUMNS}
+        for name in STRING_COLUMNS:
+            self._offset_files[name].append(array("q", [0]))
+        self._reset_buffers()
+
+    def _reset_buffers(self) -> None:
+        self._rows_buffer: List[array] = []
+        self._years = array("i")
+        self._strings: Dict[str, List[bytes]] = {name: [] for name in STRING_COLUMNS}
+
+    def append(
+        self,
+        report_id: str,
+        report: Any,
+        *,
+        agency: Optional[str] = None,
+        year: Optional[int] = None,
+        region: Optional[str] = None,
+    ) -> None:
+        if self._closed:
+            raise ValueError("writer is closed")
+        if agency is None:
+            agency = report_field(report, "agency")
+        if year is None:
+            year = report_field(report, "year")
+        if region is None:
+            region = report_field(report, "region")
+
+        self._rows_buffer.append(self.layout.flatten(report))
+        self._years.append(-1 if year is None else int(year))
+        for name, value in (("id", report_id), ("agency", agency), ("region", region)):
+            self._strings[name].append((value or "").encode("utf-8"))
+        self.rows += 1
+
+        if len(self._rows_buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """把当前行组写到磁盘。"""
+        count = len(self._rows_buffer)
+        if not count:
+            return
+        rows = self._rows_buffer
+        for pos, column in enumerate(self._cell_files):
+            column.append(array("d", [row[pos] for row in rows]))
+        self._year_file.append(self._years)
+
+        for name in STRING_COLUMNS:
+            end = self._string_ends[name]
+            offsets = array("q")
+            for value in self._strings[name]:
+                end += len(value)
+                offsets.append(end)
+            self._string_ends[name] = end
+            self._offset_files[name].append(offsets)
+            self._data_files[name].append(array("B", b"".join(self._strings[name])))
+
+        self._row_groups.append(count)
+        self._reset_buffers()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        files = [*self._cell_files, self._year_file]
+        files += list(self._offset_files.values()) + list(self._data_files.values())
+        for column in files:
+            column.finish()
+
+        meta = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "layout": self.layout.fingerprint,
+            "rows": self.rows,
+            "row_groups": self._row_groups,
+            "columns": self._cell_names,
+            "types": list(self.layout.types),
+            "string_columns": list(STRING_COLUMNS),
+        }
+        tmp_path = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+        self._closed = True
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if exc_info[0] is not None:
+            # 写入中途出错：不写 _meta.json，load_columnar 不会把半截数据当成完整目录
+            self._closed = True
+            return
+        self.close()
+
+
+def write_columnar(
+    path: str,
+    items: Iterable[Tuple[str, Any]],
+    *,
+    layout: CellLayout = DEFAULT_LAYOUT,
+    row_group_size: int = 4096,
+) -> int:
+    """把 (report_id, report) 序列写成列式目录，返回写入行数。"""
+    with ColumnarWriter(path, layout=layout, row_group_size=row_group_size) as writer:
+        for report_id, report in items:
+            writer.append(report_id, report)
+    return writer.rows
+
+
+def read_columnar_meta(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_NAME:
+        raise ValueError(f"not a {FORMAT_NAME} directory: {path}")
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported columnar version: {meta.get('version')}")
+    return meta
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - 取决于运行环境
+        raise ImportError(
+            "load_columnar requires numpy; install it with `pip install numpy`"
+        ) from exc
+    return numpy
+
+
+class StringColumn:
+    """offsets + UTF-8 数据组成的字符串列；按需解码，不一次性生成所有 str。"""
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets, data) -> None:
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return bytes(self.data[start:end]).decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        raw = bytes(self.data)
+        offsets = self.offsets.tolist()
+        return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(self))]
+
+
+def load_columnar(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    *,
+    mmap: bool = True,
+) -> Dict[str, Any]:
+    """
+    读回列式目录。数值列是 numpy 数组（mmap=True 时为只读内存映射，不复制数据）；
+    id / agency / region 为 StringColumn。columns 为空时读取所有列。
+    """
+    np = _require_numpy()
+    meta = read_columnar_meta(path)
+    mmap_mode = "r" if mmap else None
+
+    wanted = list(columns) if columns is not None else (
+        list(STRING_COLUMNS) + ["year"] + meta["columns"]
+    )
+    known = set(meta["columns"])
+    result: Dict[str, Any] = {}
+    for name in wanted:
+        if name in STRING_COLUMNS:
+            offsets = np.load(os.path.join(path, name + ".offsets.npy"), mmap_mode=mmap_mode)
+            data = np.load(os.path.join(path, name + ".data.npy"), mmap_mode=mmap_mode)
+            result[name] = StringColumn(offsets, data)
+        elif name == "year" or name in known:
+            file_name = _safe_file_name(name) + ".npy"
+            result[name] = np.load(os.path.join(path, file_name), mmap_mode=mmap_mode)
+        else:
+            raise KeyError(f"unknown column: {name}")
+    return result
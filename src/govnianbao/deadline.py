@@ -0,0 +1,99 @@
+"""
+解析时限与协作式取消。
+
+Deadline 由调用方创建（或按 budget_ms 创建），一路传给切分、取数和各表格解析函数；
+这些函数在阶段之间和长循环里调用 check()，时间用完或被 cancel() 时抛出
+DeadlineExceeded，由 parse_annual_report_text 接住并返回已完成部分 + 诊断信息。
+
+check() 只读一次单调时钟，可以放在循环里；cancel() 可以从其它线程调用
+（例如 API 侧发现客户端已断开）。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class DeadlineExceeded(Exception):
+    """时限已到或已被取消。stage 为检查点名称。"""
+
+    def __init__(self, stage: str, *, cancelled: bool = False) -> None:
+        reason = "cancelled" if cancelled else "deadline exceeded"
+        super().__init__(f"{reason} at {stage}")
+        self.stage = stage
+        self.cancelled = cancelled
+
+
+class Deadline:
+    """一次解析的截止时间（time.monotonic 时刻）；expires_at=None 表示不限时，只响应取消。"""
+
+    __slots__ = ("expires_at", "started_at", "_cancelled")
+
+    def __init__(self, expires_at: Optional[float] = None) -> None:
+        self.started_at = time.monotonic()
+        self.expires_at = expires_at
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_budget(cls, budget_ms: Optional[float]) -> "Deadline":
+        """从现在起 budget_ms 毫秒后到期；budget_ms=None 时不限时。"""
+        if budget_ms is None:
+            return cls()
+        return cls(time.monotonic() + budget_ms / 1000.0)
+
+    @property
+    def budget_ms(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return (self.expires_at - self.started_at) * 1000.0
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started_at) * 1000.0
+
+    def remaining_ms(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000.0)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def expired(self) -> bool:
+        if self._cancelled.is_set():
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """到期或已取消时抛出 DeadlineExceeded。"""
+        if self._cancelled.is_set():
+            raise DeadlineExceeded(stage, cancelled=True)
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded(stage)
+
+
+def check_deadline(deadline: Optional[Deadline], stage: str) -> None:
+    """deadline 可以为 None 的便捷写法。"""
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def deadline_diagnostics(
+    exc: DeadlineExceeded, deadline: Optional[Deadline], stages: List[str]
+) -> Dict[str, Any]:
+    """解析因时限停止时写进 parse_diagnostics 的内容。"""
+    return {
+        "status": "cancelled" if exc.cancelled else "timeout",
+        "stage": exc.stage,
+        "completed_stages": list(stages),
+        "elapsed_ms": round(deadline.elapsed_ms(), 1) if deadline else None,
+        "budget_ms": deadline.budget_ms if deadline else None,
+    }
+
+
+__all__ = ["Deadline", "DeadlineExceeded", "check_deadline", "deadline_diagnostics"]
@@ -0,0 +1,263 @@
+"""
+把一批报告转成 pandas DataFrame / Arrow Table，供交互式分析使用。
+
+单元格直接按编译好的布局（govnianbao.layout）逐篇拍平，写进预先分配好的
+(报告数 × 单元格数) float64 矩阵，不再逐层遍历嵌套 dict 去拼列：
+
+- layout="wide"：每篇报告一行，每个单元格一列（列名同列式导出，"table.row.col"）；
+  矩阵按列优先分配，每一列在内存中连续，DataFrame / Arrow 直接使用，不再复制；
+- layout="long"：每个非空单元格一行（report, table, row, col, value 及报告的 id / 机关等），
+  字符串列都是分类（字典）编码，不为每个单元格复制字符串。
+
+缺失单元格为 NaN。columnar_to_arrow 把 ColumnarWriter 写出的列式目录按内存映射
+包装成 Arrow Table：数值列和字符串列（offsets + UTF-8）直接共用文件中的缓冲区，不复制数据；
+缺失值（NaN、year 的 -1）另外生成有效位图，在 Arrow 里是 null。
+
+需要 numpy，DataFrame 需要 pandas，Arrow 需要 pyarrow（均为可选依赖）。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .columnar import STRING_COLUMNS, load_columnar, read_columnar_meta
+from .layout import DEFAULT_LAYOUT, CellLayout, column_name, compile_layout, report_field
+from .template_tables import TEMPLATE_TABLES
+
+ReportsArg = Union[Iterable[Any], Mapping[str, Any]]
+
+META_COLUMNS = ("agency", "year", "region")
+
+
+class Coded(NamedTuple):
+    """分类编码的列：codes 为 categories 的下标，-1 表示缺失。"""
+
+    codes: Any
+    categories: List[Any]
+
+
+class Nullable(NamedTuple):
+    """可空整数列：mask 为 True 处缺失。"""
+
+    values: Any
+    mask: Any
+
+
+def _require(module: str, feature: str):
+    try:
+        return __import__(module)
+    except ImportError as exc:  # pragma: no cover - 取决于运行环境
+        raise ImportError(
+            f"{feature} requires {module}; install it with `pip install {module}`"
+        ) from exc
+
+
+@lru_cache(maxsize=None)
+def _layout_for(tables: Optional[Tuple[str, ...]]) -> CellLayout:
+    if tables is None:
+        return DEFAULT_LAYOUT
+    unknown = [key for key in tables if key not in TEMPLATE_TABLES]
+    if unknown:
+        raise ValueError(f"unknown tables: {unknown}")
+    return compile_layout({key: TEMPLATE_TABLES[key] for key in tables})
+
+
+def _coded(np, values: Sequence[Any]) -> Coded:
+    categories: Dict[Any, int] = {}
+    codes = np.fromiter(
+        (-1 if v is None else categories.setdefault(v, len(categories)) for v in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return Coded(codes, list(categories))
+
+
+def _flatten_reports(np, reports: ReportsArg, cell_layout: CellLayout):
+    """返回 (ids 或 None, 元数据列, 列优先的 float64 矩阵)。"""
+    ids: Optional[List[str]] = None
+    if isinstance(reports, Mapping):
+        ids = list(reports.keys())
+        items = list(reports.values())
+    else:
+        items = list(reports)
+    n, width = len(items), len(cell_layout)
+
+    # 列优先：每个单元格一列连续内存
+    matrix = np.empty((n, width), dtype=np.float64, order="F")
+    raw: Dict[str, List[Any]] = {name: [None] * n for name in META_COLUMNS}
+    for i, report in enumerate(items):
+        matrix[i, :] = np.frombuffer(cell_layout.flatten(report), dtype=np.float64)
+        for name in META_COLUMNS:
+            raw[name][i] = report_field(report, name)
+
+    years = raw["year"]
+    meta: Dict[str, Any] = {
+        "agency": _coded(np, raw["agency"]),
+        "year": Nullable(
+            np.fromiter((y or 0 for y in years), dtype=np.int64, count=n),
+            np.fromiter((y is None for y in years), dtype=bool, count=n),
+        ),
+        "region": _coded(np, raw["region"]),
+    }
+    return ids, meta, matrix
+
+
+def _take(column: Any, rows) -> Any:
+    if isinstance(column, Coded):
+        return Coded(column.codes[rows], column.categories)
+    return Nullable(column.values[rows], column.mask[rows])
+
+
+def frame_columns(
+    reports: ReportsArg,
+    *,
+    tables: Optional[Sequence[str]] = None,
+    layout: str = "wide",
+) -> Dict[str, Any]:
+    """
+    to_frame 的中间结果，不依赖 pandas：列名 -> numpy 数组 / Coded / Nullable（id 在 wide 中为 list）。
+    reports 可以是 AnnualReport 或其 dict 形式的序列；传入 {id: report} 时多一列 id。
+    """
+    if layout not in ("wide", "long"):
+        raise ValueError("layout must be 'wide' or 'long'")
+    np = _require("numpy", "to_frame")
+    cell_layout = _layout_for(tuple(tables) if tables is not None else None)
+    ids, meta, matrix = _flatten_reports(np, reports, cell_layout)
+
+    columns: Dict[str, Any] = {}
+    if layout == "wide":
+        if ids is not None:
+            columns["id"] = ids
+        columns.update(meta)
+        for j, key in enumerate(cell_layout.keys):
+            columns[column_name(key)] = matrix[:, j]
+        return columns
+
+    # long：按报告顺序列出非空单元格（np.nonzero 按行优先返回，已经有序）；
+    # 报告级的列都以报告下标编码，不为每个单元格复制字符串
+    rows, cols = np.nonzero(~np.isnan(matrix))
+    keys = cell_layout.keys
+    columns["report"] = rows
+    if ids is not None:
+        columns["id"] = Coded(rows.astype(np.int32), ids)
+    for name, column in meta.items():
+        columns[name] = _take(column, rows)
+    for level, name in enumerate(("table", "row", "col")):
+        coded = _coded(np, [key[level] for key in keys])
+        columns[name] = Coded(coded.codes[cols], coded.categories)
+    columns["value"] = matrix[rows, cols]
+    return columns
+
+
+def _pandas_column(pd, values: Any):
+    if isinstance(values, Coded):
+        return pd.Categorical.from_codes(values.codes, categories=values.categories)
+    if isinstance(values, Nullable):
+        return pd.arrays.IntegerArray(values.values, values.mask)
+    return values
+
+
+def _wide_pandas(pd, np, reports: ReportsArg, cell_layout: CellLayout):
+    ids, meta, matrix = _flatten_reports(np, reports, cell_layout)
+    # 整个矩阵作为一个数值块，不复制
+    frame = pd.DataFrame(matrix, columns=cell_layout.column_names(), copy=False)
+    leading = ([("id", ids)] if ids is not None else []) + list(meta.items())
+    for pos, (name, values) in enumerate(leading):
+        frame.insert(pos, name, _pandas_column(pd, values))
+    return frame
+
+
+def _arrow_column(pa, np, values: Any):
+    if isinstance(values, Coded):
+        missing = values.codes < 0
+        return pa.DictionaryArray.from_arrays(
+            np.where(missing, 0, values.codes),
+            pa.array(values.categories),
+            mask=missing if missing.any() else None,
+        )
+    if isinstance(values, Nullable):
+        return pa.array(values.values, mask=values.mask, type=pa.int32())
+    if isinstance(values, list):
+        return pa.array(values, type=pa.string())
+    # 连续的 float64 / int64 数组，Arrow 直接引用其内存
+    return pa.array(values)
+
+
+def to_frame(
+    reports: ReportsArg,
+    *,
+    tables: Optional[Sequence[str]] = None,
+    layout: str = "wide",
+    engine: str = "pandas",
+):
+    """
+    把一批报告（AnnualReport、parse_annual_report_text_to_dict 的结果，或 {id: report}）
+    转成 pandas DataFrame（engine="pandas"）或 pyarrow Table（engine="arrow"）。
+    tables 限定只取哪些模板表格；layout 见模块说明。
+    """
+    if engine not in ("pandas", "arrow"):
+        raise ValueError("engine must be 'pandas' or 'arrow'")
+    if layout not in ("wide", "long"):
+        raise ValueError("layout must be 'wide' or 'long'")
+    np = _require("numpy", "to_frame")
+    if engine == "arrow":
+        pa = _require("pyarrow", "to_frame(engine='arrow')")
+        columns = frame_columns(reports, tables=tables, layout=layout)
+        return pa.Table.from_arrays(
+            [_arrow_column(pa, np, values) for values in columns.values()], names=list(columns)
+        )
+
+    pd = _require("pandas", "to_frame")
+    if layout == "wide":
+        cell_layout = _layout_for(tuple(tables) if tables is not None else None)
+        return _wide_pandas(pd, np, reports, cell_layout)
+    columns = frame_columns(reports, tables=tables, layout=layout)
+    return pd.DataFrame(
+        {name: _pandas_column(pd, values) for name, values in columns.items()}, copy=False
+    )
+
+
+def _validity(pa, np, valid):
+    """按位打包的有效位图（Arrow 位序）和 null 个数；没有缺失时为 (None, 0)。"""
+    nulls = len(valid) - int(np.count_nonzero(valid))
+    if not nulls:
+        return None, 0
+    return pa.py_buffer(np.packbits(valid, bitorder="little")), nulls
+
+
+def columnar_to_arrow(path: str, columns: Optional[Sequence[str]] = None):
+    """
+    把 ColumnarWriter 写出的目录包装成 pyarrow Table，所有列都按内存映射共用文件中的缓冲区：
+    数值列为 float64、year 为 int32，缺失（NaN / -1）为 null（只新分配每行一位的有效位图），
+    id / agency / region 为 large_string（offsets 与 UTF-8 数据直接作为 Arrow 缓冲区）。
+    """
+    pa = _require("pyarrow", "columnar_to_arrow")
+    np = _require("numpy", "columnar_to_arrow")
+    meta = read_columnar_meta(path)
+    loaded = load_columnar(path, columns, mmap=True)
+    rows = meta["rows"]
+    arrays = []
+    for name, column in loaded.items():
+        if name in STRING_COLUMNS:
+            arrays.append(
+                pa.Array.from_buffers(
+                    pa.large_string(),
+                    rows,
+                    [None, pa.py_buffer(column.offsets), pa.py_buffer(column.data)],
+                )
+            )
+            continue
+        if name == "year":
+            dtype = pa.int32()
+            validity, nulls = _validity(pa, np, column != -1)
+        else:
+            dtype = pa.float64()
+            validity, nulls = _validity(pa, np, ~np.isnan(column))
+        arrays.append(
+            pa.Array.from_buffers(dtype, rows, [validity, pa.py_buffer(column)], null_count=nulls)
+        )
+    return pa.Table.from_arrays(arrays, names=list(loaded))
+
+
+__all__ = ["Coded", "Nullable", "columnar_to_arrow", "frame_columns", "to_frame"]
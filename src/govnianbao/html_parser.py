@@ -0,0 +1,491 @@
+"""
+直接从网页 HTML 抽取年度报告结构。
+
+文本路径（HTML 拍平成纯文本 → 按数字顺序回填表格）会丢掉网页里本来就有的
+表格结构。这里用 html.parser 流式扫描一遍 DOM：
+- 段落 / 标题块与 SECTION_TITLES 比对，决定当前属于第几部分；
+- <table> 的每一行按“行首标签”与 TEMPLATE_TABLES 中的行 label 匹配，
+  数字单元格直接写入对应 cells；
+- 映射不上的表格，才退回原来的文本解析函数。
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .deadline import Deadline, DeadlineExceeded, check_deadline, deadline_diagnostics
+from .metadata import extract_report_metadata
+from .models import AnnualReport
+from .tables_parser import (
+    convert_token,
+    data_rows,
+    parse_section2_tables,
+    parse_section3_applications,
+    parse_section4_review_litigation,
+    value_columns,
+)
+from .template_tables import SECTION_TITLES, TEMPLATE_TABLES
+from .versions import current_versions
+
+logger = logging.getLogger(__name__)
+
+_BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "title", "header", "footer",
+}
+_SKIP_TAGS = {"script", "style"}
+
+_WS_PATTERN = re.compile(r"\s+")
+_CELL_NUMBER_PATTERN = re.compile(r"^[+-]?\d+(?:\.\d+)?$")
+# 行标签前的编号：“一、”“（三）”“1.”“2、”等
+_LABEL_INDEX_PATTERN = re.compile(
+    r"^(?:[一二三四五六七八九十]+、|[（(][一二三四五六七八九十]+[）)]|\d+[\.、．])"
+)
+_QUOTE_TRANSLATION = str.maketrans({"“": '"', "”": '"', "「": '"', "」": '"', "＂": '"'})
+
+_SECTION_PARSERS: Dict[int, Callable[..., Dict[str, Dict[str, Any]]]] = {
+    2: parse_section2_tables,
+    3: parse_section3_applications,
+    4: parse_section4_review_litigation,
+}
+
+
+def _compact(text: str) -> str:
+    return _WS_PATTERN.sub("", text).translate(_QUOTE_TRANSLATION)
+
+
+def _label_variants(label: str) -> Tuple[str, str]:
+    compact = _compact(label)
+    return compact, _LABEL_INDEX_PATTERN.sub("", compact)
+
+
+_COMPACT_TITLES: Dict[int, str] = {idx: _compact(t) for idx, t in SECTION_TITLES.items()}
+
+
+def _build_label_index() -> Dict[int, Dict[str, Tuple[str, str]]]:
+    """section -> {规范化行标签: (table_key, row_key)}，带编号和去编号两种写法都收录。"""
+    index: Dict[int, Dict[str, Tuple[str, str]]] = {}
+    for table_key, table_def in TEMPLATE_TABLES.items():
+        labels = index.setdefault(table_def["section"], {})
+        for row in data_rows(table_def):
+            full, core = _label_variants(row["label"])
+            labels.setdefault(full, (table_key, row["key"]))
+            labels.setdefault(core, (table_key, row["key"]))
+    return index
+
+
+_LABEL_INDEX = _build_label_index()
+
+
+class _TableState:
+    def __init__(self) -> None:
+        self.rows: List[List[str]] = []
+        self.row: Optional[List[str]] = None
+        self.cell: Optional[List[str]] = None
+        # 单元格里嵌套了表格：视为排版用的外层表格，内容按普通段落处理
+        self.layout = False
+
+    def end_cell(self) -> Optional[str]:
+        if self.cell is None:
+            return None
+        text = "".join(self.cell)
+        self.cell = None
+        if self.row is None:
+            self.row = []
+        self.row.append(text)
+        return text
+
+    def end_row(self) -> None:
+        self.end_cell()
+        if self.row:
+            self.rows.append(self.row)
+        self.row = None
+
+
+class HtmlReportExtractor(HTMLParser):
+    """
+    流式 HTML 年报抽取器。
+
+    用法：
+        extractor = HtmlReportExtractor()
+        extractor.feed(html)
+        extractor.close()
+        report = extractor.to_report()
+        flat_text = extractor.text
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._section = 0
+        # 0 号放第一部分之前的内容（报告标题、前言等）
+        self._lines: Dict[int, List[str]] = {idx: [] for idx in range(0, 7)}
+        self._block: List[str] = []
+        self._tables: List[Tuple[int, List[List[str]]]] = []
+        self._table_stack: List[_TableState] = []
+        self._skip_depth = 0
+
+    # ---------- HTMLParser 回调 ----------
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+
+        table = self._current_table()
+        if tag == "table":
+            if table is not None and not table.layout:
+                table.layout = True
+                # 外层表格里已经收集的文字按段落输出
+                self._flush_lines(
+                    [cell for row in table.rows for cell in row]
+                    + (table.row or [])
+                    + ["".join(table.cell or [])]
+                )
+                table.rows, table.row, table.cell = [], None, None
+            self._flush_block()
+            self._table_stack.append(_TableState())
+            return
+
+        if table is None or table.layout:
+            if tag in _BLOCK_TAGS or tag in ("td", "th", "tr"):
+                self._flush_block()
+            return
+
+        if tag == "tr":
+            table.end_row()
+            table.row = []
+        elif tag in ("td", "th"):
+            table.end_cell()
+            table.cell = []
+        elif tag in _BLOCK_TAGS and table.cell is not None:
+            table.cell.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+
+        table = self._current_table()
+        if tag == "table":
+            if table is None:
+                return
+            self._table_stack.pop()
+            if table.layout:
+                self._flush_block()
+            else:
+                table.end_row()
+                self._emit_table(table.rows)
+            return
+
+        if table is None or table.layout:
+            if tag in _BLOCK_TAGS or tag in ("td", "th", "tr"):
+                self._flush_block()
+            return
+
+        if tag in ("td", "th"):
+            table.end_cell()
+        elif tag == "tr":
+            table.end_row()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        table = self._current_table()
+        if table is not None and not table.layout:
+            if table.cell is not None:
+                table.cell.append(data)
+            return
+        self._block.append(data)
+
+    def close(self) -> None:
+        super().close()
+        while self._table_stack:
+            self.handle_endtag("table")
+        self._flush_block()
+
+    # ---------- 段落与标题 ----------
+
+    def _current_table(self) -> Optional[_TableState]:
+        return self._table_stack[-1] if self._table_stack else None
+
+    def _heading_index(self, line: str) -> Optional[int]:
+        compact = _compact(line)
+        for idx in range(self._section + 1, 7):
+            if compact.startswith(_COMPACT_TITLES[idx]):
+                return idx
+        return None
+
+    def _flush_lines(self, texts: List[str]) -> None:
+        for text in texts:
+            for line in text.split("\n"):
+                line = _WS_PATTERN.sub(" ", line.replace("\xa0", " ")).strip()
+                if not line:
+                    continue
+                heading = self._heading_index(line)
+                if heading is not None:
+                    self._section = heading
+                self._lines[self._section].append(line)
+
+    def _flush_block(self) -> None:
+        if self._block:
+            text = "".join(self._block)
+            self._block = []
+            self._flush_lines([text.replace("\n", " ")])
+
+    def _emit_table(self, rows: List[List[str]]) -> None:
+        cell_lines = [
+            line
+            for row in rows
+            for cell in row
+            for line in cell.split("\n")
+        ]
+        headings = [
+            idx for idx in map(self._heading_index, cell_lines) if idx is not None
+        ]
+        if len(set(headings)) >= 2:
+            # 整篇放在大单元格里的排版表格：按段落处理
+            self._flush_lines(cell_lines)
+            return
+        if headings:
+            # 表格首行写着部分标题（如把“三、……”当作表头）
+            self._section = headings[0]
+
+        clean_rows = [
+            [_WS_PATTERN.sub(" ", cell.replace("\xa0", " ")).strip() for cell in row]
+            for row in rows
+        ]
+        self._tables.append((self._section, clean_rows))
+        # 同时把表格按“从上到下、从左到右”拍平写入正文，供文本路径兜底
+        for row in clean_rows:
+            line = " ".join(cell for cell in row if cell)
+            if line:
+                self._lines[self._section].append(line)
+
+    # ---------- 输出 ----------
+
+    def section_text(self, section_index: int) -> str:
+        return "\n".join(self._lines.get(section_index, [])).strip()
+
+    @property
+    def text(self) -> str:
+        """拍平后的整篇纯文本（标题、前言 + 6 个部分）。"""
+        return "\n".join(line for idx in range(0, 7) for line in self._lines[idx])
+
+    def mapped_tables(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """按行标签把网页表格映射到 TEMPLATE_TABLES：{table_key: {row_key: {col_key: value}}}"""
+        mapped: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for section, rows in self._tables:
+            for table_key, row_key, values in _map_table_rows(section, rows):
+                mapped.setdefault(table_key, {})[row_key] = values
+        return mapped
+
+    def to_report(
+        self, *, with_tables: bool = True, deadline: Optional[Deadline] = None
+    ) -> AnnualReport:
+        """
+        组装 AnnualReport。给 deadline 时与 parse_annual_report_text 相同：
+        到期或被取消时返回已完成的部分，并在 parse_diagnostics 中记录停在哪个阶段。
+        """
+        report = AnnualReport(versions=current_versions())
+        stages: List[str] = []
+        try:
+            self._fill_report(report, with_tables, deadline, stages)
+        except DeadlineExceeded as exc:
+            report.parse_diagnostics = deadline_diagnostics(exc, deadline, stages)
+            logger.warning(f"HTML 年报解析停在 {exc.stage}（{exc}）")
+        return report
+
+    def _fill_report(
+        self,
+        report: AnnualReport,
+        with_tables: bool,
+        deadline: Optional[Deadline],
+        stages: List[str],
+    ) -> None:
+        check_deadline(deadline, "metadata")
+        meta = extract_report_metadata(
+            "\n".join(self._lines[0] + self._lines[1][:20])
+        )
+        report.title, report.agency, report.year = meta.title, meta.agency, meta.year
+        report.region = meta.region
+        stages.append("metadata")
+
+        report.section1.text = self.section_text(1)
+        report.section5.text = self.section_text(5)
+        report.section6.text = self.section_text(6)
+        report.section2.raw_text = self.section_text(2)
+        report.section3.raw_text = self.section_text(3)
+        report.section4.raw_text = self.section_text(4)
+        stages.append("split_sections")
+
+        if with_tables:
+            check_deadline(deadline, "html_tables")
+            _fill_tables_from_html(report, self.mapped_tables(), deadline, stages)
+
+
+def _parse_cell_number(cell: str) -> Optional[str]:
+    token = cell.replace(",", "").replace("，", "").replace(" ", "")
+    return token if _CELL_NUMBER_PATTERN.match(token) else None
+
+
+def _columns_for(table_key: str, value_count: int) -> Optional[List[Dict[str, Any]]]:
+    cols = value_columns(TEMPLATE_TABLES[table_key])
+    if value_count == len(cols):
+        return cols
+    if table_key == "section3_applications" and value_count == len(cols) - 1:
+        # 7 列版本的第三部分表格没有“法人或其他组织小计”
+        return [col for col in cols if col["key"] != "org_total"]
+    return None
+
+
+def _map_table_rows(
+    section: int, rows: List[List[str]]
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    labels = _LABEL_INDEX.get(section, {})
+    out: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    for row in rows:
+        # 从右往左找到最后一个非数字单元格作为行标签
+        label_pos = -1
+        for pos in range(len(row) - 1, -1, -1):
+            if row[pos] and _parse_cell_number(row[pos]) is None:
+                label_pos = pos
+                break
+
+        tokens = [_parse_cell_number(cell) if cell else None for cell in row[label_pos + 1:]]
+        if not tokens or all(t is None for t in tokens):
+            continue
+        if any(t is None and cell for t, cell in zip(tokens, row[label_pos + 1:])):
+            continue
+
+        target: Optional[Tuple[str, str]] = None
+        if label_pos >= 0:
+            full, core = _label_variants(row[label_pos])
+            target = labels.get(full) or labels.get(core)
+            if target is None:
+                # 分组单元格（rowspan）与行标签拼在一起的情况
+                joined_full, joined_core = _label_variants("".join(row[: label_pos + 1]))
+                target = labels.get(joined_full) or labels.get(joined_core)
+        elif section == 4:
+            # 第四部分的数据行通常没有行标签，只有 15 个数字
+            target = ("section4_review_litigation", "cases")
+
+        if target is None:
+            continue
+
+        table_key, row_key = target
+        cols = _columns_for(table_key, len(tokens))
+        if cols is None:
+            continue
+
+        values: Dict[str, Any] = {}
+        for col, token in zip(cols, tokens):
+            if token is None:
+                values[col["key"]] = None
+            elif table_key == "section3_applications":
+                # 与 parse_template_table3 保持一致：第三部分统一存 float
+                values[col["key"]] = float(token)
+            else:
+                values[col["key"]] = convert_token(token, col.get("type", "int"))
+        out.append((table_key, row_key, values))
+
+    return out
+
+
+def _missing_cells(table_key: str, cells: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """模板中还没有数值的 (row_key, col_key)。"""
+    table_def = TEMPLATE_TABLES[table_key]
+    cols = [col["key"] for col in value_columns(table_def)]
+    missing: List[Tuple[str, str]] = []
+    for row in data_rows(table_def):
+        values = cells.get(row["key"]) or {}
+        for col_key in cols:
+            if col_key == "org_total" and values and col_key not in values:
+                # 7 列版本的第三部分表格本来就没有这一列
+                continue
+            if values.get(col_key) is None:
+                missing.append((row["key"], col_key))
+    return missing
+
+
+def _fill_tables_from_html(
+    report: AnnualReport,
+    mapped: Dict[str, Dict[str, Dict[str, Any]]],
+    deadline: Optional[Deadline] = None,
+    stages: Optional[List[str]] = None,
+) -> None:
+    sections = {2: report.section2, 3: report.section3, 4: report.section4}
+    for section_index, section in sections.items():
+        check_deadline(deadline, f"section{section_index}_tables")
+        keys = [k for k, t in TEMPLATE_TABLES.items() if t["section"] == section_index]
+        incomplete: Dict[str, List[Tuple[str, str]]] = {}
+        for key in keys:
+            cells = mapped.get(key) or {}
+            if cells:
+                section.tables[key] = {"cells": cells}
+            missing = _missing_cells(key, cells)
+            if missing:
+                incomplete[key] = missing
+
+        if incomplete and section.raw_text.strip():
+            _fill_missing_from_text(section_index, section, incomplete, deadline)
+        if stages is not None:
+            stages.append(f"section{section_index}_tables")
+
+
+def _fill_missing_from_text(
+    section_index: int,
+    section: Any,
+    incomplete: Dict[str, List[Tuple[str, str]]],
+    deadline: Optional[Deadline],
+) -> None:
+    """网页表格没映射上、或只映射了一部分的单元格，才用按数字顺序的文本解析补上。"""
+    try:
+        parsed = _SECTION_PARSERS[section_index](section.raw_text, deadline=deadline)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.warning(f"HTML 第{section_index}部分文本兜底解析失败: {e}")
+        return
+    for key, missing in incomplete.items():
+        if key not in parsed:
+            continue
+        if key not in section.tables:
+            section.tables[key] = parsed[key]
+            continue
+        fallback = parsed[key].get("cells") or {}
+        cells = section.tables[key]["cells"]
+        for row_key, col_key in missing:
+            value = (fallback.get(row_key) or {}).get(col_key)
+            if value is not None:
+                cells.setdefault(row_key, {})[col_key] = value
+
+
+def parse_annual_report_html(
+    html: str,
+    *,
+    with_tables: bool = True,
+    deadline: Optional[Deadline] = None,
+    budget_ms: Optional[float] = None,
+) -> AnnualReport:
+    """
+    将网页 HTML 形式的年度报告解析成 AnnualReport。
+    deadline / budget_ms 的含义同 parse_annual_report_text（拍平网页本身不限时）。
+    """
+    if deadline is None and budget_ms is not None:
+        deadline = Deadline.from_budget(budget_ms)
+    extractor = HtmlReportExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.to_report(with_tables=with_tables, deadline=deadline)
+
+
+def html_to_text(html: str) -> str:
+    """把年报网页拍平成纯文本（表格按行输出，单元格以空格分隔）。"""
+    extractor = HtmlReportExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text
@@ -0,0 +1,120 @@
+"""
+模板表格的求和勾稽关系，用来校验一次解析结果是否可信。
+
+每条关系是“若干单元格之和 = 另若干单元格之和”，按行或按列展开：
+- 第三部分：法人或其他组织小计 = 各类组织之和，总计 = 自然人 + 法人或其他组织；
+  （七）总计 = 各项办理结果之和；一 + 二 = （七）总计 + 四（模板 note 中的勾稽关系）；
+- 第四部分：行政复议 / 未经复议直接起诉 / 复议后起诉 各自的“总计”= 四种结果之和。
+
+版式里没有的列（如 7 列版式的小计列）不参与对应的关系；
+应有的行 / 单元格缺失（缺行或值为 None）时该条核对不了，计入 skipped，结果不算通过。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .template_tables import TEMPLATE_TABLES
+
+
+@dataclass(frozen=True)
+class SumInvariant:
+    name: str
+    # "col"：在每一行里比较这些列；"row"：在每一列里比较这些行
+    axis: str
+    left: Tuple[str, ...]
+    right: Tuple[str, ...]
+
+
+@dataclass
+class ValidationResult:
+    # 实际核对了多少个（行 / 列 × 关系）
+    checked: int
+    violations: List[str]
+    # 因单元格缺失而核对不了的个数
+    skipped: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """至少核对了一处、没有违反，也没有因缺失而跳过的关系。"""
+        return self.checked > 0 and not self.violations and not self.skipped
+
+
+def _section3_invariants() -> List[SumInvariant]:
+    rows = [r for r in TEMPLATE_TABLES["section3_applications"]["rows"] if r.get("data", True)]
+    results = tuple(
+        r["key"] for r in rows
+        if r.get("indent", 0) > 0 and r["key"] != "result_total"
+    )
+    orgs = ("business_corp", "research_org", "social_org", "legal_service_org", "other_org")
+    return [
+        SumInvariant("org_total", "col", ("org_total",), orgs),
+        SumInvariant("grand_total", "col", ("grand_total",), ("natural_person", "org_total")),
+        # 7 列版式没有 org_total 列
+        SumInvariant("grand_total_7col", "col", ("grand_total",), ("natural_person",) + orgs),
+        SumInvariant("result_total", "row", ("result_total",), results),
+        SumInvariant(
+            "balance", "row", ("new_requests", "carried_over"), ("result_total", "carry_next_year")
+        ),
+    ]
+
+
+def _section4_invariants() -> List[SumInvariant]:
+    invariants = []
+    for prefix in ("rev", "lit_direct", "lit_after_rev"):
+        parts = tuple(f"{prefix}_{k}" for k in ("maintained", "corrected", "other", "pending"))
+        invariants.append(SumInvariant(f"{prefix}_total", "col", (f"{prefix}_total",), parts))
+    return invariants
+
+
+SUM_INVARIANTS: Dict[str, List[SumInvariant]] = {
+    "section3_applications": _section3_invariants(),
+    "section4_review_litigation": _section4_invariants(),
+}
+
+
+def _sum(values: List[Optional[Any]]) -> Optional[float]:
+    if any(v is None for v in values):
+        return None
+    return float(sum(values))
+
+
+def validate_table(
+    table_key: str, cells: Dict[str, Dict[str, Any]], *, tolerance: float = 0.0
+) -> ValidationResult:
+    """按 SUM_INVARIANTS 校验一张表的 cells。"""
+    checked = 0
+    skipped = 0
+    violations: List[str] = []
+    columns = sorted({col for row in cells.values() for col in row})
+    for inv in SUM_INVARIANTS.get(table_key, []):
+        if inv.axis == "col":
+            for row_key, row in cells.items():
+                if inv.name == "grand_total_7col" and "org_total" in row:
+                    continue
+                # 这一行的版式里没有关系用到的列：关系不适用
+                if any(c not in row for c in inv.left + inv.right):
+                    continue
+                left = _sum([row[c] for c in inv.left])
+                right = _sum([row[c] for c in inv.right])
+                if left is None or right is None:
+                    skipped += 1
+                    continue
+                checked += 1
+                if abs(left - right) > tolerance:
+                    violations.append(f"{inv.name} @ {row_key}: {left:g} != {right:g}")
+        else:
+            for col in columns:
+                left = _sum([cells.get(r, {}).get(col) for r in inv.left])
+                right = _sum([cells.get(r, {}).get(col) for r in inv.right])
+                if left is None or right is None:
+                    skipped += 1
+                    continue
+                checked += 1
+                if abs(left - right) > tolerance:
+                    violations.append(f"{inv.name} @ {col}: {left:g} != {right:g}")
+    return ValidationResult(checked, violations, skipped)
+
+
+__all__ = ["SUM_INVARIANTS", "SumInvariant", "ValidationResult", "validate_table"]
@@ -0,0 +1,147 @@
+"""
+把 TEMPLATE_TABLES 编译成固定顺序的“单元格布局”。
+
+每个可填数字的单元格 (table_key, row_key, col_key) 对应一个固定下标，
+导出、编码、比较等批量处理都按这个顺序把表格拍平成一维数组，
+不必再逐层遍历嵌套 dict。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from array import array
+from dataclasses import dataclass, field, is_dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .tables_parser import data_rows, value_columns
+from .template_tables import TEMPLATE_TABLES
+
+CellKey = Tuple[str, str, str]
+
+_NAN = float("nan")
+
+
+@dataclass(frozen=True)
+class CellLayout:
+    keys: Tuple[CellKey, ...]
+    # 每个单元格的类型："int" / "float"
+    types: Tuple[str, ...]
+    # table_key -> [start, end) 下标区间
+    table_slices: Dict[str, Tuple[int, int]]
+    fingerprint: str
+    index: Dict[CellKey, int] = field(compare=False, repr=False)
+    # table_key -> 第几部分
+    table_sections: Dict[str, int] = field(compare=False, repr=False)
+    # table_key -> row_key -> col_key -> 下标（flatten 逐层查找，不必为每个单元格拼 tuple）
+    nested_index: Dict[str, Dict[str, Dict[str, int]]] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def column_names(self) -> List[str]:
+        return [column_name(key) for key in self.keys]
+
+    def flatten(self, report: Any, typecode: str = "d") -> array:
+        """
+        把 AnnualReport 或其 dict 形式按布局拍平成 array(typecode)（默认 float64），缺失 / None 记为 NaN。
+        """
+        values = array(typecode, [_NAN]) * len(self.keys)
+        nested = self.nested_index
+        for table_key, cells in iter_table_cells(report, self.table_sections):
+            rows = nested[table_key]
+            for row_key, row in cells.items():
+                cols = rows.get(row_key)
+                if cols is None or not row:
+                    continue
+                for col_key, value in row.items():
+                    pos = cols.get(col_key)
+                    if pos is not None and value is not None:
+                        values[pos] = value
+        return values
+
+    def unflatten(self, values) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        """flatten 的逆过程：{table_key: {row_key: {col_key: value}}}，NaN 的单元格省略。"""
+        tables: Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        for (table_key, row_key, col_key), col_type, value in zip(self.keys, self.types, values):
+            if math.isnan(value):
+                continue
+            if col_type == "int" and value.is_integer():
+                value = int(value)
+            tables.setdefault(table_key, {}).setdefault(row_key, {})[col_key] = value
+        return tables
+
+
+def column_name(key: CellKey) -> str:
+    return ".".join(key)
+
+
+def compile_layout(tables: Mapping[str, Dict[str, Any]] = TEMPLATE_TABLES) -> CellLayout:
+    keys: List[CellKey] = []
+    types: List[str] = []
+    table_slices: Dict[str, Tuple[int, int]] = {}
+    table_sections: Dict[str, int] = {}
+    for table_key, table_def in tables.items():
+        start = len(keys)
+        for row in data_rows(table_def):
+            for col in value_columns(table_def):
+                keys.append((table_key, row["key"], col["key"]))
+                types.append("float" if col.get("type") == "float" else "int")
+        table_slices[table_key] = (start, len(keys))
+        table_sections[table_key] = table_def["section"]
+
+    nested: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for i, (table_key, row_key, col_key) in enumerate(keys):
+        nested.setdefault(table_key, {}).setdefault(row_key, {})[col_key] = i
+
+    digest = hashlib.sha1(
+        json.dumps([keys, types], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+    return CellLayout(
+        keys=tuple(keys),
+        types=tuple(types),
+        table_slices=table_slices,
+        fingerprint=digest,
+        index={key: i for i, key in enumerate(keys)},
+        table_sections=table_sections,
+        nested_index=nested,
+    )
+
+
+def iter_table_cells(report: Any, table_sections: Mapping[str, int]):
+    """从 AnnualReport 或其 dict 形式中逐个取出 (table_key, cells)。"""
+    if is_dataclass(report):
+        for table_key, section in table_sections.items():
+            tables = getattr(report, f"section{section}").tables
+            table = tables.get(table_key)
+            if table:
+                yield table_key, table.get("cells") or {}
+        return
+
+    for table_key, section in table_sections.items():
+        section_data = (report or {}).get(f"section{section}") or {}
+        table = (section_data.get("tables") or {}).get(table_key)
+        if table:
+            yield table_key, table.get("cells") or {}
+
+
+def report_field(report: Any, name: str) -> Any:
+    """兼容 AnnualReport 与 dict 形式取顶层字段（agency / year / region 等）。"""
+    if is_dataclass(report):
+        return getattr(report, name, None)
+    return (report or {}).get(name)
+
+
+DEFAULT_LAYOUT = compile_layout()
+
+__all__ = [
+    "CellLayout",
+    "DEFAULT_LAYOUT",
+    "column_name",
+    "compile_layout",
+    "iter_table_cells",
+    "report_field",
+]
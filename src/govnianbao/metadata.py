@@ -0,0 +1,150 @@
+"""
+从报告标题或第一部分正文中提取发布机关和报告年度。
+
+常见标题写法：
+- 上海市徐汇区人民政府2024年政府信息公开工作年度报告
+- 某某局关于2023年度政府信息公开工作年度报告
+- 2024年苏州市财政局政府信息公开工作年度报告
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# 只看开头这么多字符：标题、前言和第一部分开头都在里面
+_HEAD_CHARS = 4000
+
+_YEAR = r"(?P<year>(?:19|20)\d{2})\s*年\s*度?"
+_REPORT_SUFFIX = r"\s*(?:政府)?信息公开(?:工作)?(?:年度)?报告"
+
+_AGENCY_FIRST = re.compile(
+    r"(?P<agency>[^\n，,。；;：:\d]{2,60}?)\s*(?:关于)?\s*" + _YEAR + _REPORT_SUFFIX
+)
+_YEAR_FIRST = re.compile(_YEAR + r"\s*(?P<agency>[^\n，,。；;：:\d]{2,60}?)" + _REPORT_SUFFIX)
+
+# 只有像标题的行（不太长、以“年度报告”结尾）才套用上面两个标题模式
+_TITLE_MAX_CHARS = 80
+_TITLE_END = re.compile(r"年度报告[\s》”\"'）)]*$")
+# 正文句子里常见、但不是具体机关的称呼
+_GENERIC_AGENCIES = frozenset(
+    {
+        "政府", "人民政府", "本级政府", "各级政府", "行政机关", "机关",
+        "本机关", "本单位", "本部门", "本局", "本委", "本办", "本院",
+        "我局", "我委", "我办", "我院", "我单位", "我部门", "我机关",
+    }
+)
+
+_STAT_PERIOD_YEAR = re.compile(r"统计期限自\s*(?P<year>(?:19|20)\d{2})\s*年")
+_ANY_YEAR = re.compile(r"(?P<year>(?:19|20)\d{2})\s*年")
+_AGENCY_IN_TEXT = re.compile(
+    r"本(?:年度)?报告(?:由|是)\s*(?P<agency>[^\n，,。；;]{2,40}?)\s*(?:根据|依据|按照|编制)"
+)
+
+_AGENCY_STRIP = " \t　《》“”\"'【】[]"
+
+# 机关名称开头的行政区划：省 / 市 / 区县，最多取三级。
+# 地名部分不含区划单位字，也不含“局、委、办……”等机关用字，
+# 以免把“公安局城区分局”“国家税务总局上海市”当成区划
+_REGION_UNIT = re.compile(
+    r"[^\s省市区县盟旗局厅委办院部署处室科所站队校]{1,12}?"
+    r"(?:省|自治区|特别行政区|自治州|地区|市|盟|自治县|区|县|旗)"
+)
+# 以区划单位字结尾、但不是区划的常用词（“广州市城市管理局”“某市地区办”）
+_NOT_REGIONS = frozenset(
+    {
+        "城市", "地区", "市区", "社区", "园区", "辖区", "景区", "片区", "街区", "小区", "山区",
+        "全省", "全市", "全区", "全县", "本省", "本市", "本区", "本县", "我省", "我市", "我区", "我县",
+    }
+)
+# 中央和国家机关（含其垂直管理的地方分支）不归入地方区划
+_NATIONAL_PREFIXES = ("国家", "中国", "中华人民共和国", "中央", "国务院", "全国")
+_MAX_REGION_LEVELS = 3
+
+
+@dataclass
+class ReportMetadata:
+    title: Optional[str] = None
+    agency: Optional[str] = None
+    year: Optional[int] = None
+    # 发布机关所在行政区划（最细一级，如“江苏省苏州市”）
+    region: Optional[str] = None
+
+
+def extract_region_path(agency: Optional[str]) -> List[str]:
+    """
+    从机关名称开头解析行政区划层级，返回由粗到细的前缀列表：
+        "江苏省苏州市财政局" -> ["江苏省", "江苏省苏州市"]
+        "上海市徐汇区人民政府" -> ["上海市", "上海市徐汇区"]
+        "国家税务总局上海市税务局" -> []
+    """
+    path: List[str] = []
+    if not agency or agency.startswith(_NATIONAL_PREFIXES):
+        return path
+    pos = 0
+    while len(path) < _MAX_REGION_LEVELS:
+        match = _REGION_UNIT.match(agency, pos)
+        if match is None or match.group() in _NOT_REGIONS:
+            break
+        pos = match.end()
+        path.append(agency[:pos])
+    return path
+
+
+def _clean_agency(agency: str) -> Optional[str]:
+    agency = agency.strip(_AGENCY_STRIP)
+    if agency.startswith("附件"):
+        agency = agency[2:].lstrip("0123456789：: ")
+    if agency in _GENERIC_AGENCIES:
+        return None
+    return agency or None
+
+
+def _is_title_like(line: str) -> bool:
+    return len(line) <= _TITLE_MAX_CHARS and _TITLE_END.search(line) is not None
+
+
+def extract_report_metadata(text: str, title: Optional[str] = None) -> ReportMetadata:
+    """
+    提取发布机关、报告年度和标题。
+
+    - title 不为空时优先从标题提取；
+    - 否则在正文开头找“……政府信息公开工作年度报告”标题行（不太长、以“年度报告”结尾的行，
+      正文句子不算），“政府”“本机关”这类泛称不作为机关名称；
+    - 还缺的字段再从第一部分正文里找（“统计期限自 2024 年……”“本报告由……编制”）。
+    """
+    meta = ReportMetadata(title=title.strip() if title else None)
+    head = text[:_HEAD_CHARS]
+
+    candidates = [title] if title else []
+    candidates += [line for line in head.splitlines() if "报告" in line]
+    for line in candidates:
+        line = line.strip()
+        if not _is_title_like(line):
+            continue
+        match = _AGENCY_FIRST.search(line) or _YEAR_FIRST.search(line)
+        if match is None:
+            continue
+        agency = _clean_agency(match.group("agency"))
+        if agency is None:
+            continue
+        meta.agency = agency
+        meta.year = int(match.group("year"))
+        if meta.title is None:
+            meta.title = line[match.start():].strip()
+        break
+
+    if meta.year is None:
+        match = _STAT_PERIOD_YEAR.search(head) or _ANY_YEAR.search(head)
+        if match is not None:
+            meta.year = int(match.group("year"))
+
+    if meta.agency is None:
+        match = _AGENCY_IN_TEXT.search(head)
+        if match is not None:
+            meta.agency = _clean_agency(match.group("agency"))
+
+    region_path = extract_region_path(meta.agency)
+    meta.region = region_path[-1] if region_path else None
+    return meta
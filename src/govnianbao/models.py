@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Any, Dict, Optional
 
 from .template_tables import SECTION_TITLES, TEMPLATE_TABLES
 
@@ -69,6 +69,13 @@ class Section4ReviewLitigation:
 class AnnualReport:
     """统一的“结构化年报”数据模型。"""
 
+    # 报告标题、发布机关、报告年度（从标题或第一部分正文提取）
+    title: Optional[str] = None
+    agency: Optional[str] = None
+    year: Optional[int] = None
+    # 发布机关所在行政区划（由机关名称推出，如“江苏省苏州市”）
+    region: Optional[str] = None
+
     # 6 个板块标题
     sections_title: Dict[int, str] = field(
         default_factory=lambda: SECTION_TITLES.copy()
@@ -82,3 +89,8 @@ class AnnualReport:
     )
     section5: Section5Problems = field(default_factory=Section5Problems)
     section6: Section6Other = field(default_factory=Section6Other)
+
+    # 解析过程的诊断信息（如超时 / 取消时停在哪个阶段），正常解析时为空
+    parse_diagnostics: Dict[str, Any] = field(default_factory=dict)
+    # 解析器 / 模板版本戳（见 versions.current_versions），未经解析的空报告为空
+    versions: Dict[str, str] = field(default_factory=dict)
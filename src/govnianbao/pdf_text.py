@@ -0,0 +1,266 @@
+"""
+PDF 文本抽取 + 按页缓存。
+
+从 PDF 抽文本比解析本身慢得多；解析器改一次就要把全部 PDF 重新抽一遍。
+这里把每一页的抽取结果按 (文件内容 sha256, 抽取器版本, 页码) 缓存在本地磁盘上（zlib 压缩）：
+
+    <root>/<sha256 前 2 位>/<sha256>/<抽取器版本>/<页码>.txt.z
+    <root>/<sha256 前 2 位>/<sha256>/<抽取器版本>/pages.json   # 页数
+
+- 同一份文件无论文件名、路径如何，内容相同就命中；抽取器升级（版本变化）自动失效；
+- 所有页都命中时不打开 PDF，也不需要安装 pypdf（未安装时读取缓存里已有的 pypdf 版本）；
+  只缺几页时只抽缺的那几页；
+- 写入先写临时文件再 os.replace，多进程同时抽同一份文件也不会读到半截内容。
+
+默认抽取器基于 pypdf（可选依赖，`pip install pypdf`）；缓存目录默认取环境变量
+GOVNIANBAO_PDF_CACHE，未设置时为 ~/.cache/govnianbao/pdf_text。
+"""
+
+from __future__ import annotations
+
+import abc
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zlib
+from importlib import metadata
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = "GOVNIANBAO_PDF_CACHE"
+COMPRESS_LEVEL = 6
+# 缓存文件格式；改动布局时递增，旧缓存自然失效
+_CACHE_FORMAT = "1"
+_PAGES_FILE = "pages.json"
+_HASH_CHUNK = 1024 * 1024
+
+PdfSource = Union[str, "os.PathLike[str]", bytes]
+
+
+class PdfExtractor(abc.ABC):
+    """
+    抽取器接口：version 参与缓存键；pages() 返回每页一个“取该页文本”的函数，按需调用。
+    依赖未安装、无法确定版本时 version 为 None，此时只读取以 family 开头的已有缓存版本。
+    """
+
+    version: Optional[str] = None
+    family: str = ""
+
+    @abc.abstractmethod
+    def pages(self, data: bytes) -> Sequence[Callable[[], str]]:
+        ...
+
+
+class PypdfExtractor(PdfExtractor):
+    """基于 pypdf 的 extract_text()；版本号带上 pypdf 的版本（从包元数据读取，不导入 pypdf）。"""
+
+    family = "pypdf-"
+
+    def __init__(self) -> None:
+        try:
+            self.version = f"{self.family}{metadata.version('pypdf')}"
+        except metadata.PackageNotFoundError:
+            self.version = None
+
+    def pages(self, data: bytes) -> Sequence[Callable[[], str]]:
+        reader = _require_pypdf().PdfReader(BytesIO(data))
+        return [lambda page=page: page.extract_text() or "" for page in reader.pages]
+
+
+def _require_pypdf():
+    try:
+        import pypdf
+    except ImportError as exc:  # pragma: no cover - 取决于运行环境
+        raise ImportError(
+            "PDF text extraction requires pypdf; install it with `pip install pypdf`"
+        ) from exc
+    return pypdf
+
+
+def file_sha256(source: PdfSource) -> str:
+    """文件内容的 sha256（路径按块读取，不整份读进内存）。"""
+    digest = hashlib.sha256()
+    if isinstance(source, bytes):
+        digest.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe_name(version: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in version)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class PdfTextCache:
+    """按 (sha256, 抽取器版本, 页码) 保存已抽取文本的磁盘缓存。"""
+
+    def __init__(self, root: Union[str, "os.PathLike[str]"]) -> None:
+        self.root = os.fspath(root)
+
+    def _dir(self, sha256: str, version: str) -> str:
+        return os.path.join(
+            self.root, sha256[:2], sha256, f"{_safe_name(version)}.v{_CACHE_FORMAT}"
+        )
+
+    def versions(self, sha256: str, prefix: str = "") -> List[str]:
+        """该文件已缓存的抽取器版本（以 prefix 开头），最近写入的在前。"""
+        directory = os.path.join(self.root, sha256[:2], sha256)
+        suffix = f".v{_CACHE_FORMAT}"
+        try:
+            entries = [e for e in os.scandir(directory) if e.is_dir()]
+        except OSError:
+            return []
+        entries = [
+            e for e in entries if e.name.endswith(suffix) and e.name.startswith(_safe_name(prefix))
+        ]
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        return [e.name[: -len(suffix)] for e in entries]
+
+    def page_count(self, sha256: str, version: str) -> Optional[int]:
+        try:
+            with open(os.path.join(self._dir(sha256, version), _PAGES_FILE), encoding="utf-8") as f:
+                return int(json.load(f)["pages"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set_page_count(self, sha256: str, version: str, pages: int) -> None:
+        directory = self._dir(sha256, version)
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(os.path.join(directory, _PAGES_FILE), json.dumps({"pages": pages}).encode())
+
+    def get(self, sha256: str, version: str, page: int) -> Optional[str]:
+        try:
+            with open(os.path.join(self._dir(sha256, version), f"{page}.txt.z"), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error, UnicodeDecodeError):
+            logger.warning(f"corrupt pdf text cache entry {sha256}/{version}/{page}, ignoring")
+            return None
+
+    def put(self, sha256: str, version: str, page: int, text: str) -> None:
+        directory = self._dir(sha256, version)
+        os.makedirs(directory, exist_ok=True)
+        data = zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+        _write_atomic(os.path.join(directory, f"{page}.txt.z"), data)
+
+
+def default_cache() -> PdfTextCache:
+    root = os.environ.get(CACHE_ENV) or os.path.join(
+        os.path.expanduser("~"), ".cache", "govnianbao", "pdf_text"
+    )
+    return PdfTextCache(root)
+
+
+_DEFAULT_EXTRACTOR: Optional[PdfExtractor] = None
+
+
+def _default_extractor() -> PdfExtractor:
+    global _DEFAULT_EXTRACTOR
+    if _DEFAULT_EXTRACTOR is None:
+        _DEFAULT_EXTRACTOR = PypdfExtractor()
+    return _DEFAULT_EXTRACTOR
+
+
+def _cached_pages(
+    cache: PdfTextCache, sha256: str, version: str
+) -> Optional[Tuple[int, Dict[int, str]]]:
+    """(页数, 已缓存的页)；没有页数记录时返回 None。"""
+    count = cache.page_count(sha256, version)
+    if count is None:
+        return None
+    texts: Dict[int, str] = {}
+    for page in range(count):
+        text = cache.get(sha256, version, page)
+        if text is not None:
+            texts[page] = text
+    return count, texts
+
+
+def extract_pdf_pages(
+    source: PdfSource,
+    *,
+    cache: Optional[PdfTextCache] = None,
+    extractor: Optional[PdfExtractor] = None,
+    use_cache: bool = True,
+) -> List[str]:
+    """
+    按页返回 PDF 文本。source 为文件路径或文件内容。
+    cache 默认为 default_cache()；use_cache=False 时直接抽取、不读写缓存。
+    """
+    extractor = extractor or _default_extractor()
+    data = source if isinstance(source, bytes) else None
+    if not use_cache:
+        if data is None:
+            with open(source, "rb") as f:
+                data = f.read()
+        return [page() for page in extractor.pages(data)]
+
+    cache = cache or default_cache()
+    sha256 = file_sha256(source)
+    version = extractor.version
+    texts: Dict[int, str] = {}
+    count: Optional[int] = None
+    if version is None:
+        # 版本未知（依赖未安装）：只能用已有的完整缓存
+        for cached in cache.versions(sha256, extractor.family):
+            found = _cached_pages(cache, sha256, cached)
+            if found is not None and len(found[1]) == found[0]:
+                cached_count, cached_texts = found
+                return [cached_texts[page] for page in range(cached_count)]
+    else:
+        found = _cached_pages(cache, sha256, version)
+        if found is not None:
+            count, texts = found
+            if len(texts) == count:
+                return [texts[page] for page in range(count)]
+
+    if data is None:
+        with open(source, "rb") as f:
+            data = f.read()
+    pages = extractor.pages(data)
+    if version is None:
+        # 抽取器能用但给不出版本：结果不写缓存
+        return [page() for page in pages]
+    if count != len(pages):
+        cache.set_page_count(sha256, version, len(pages))
+    missing = [page for page in range(len(pages)) if page not in texts]
+    for page in missing:
+        texts[page] = pages[page]()
+        cache.put(sha256, version, page, texts[page])
+    logger.info(f"pdf {sha256[:12]}: extracted {len(missing)}/{len(pages)} pages ({version})")
+    return [texts[page] for page in range(len(pages))]
+
+
+def extract_pdf_text(source: PdfSource, **options) -> str:
+    """整份 PDF 的文本（各页以换行连接），参数同 extract_pdf_pages。"""
+    return "\n".join(extract_pdf_pages(source, **options))
+
+
+__all__ = [
+    "PdfExtractor",
+    "PdfTextCache",
+    "PypdfExtractor",
+    "default_cache",
+    "extract_pdf_pages",
+    "extract_pdf_text",
+    "file_sha256",
+]
@@ -0,0 +1,148 @@
+"""
+按行标签定位表格数字。
+
+把模板里各行的 label 编译成一个 Aho-Corasick 自动机（每组表格只编译一次），
+对一段正文做一趟线性扫描即可找出所有行标签出现的位置；
+每个标签后面、下一个标签之前出现的数字就是这一行的候选值。
+扫描时忽略正文中的空白，PDF 抽取出的“行 政 许 可”也能匹配。
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .deadline import Deadline, check_deadline
+from .template_tables import TEMPLATE_TABLES
+
+# (table_key, row_key)
+RowRef = Tuple[str, str]
+
+# 每找到这么多个匹配检查一次时限
+_DEADLINE_CHECK_HITS = 256
+
+# 行标签前的编号：“一、”“（三）”“1.”
+_LABEL_NUMBERING = re.compile(
+    r"^(?:[一二三四五六七八九十]+、|[（(][一二三四五六七八九十]+[）)]|\d+[\.、．])"
+)
+
+
+class RowLabelAutomaton:
+    """多模式匹配自动机：goto 表 + fail 指针，输出取以当前状态结尾的最长标签。"""
+
+    def __init__(self, patterns: Dict[str, RowRef]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        # 以该状态结尾的最长标签（自身或沿 fail 链）
+        self._output: List[Optional[Tuple[int, RowRef]]] = [None]
+
+        for label, ref in patterns.items():
+            label = "".join(label.split())
+            if not label:
+                continue
+            state = 0
+            for ch in label:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._depth.append(self._depth[state] + 1)
+                    self._output.append(None)
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._output[state] = (len(label), ref)
+
+        # 广度优先补 fail 指针
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._output[nxt] is None:
+                    self._output[nxt] = self._output[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, RowRef]]:
+        """产出所有匹配 (start, end, ref)，start / end 为原文位置，可能互相重叠。"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        # 最近扫描过的非空白字符位置，用来由标签长度反推起点
+        positions: List[int] = []
+        for pos, ch in enumerate(text):
+            if ch.isspace():
+                continue
+            positions.append(pos)
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = output[state]
+            if hit is not None:
+                length, ref = hit
+                yield positions[-length], pos + 1, ref
+
+    def find_all(
+        self, text: str, *, deadline: Optional[Deadline] = None
+    ) -> List[Tuple[int, int, RowRef]]:
+        """最左最长、互不重叠的匹配，按出现顺序排列。"""
+        check_deadline(deadline, "row_labels")
+        found: List[Tuple[int, int, RowRef]] = []
+        for match in self.iter_matches(text):
+            found.append(match)
+            if len(found) % _DEADLINE_CHECK_HITS == 0:
+                check_deadline(deadline, "row_labels")
+        matches = sorted(found, key=lambda m: (m[0], -(m[1] - m[0])))
+        selected: List[Tuple[int, int, RowRef]] = []
+        last_end = -1
+        for start, end, ref in matches:
+            if start >= last_end:
+                selected.append((start, end, ref))
+                last_end = end
+        return selected
+
+
+@lru_cache(maxsize=None)
+def automaton_for(table_keys: Tuple[str, ...], *, strip_numbering: bool = False) -> RowLabelAutomaton:
+    """
+    给定若干张模板表格的行标签自动机（按表格组合缓存，只编译一次）。
+    strip_numbering=True 时同时登记去掉“1.”“（三）”等编号后的标签（至少 4 个字）。
+    """
+    patterns: Dict[str, RowRef] = {}
+    for table_key in table_keys:
+        for row in TEMPLATE_TABLES[table_key]["rows"]:
+            if row.get("data", True) and row.get("label"):
+                ref = (table_key, row["key"])
+                patterns.setdefault(row["label"], ref)
+                if strip_numbering:
+                    stripped = _LABEL_NUMBERING.sub("", row["label"])
+                    if len(stripped) >= 4:
+                        patterns.setdefault(stripped, ref)
+    return RowLabelAutomaton(patterns)
+
+
+def segments_by_label(
+    text: str,
+    table_keys: Sequence[str],
+    *,
+    strip_numbering: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Dict[RowRef, List[str]]:
+    """
+    找出每个行标签之后、下一个标签之前的文本段。
+    同一标签出现多次时保留全部文本段（按出现顺序），由调用方挑选。
+    strip_numbering 见 automaton_for。
+    """
+    automaton = automaton_for(tuple(table_keys), strip_numbering=strip_numbering)
+    matches = automaton.find_all(text, deadline=deadline)
+    segments: Dict[RowRef, List[str]] = {}
+    for i, (_, end, ref) in enumerate(matches):
+        next_start = matches[i + 1][0] if i + 1 < len(matches) else len(text)
+        segments.setdefault(ref, []).append(text[end:next_start])
+    return segments
@@ -0,0 +1,241 @@
+"""
+表格抽取策略注册表。
+
+每张表可以登记多个抽取策略（按模板顺序填、按行标签取、逐个版式试填……），
+登记时给一个预估耗时（毫秒）。运行时按登记的 cost 从小到大依次尝试（cost 相同按登记顺序），
+第一个“填满（某个版式的每一行都有、没有空单元格）且满足求和勾稽关系”的结果胜出。
+
+尝试顺序只取决于登记信息，不受之前解析过哪些文档影响：同一篇文档、同一组策略
+总是得到同样的结果（版本戳里的解析器版本足以判断是否需要重解析）。
+每次尝试的成败和耗时仍按文档来源（默认是表头指纹）记下来，strategy_stats 可用于监控、
+据此调整登记的 cost。
+
+- 所有策略都没通过校验时，取最先尝试的非空结果，并附上 parse_warnings
+  （缺行的截断结果同样不算通过，会继续尝试后面的策略）。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .deadline import Deadline, DeadlineExceeded, check_deadline
+from .invariants import validate_table
+from .template_registry import layouts_for
+
+logger = logging.getLogger(__name__)
+
+Cells = Dict[str, Dict[str, Any]]
+# (raw_text, deadline) -> cells；失败时抛异常或返回空
+Extractor = Callable[[str, Optional[Deadline]], Cells]
+
+# 最多分别统计这么多个来源（LRU）
+_MAX_SOURCES = 1024
+
+
+@dataclass(frozen=True)
+class TableStrategy:
+    table_key: str
+    name: str
+    extract: Extractor
+    # 预估耗时（毫秒），决定尝试顺序
+    cost: float
+
+
+@dataclass
+class StrategyStats:
+    attempts: int = 0
+    successes: int = 0
+    total_ms: float = 0.0
+
+    def record(self, success: bool, elapsed_ms: float) -> None:
+        self.attempts += 1
+        self.successes += int(success)
+        self.total_ms += elapsed_ms
+
+
+_STRATEGIES: Dict[str, List[TableStrategy]] = {}
+# table_key -> {strategy name -> 全局统计}
+_GLOBAL_STATS: Dict[str, Dict[str, StrategyStats]] = {}
+# (table_key, source) -> {strategy name -> 统计}
+_SOURCE_STATS: "OrderedDict[Tuple[str, str], Dict[str, StrategyStats]]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def register_strategy(
+    table_key: str, name: str, extract: Extractor, *, cost: float
+) -> TableStrategy:
+    """登记一个抽取策略；同名策略会被替换（统计保留）。"""
+    strategy = TableStrategy(table_key, name, extract, cost)
+    with _LOCK:
+        strategies = [s for s in _STRATEGIES.get(table_key, []) if s.name != name]
+        strategies.append(strategy)
+        _STRATEGIES[table_key] = strategies
+    return strategy
+
+
+def unregister_strategy(table_key: str, name: str) -> None:
+    with _LOCK:
+        _STRATEGIES[table_key] = [s for s in _STRATEGIES.get(table_key, []) if s.name != name]
+
+
+def strategies_for(table_key: str) -> List[TableStrategy]:
+    """某张表已登记的策略（按登记顺序）。"""
+    return list(_STRATEGIES.get(table_key, []))
+
+
+def ordered_strategies(table_key: str) -> List[TableStrategy]:
+    """按登记的 cost 从小到大排列的策略（cost 相同按登记顺序）。"""
+    with _LOCK:
+        strategies = list(_STRATEGIES.get(table_key, []))
+    # sorted 是稳定排序：cost 相同的保持登记顺序
+    return sorted(strategies, key=lambda strategy: strategy.cost)
+
+
+def record_outcome(
+    table_key: str, name: str, source: Optional[str], success: bool, elapsed_ms: float
+) -> None:
+    with _LOCK:
+        _GLOBAL_STATS.setdefault(table_key, {}).setdefault(name, StrategyStats()).record(
+            success, elapsed_ms
+        )
+        if source is None:
+            return
+        key = (table_key, source)
+        stats = _SOURCE_STATS.get(key)
+        if stats is None:
+            stats = _SOURCE_STATS[key] = {}
+            if len(_SOURCE_STATS) > _MAX_SOURCES:
+                _SOURCE_STATS.popitem(last=False)
+        else:
+            _SOURCE_STATS.move_to_end(key)
+        stats.setdefault(name, StrategyStats()).record(success, elapsed_ms)
+
+
+def strategy_stats(table_key: str, source: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """统计快照（全局或某个来源），便于监控。"""
+    with _LOCK:
+        if source is None:
+            stats = _GLOBAL_STATS.get(table_key, {})
+        else:
+            stats = _SOURCE_STATS.get((table_key, source), {})
+        return {
+            name: {
+                "attempts": s.attempts,
+                "successes": s.successes,
+                "mean_ms": s.total_ms / s.attempts if s.attempts else 0.0,
+            }
+            for name, s in stats.items()
+        }
+
+
+def reset_strategy_stats() -> None:
+    with _LOCK:
+        _GLOBAL_STATS.clear()
+        _SOURCE_STATS.clear()
+
+
+def _has_values(cells: Cells) -> bool:
+    return any(v is not None for row in cells.values() for v in row.values())
+
+
+def _missing_rows(table_key: str, cells: Cells) -> List[str]:
+    """与最接近的已登记版式相比缺少的行；没有登记版式时不检查行。"""
+    layouts = layouts_for(table_key)
+    if not layouts:
+        return []
+    return min(
+        ([key for key in layout.row_keys if key not in cells] for layout in layouts), key=len
+    )
+
+
+def _is_complete(table_key: str, cells: Cells) -> bool:
+    return (
+        bool(cells)
+        and not _missing_rows(table_key, cells)
+        and all(v is not None for row in cells.values() for v in row.values())
+    )
+
+
+def run_strategies(
+    table_key: str,
+    raw_text: str,
+    *,
+    source: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> Dict[str, Any]:
+    """
+    按 ordered_strategies 的顺序运行某张表的策略，
+    返回 {"cells": ..., "parse_tier": 策略名, ["parse_warnings": ...]}。
+    每次尝试的成败（填满且通过求和校验）和耗时按 source 计入统计；耗时按 clock（秒）计算。
+    """
+    warnings: List[str] = []
+    candidates: List[Tuple[TableStrategy, Cells]] = []
+    for strategy in ordered_strategies(table_key):
+        check_deadline(deadline, f"{table_key}:{strategy.name}")
+        started = clock()
+        try:
+            cells = strategy.extract(raw_text, deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            record_outcome(table_key, strategy.name, source, False, (clock() - started) * 1000)
+            warnings.append(f"{strategy.name} failed: {e!r}")
+            continue
+
+        if not cells or not _has_values(cells):
+            record_outcome(table_key, strategy.name, source, False, (clock() - started) * 1000)
+            warnings.append(f"{strategy.name}: no values")
+            continue
+        validation = validate_table(table_key, cells)
+        success = validation.ok and _is_complete(table_key, cells)
+        record_outcome(table_key, strategy.name, source, success, (clock() - started) * 1000)
+        if success:
+            logger.info(
+                f"{table_key}: accepted {strategy.name} ({validation.checked} sums checked)"
+            )
+            return {"cells": cells, "parse_tier": strategy.name}
+
+        missing = _missing_rows(table_key, cells)
+        if validation.violations:
+            warnings.append(
+                f"{strategy.name}: {len(validation.violations)} sum check(s) failed, "
+                f"e.g. {validation.violations[0]}"
+            )
+        elif missing:
+            warnings.append(
+                f"{strategy.name}: incomplete, {len(missing)} row(s) missing (e.g. {missing[0]})"
+            )
+        else:
+            warnings.append(
+                f"{strategy.name}: incomplete or unverifiable ({validation.checked} sums checked, "
+                f"{validation.skipped} skipped)"
+            )
+        candidates.append((strategy, cells))
+
+    warnings.append("no strategy produced a complete table that passes the sum checks")
+    if not candidates:
+        return {"cells": {}, "parse_warnings": warnings}
+    # 最先尝试的（登记 cost 最低的）
+    strategy, cells = candidates[0]
+    logger.info(f"{table_key}: no strategy passed validation, using {strategy.name}")
+    return {"cells": cells, "parse_tier": strategy.name, "parse_warnings": warnings}
+
+
+__all__ = [
+    "StrategyStats",
+    "TableStrategy",
+    "ordered_strategies",
+    "record_outcome",
+    "register_strategy",
+    "reset_strategy_stats",
+    "run_strategies",
+    "strategies_for",
+    "strategy_stats",
+    "unregister_strategy",
+]
@@ -0,0 +1,120 @@
+"""
+超大文本转储（多篇年报首尾相接）的流式读取。
+
+爬虫会把成千上万篇年报直接拼接成一个 UTF-8 文本文件，体积可达数 GB。
+这里用 mmap 映射整个文件，只在字节层面定位每篇年报的边界：
+- 以“一、总体情况”作为一篇年报的开始；
+- 只有在上一篇出现过“六、其他需要报告的事项”之后，
+  再次出现的“一、总体情况”才视为新一篇（避免目录等重复标题误切）；
+- 新一篇的起点会向前回溯到“……政府信息公开工作年度报告”这类标题行，
+  保留标题供后续提取机关 / 年度等信息。
+
+每次只把一篇年报的字节切片解码成 str，峰值内存与单篇大小相当。
+"""
+
+from __future__ import annotations
+
+import mmap
+import re
+from typing import Iterator, Optional, Tuple
+
+from .annual_report_parser import parse_annual_report_text
+from .models import AnnualReport
+from .template_tables import SECTION_TITLES
+
+# 标题行回溯窗口：只在新一篇“一、总体情况”之前这么多字节内找报告标题
+_TITLE_LOOKBACK_BYTES = 64 * 1024
+
+# 行首允许的空白（含全角空格 U+3000 的 UTF-8 编码）
+_LINE_LEADING_SPACE = rb"(?:[ \t\f\v]|\xe3\x80\x80)*"
+# 标题字符之间允许的空白（不跨行，保证每次尝试的匹配长度受单行长度约束）
+_INNER_SPACE = rb"(?:[ \t]|\xe3\x80\x80)*"
+
+# 报告标题行：不太长、且以“年度报告”结尾的一行
+_REPORT_TITLE_LINE = re.compile(
+    rb"(?m)^[^\n]{0,180}" + "年度报告".encode("utf-8") + rb"[ \t\r]*$"
+)
+
+
+def _title_bytes_pattern(title: str) -> bytes:
+    body = _INNER_SPACE.join(re.escape(ch.encode("utf-8")) for ch in title.strip())
+    return _LINE_LEADING_SPACE + body
+
+
+_BOUNDARY_PATTERN = re.compile(
+    rb"(?m)^(?:(?P<s1>"
+    + _title_bytes_pattern(SECTION_TITLES[1])
+    + rb")|(?P<s6>"
+    + _title_bytes_pattern(SECTION_TITLES[6])
+    + rb"))"
+)
+
+
+def _report_start(buf, lower: int, section1_pos: int) -> int:
+    """在 [lower, section1_pos) 内回溯报告标题行，找不到则从“一、总体情况”开始。"""
+    lower = max(lower, section1_pos - _TITLE_LOOKBACK_BYTES)
+    match = _REPORT_TITLE_LINE.search(buf, lower, section1_pos)
+    return match.start() if match else section1_pos
+
+
+def iter_report_spans(buf) -> Iterator[Tuple[int, int]]:
+    """
+    在字节缓冲（bytes / mmap）中定位每篇年报的 [start, end) 字节区间。
+
+    只扫描一遍缓冲区；不会把整个缓冲解码成 str。
+    """
+    current_start: Optional[int] = None
+    seen_section6 = False
+    last_section6_end = 0
+
+    for match in _BOUNDARY_PATTERN.finditer(buf):
+        if match.lastgroup == "s6":
+            if current_start is not None:
+                seen_section6 = True
+                last_section6_end = match.end()
+            continue
+
+        if current_start is None:
+            # 第一篇之前的内容（标题、前言）一并归入第一篇
+            current_start = 0
+        elif seen_section6:
+            boundary = _report_start(buf, last_section6_end, match.start())
+            yield current_start, boundary
+            current_start = boundary
+            seen_section6 = False
+        # 否则：同一篇内重复出现的“一、总体情况”（如目录），不切分
+
+    if current_start is not None:
+        yield current_start, len(buf)
+
+
+def iter_report_texts(path: str, *, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    以 mmap 方式打开超大文本转储，逐篇产出年报纯文本。
+
+    用法：
+        for text in iter_report_texts("dump.txt"):
+            ...
+    """
+    with open(path, "rb") as fh:
+        try:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法 mmap
+            return
+        with mapped:
+            for start, end in iter_report_spans(mapped):
+                yield mapped[start:end].decode(encoding, errors="replace")
+
+
+def iter_annual_reports(
+    path: str, *, with_tables: bool = True, encoding: str = "utf-8"
+) -> Iterator[AnnualReport]:
+    """
+    逐篇解析超大文本转储，每次产出一个 AnnualReport。
+
+    如需多进程并行解析，可以直接把 iter_report_texts(path) 交给
+    govnianbao.batch.parse_annual_reports_batch。
+    """
+    for text in iter_report_texts(path, encoding=encoding):
+        yield parse_annual_report_text(text, with_tables=with_tables)
@@ -0,0 +1,176 @@
+"""
+表格区域定位：在抽取数字之前，先找出表格在一段正文里的起止位置。
+
+- 起点：表头列名（自然人、商业企业、行政复议……）成簇出现的第一处。
+  簇必须从一个“表头行”开始（这一行的汉字大半是列名），并在一个小窗口内
+  出现至少几个不同的列名，标题或正文里零星提到的“行政复议”不算；
+- 终点：最后一个行标签之后，继续向下吃掉只有数字的行，
+  遇到第一行成句的中文（“注：”、说明文字等）即停止。
+
+找不到表头时返回 None，调用方照旧使用整段文本。
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .deadline import Deadline, check_deadline
+from .row_labels import RowLabelAutomaton, RowRef, automaton_for
+from .template_tables import TEMPLATE_TABLES
+
+# 表头列名要在这么多字符内成簇出现
+_HEADER_WINDOW = 400
+# 至少出现这么多个不同的列名才算表头
+_MIN_HEADER_TOKENS = 3
+# 表头行：列名至少占这一行汉字的这个比例
+_HEADER_LINE_RATIO = 0.5
+# 一行里至少有这么多个汉字（且不含表头 / 行标签）就视为正文
+_PROSE_MIN_CJK = 4
+# 长循环里每处理这么多个命中 / 行检查一次时限
+_DEADLINE_CHECK_STEPS = 256
+
+# 列名里的分隔符和“小计 / 总计”后缀：“法人或其他组织小计” -> “法人或其他组织”
+_LABEL_SPLIT = re.compile(r"[/_\s（）()]+|小计|总计")
+_CJK = re.compile(r"[\u4e00-\u9fff]")
+
+
+def _header_tokens(table_key: str) -> List[str]:
+    tokens: List[str] = []
+    for col in TEMPLATE_TABLES[table_key]["columns"]:
+        for token in _LABEL_SPLIT.split(col.get("label") or ""):
+            # “其他”“总计”“小计”之类太常见，不作为表头标志
+            if len(token) >= 3 and token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+@lru_cache(maxsize=None)
+def _header_automaton(table_key: str) -> Tuple[RowLabelAutomaton, int]:
+    tokens = _header_tokens(table_key)
+    patterns: Dict[str, RowRef] = {token: ("header", token) for token in tokens}
+    return RowLabelAutomaton(patterns), min(_MIN_HEADER_TOKENS, len(tokens))
+
+
+def _line_bounds(text: str, pos: int) -> Tuple[int, int]:
+    start = text.rfind("\n", 0, pos) + 1
+    end = text.find("\n", pos)
+    return start, len(text) if end < 0 else end
+
+
+def _hit_lines(text: str, hits: List[Tuple[int, int, RowRef]]) -> List[Tuple[int, int]]:
+    """每个命中所在行的 (行首, 行尾)；hits 按位置有序，逐行向前推进，不重复扫描。"""
+    lines: List[Tuple[int, int]] = []
+    bounds = (0, -1)
+    for s, _, _ in hits:
+        if s > bounds[1]:
+            bounds = _line_bounds(text, s)
+        lines.append(bounds)
+    return lines
+
+
+def _header_cluster(
+    text: str,
+    hits: List[Tuple[int, int, RowRef]],
+    min_tokens: int,
+    deadline: Optional[Deadline] = None,
+) -> Optional[Tuple[int, int]]:
+    """
+    第一个表头簇，返回 (起点, 簇内最后一个列名的终点)：
+    从表头行上的列名开始，窗口内不同列名数 >= min_tokens。
+    """
+    lines = _hit_lines(text, hits)
+    # 每行被列名覆盖的汉字数，按行首位置汇总
+    covered: Dict[int, int] = {}
+    for (s, e, _), (line_start, _) in zip(hits, lines):
+        covered[line_start] = covered.get(line_start, 0) + len(_CJK.findall(text, s, e))
+    header_lines: Dict[int, bool] = {}
+
+    # 滑动窗口 hits[i:j]：起点为 hits[i]，只含 _HEADER_WINDOW 个字符内的命中
+    in_window: Dict[RowRef, int] = {}
+    j = 0
+    for i, (start, _, _) in enumerate(hits):
+        if i % _DEADLINE_CHECK_STEPS == 0:
+            check_deadline(deadline, "table_region:header")
+        if i > 0:
+            ref = hits[i - 1][2]
+            in_window[ref] -= 1
+            if not in_window[ref]:
+                del in_window[ref]
+        while j < len(hits) and hits[j][0] - start <= _HEADER_WINDOW:
+            in_window[hits[j][2]] = in_window.get(hits[j][2], 0) + 1
+            j += 1
+
+        line_start, line_end = lines[i]
+        if line_start not in header_lines:
+            total = len(_CJK.findall(text, line_start, line_end))
+            header_lines[line_start] = covered[line_start] >= total * _HEADER_LINE_RATIO
+        if header_lines[line_start] and len(in_window) >= min_tokens:
+            return start, hits[j - 1][1]
+    return None
+
+
+def _is_prose(line: str) -> bool:
+    return len(_CJK.findall(line)) >= _PROSE_MIN_CJK
+
+
+def find_table_region(
+    text: str, table_key: str, *, deadline: Optional[Deadline] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    表格在 text 中的区域 [start, end)。
+    start 取第一个表头列名的位置（表头本身不含数字，同一行前面的正文不会被带进来）；
+    找不到表头时返回 None。时限到了抛 DeadlineExceeded。
+    """
+    header, min_tokens = _header_automaton(table_key)
+    if min_tokens == 0:
+        return None
+    header_hits = header.find_all(text, deadline=deadline)
+    cluster = _header_cluster(text, header_hits, min_tokens, deadline)
+    if cluster is None:
+        return None
+    start, anchor = cluster
+
+    # 表头之后最后一个行标签（换页重复的表头同样算在表格内）
+    row_hits = automaton_for((table_key,), strip_numbering=True).find_all(
+        text[anchor:], deadline=deadline
+    )
+    if row_hits:
+        anchor += row_hits[-1][1]
+    # 锚点之后的列名位置（有序），随逐行扫描单调推进
+    labelled = [s for s, _, _ in header_hits if s >= anchor]
+    k = 0
+
+    # 行标签之后只剩数字的行仍属于表格
+    end = text.find("\n", anchor)
+    if end < 0:
+        return start, len(text)
+    lines = 0
+    while end < len(text):
+        lines += 1
+        if lines % _DEADLINE_CHECK_STEPS == 0:
+            check_deadline(deadline, "table_region:rows")
+        next_end = text.find("\n", end + 1)
+        if next_end < 0:
+            next_end = len(text)
+        while k < len(labelled) and labelled[k] <= end:
+            k += 1
+        has_header = k < len(labelled) and labelled[k] < next_end
+        if not has_header and _is_prose(text[end + 1 : next_end]):
+            break
+        end = next_end
+    return start, end
+
+
+def table_region_text(
+    text: str, table_key: str, *, deadline: Optional[Deadline] = None
+) -> Optional[str]:
+    """find_table_region 对应的文本片段。"""
+    region = find_table_region(text, table_key, deadline=deadline)
+    if region is None:
+        return None
+    return text[region[0] : region[1]]
+
+
+__all__ = ["find_table_region", "table_region_text"]
@@ -2,27 +2,45 @@ from __future__ import annotations
 
 import logging
 import re
-from typing import Dict, Any, List, Tuple
-
+from typing import Dict, Any, List, Optional, Tuple
+
+from .deadline import Deadline, DeadlineExceeded, check_deadline
+from .invariants import validate_table
+from .normalize import normalize_numbers
+from .row_labels import segments_by_label
+from .strategies import register_strategy, run_strategies
+from .table_region import table_region_text
+from .template_registry import (
+    TableLayout,
+    default_layout,
+    infer_layout_by_count,
+    layout_fingerprint,
+    layouts_for,
+    select_layout,
+)
 from .template_tables import TEMPLATE_TABLES
 
 _NUM_PATTERN = re.compile(r"[+-]?\d+(?:\.\d+)?")
 _PAGE_NUMBER_PATTERN = re.compile(r"^\s*-\s*\d+\s*-\s*$")
 _LEADING_INDEX_PATTERN = re.compile(r"^[ \t]*\d+[\.、]")
 _TABLE3_NUMBER_PATTERN = re.compile(r"\d+")
+# 长循环里每处理这么多行检查一次时限
+_DEADLINE_CHECK_LINES = 256
+# 按去掉编号的行标签切段时，段尾会带上下一行的编号（如“2.”），取数前去掉
+_TRAILING_INDEX_PATTERN = re.compile(r"(?:\d+[\.、．]|[（(][一二三四五六七八九十]+[）)]|[一二三四五六七八九十]+、)\s*$")
 
 logger = logging.getLogger(__name__)
 
 def _extract_numbers(raw_text: str) -> List[str]:
     """
     从原始文本中按出现顺序抽取所有数字（整数 / 小数）。
-    会先去掉千分位逗号。
+    会先统一全角数字 / 标点，并去掉千分位逗号（只去掉“数字,三位数字”中间的逗号）。
     """
-    cleaned = raw_text.replace(",", "")
-    return _NUM_PATTERN.findall(cleaned)
+    return _NUM_PATTERN.findall(normalize_numbers(raw_text))
 
 
-def _data_rows(table_def: Dict[str, Any]) -> List[Dict[str, Any]]:
+def data_rows(table_def: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """模板表格中承载数据的行（去掉标题行），按模板顺序。"""
     rows: List[Dict[str, Any]] = []
     for row in table_def["rows"]:
         # 默认 data=True，只在标题行手动标 False
@@ -31,7 +49,8 @@ def _data_rows(table_def: Dict[str, Any]) -> List[Dict[str, Any]]:
     return rows
 
 
-def _value_columns(table_def: Dict[str, Any]) -> List[Dict[str, Any]]:
+def value_columns(table_def: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """模板表格中的数值列（去掉标签列），按模板顺序。"""
     cols: List[Dict[str, Any]] = []
     for col in table_def["columns"]:
         if col.get("type") != "label":
@@ -39,7 +58,8 @@ def _value_columns(table_def: Dict[str, Any]) -> List[Dict[str, Any]]:
     return cols
 
 
-def _convert_token(token: str, col_type: str) -> float:
+def convert_token(token: str, col_type: str) -> float:
+    """把抽出的数字串按列类型转成 int / float。"""
     if col_type == "float":
         return float(token)
     # 先转 float 再转 int，兼容“0.0”这类
@@ -57,8 +77,8 @@ def _fill_one_table(
       - remaining_numbers: 剩余未使用的数字列表
     """
     table_def = TEMPLATE_TABLES[table_key]
-    rows = _data_rows(table_def)
-    cols = _value_columns(table_def)
+    rows = data_rows(table_def)
+    cols = value_columns(table_def)
 
     needed = len(rows) * len(cols)
     if len(numbers) < needed:
@@ -81,7 +101,7 @@ def _fill_one_table(
             idx += 1
 
             col_type = col.get("type", "int")
-            cells[rk][ck] = _convert_token(token, col_type)
+            cells[rk][ck] = convert_token(token, col_type)
 
     return cells, remaining
 
@@ -96,8 +116,8 @@ def _fill_section3_lenient(
     返回 (cells, used_count, warning)。
     """
 
-    rows = _data_rows(table_def)
-    cols = _value_columns(table_def)
+    rows = data_rows(table_def)
+    cols = value_columns(table_def)
     needed = len(rows) * len(cols)
 
     cells: Dict[str, Dict[str, float]] = {}
@@ -110,7 +130,7 @@ def _fill_section3_lenient(
         for col in cols:
             if idx < len(numbers):
                 token = numbers[idx]
-                cells[rk][col["key"]] = _convert_token(token, col.get("type", "int"))
+                cells[rk][col["key"]] = convert_token(token, col.get("type", "int"))
                 idx += 1
             else:
                 cells[rk][col["key"]] = None
@@ -118,7 +138,58 @@ def _fill_section3_lenient(
     return cells, min(idx, needed), warning
 
 
-def parse_section2_tables(raw_text: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+def _pick_candidate(candidates: List[List[str]], count: int) -> List[str]:
+    """同一标签出现多次（如正文里也提到“行政许可”）：取数字个数最接近的一处，并列时取靠后的。"""
+    return min(reversed(candidates), key=lambda nums: abs(len(nums) - count))
+
+
+def _fill_by_labels(
+    text: str, table_keys: List[str], *, deadline: Optional[Deadline] = None
+) -> Tuple[Dict[str, Dict[str, Any]], bool, bool]:
+    """
+    按行标签定位数字，逐行填表。
+    返回 (result, complete, found_any)：
+      - result: {table_key: {"cells": ..., ["parse_warnings": ...]}}，缺的单元格为 None；
+      - complete: 每一行都找到了标签，且标签后恰好是该行所需个数的数字；
+      - found_any: 至少找到一个行标签。
+    """
+    segments = segments_by_label(text, table_keys, deadline=deadline)
+    result: Dict[str, Dict[str, Any]] = {}
+    complete = True
+
+    for table_key in table_keys:
+        check_deadline(deadline, f"labels:{table_key}")
+        table_def = TEMPLATE_TABLES[table_key]
+        cols = value_columns(table_def)
+        cells: Dict[str, Dict[str, Any]] = {}
+        warnings: List[str] = []
+        for row in data_rows(table_def):
+            candidates = [_extract_numbers(seg) for seg in segments.get((table_key, row["key"]), [])]
+            if not candidates:
+                complete = False
+                warnings.append(f"row label not found: {row['label']}")
+                tokens: List[str] = []
+            else:
+                tokens = _pick_candidate(candidates, len(cols))
+                if len(tokens) != len(cols):
+                    complete = False
+                    warnings.append(
+                        f"row {row['label']}: expected {len(cols)} numbers, found {len(tokens)}"
+                    )
+            cells[row["key"]] = {
+                col["key"]: convert_token(tokens[i], col.get("type", "int")) if i < len(tokens) else None
+                for i, col in enumerate(cols)
+            }
+        result[table_key] = {"cells": cells}
+        if warnings:
+            result[table_key]["parse_warnings"] = warnings
+
+    return result, complete, bool(segments)
+
+
+def parse_section2_tables(
+    raw_text: str, *, deadline: Optional[Deadline] = None
+) -> Dict[str, Dict[str, Dict[str, float]]]:
     """
     解析第二部分的三个（严格说是四个）表格：
     - 第二十条第（一）项
@@ -126,86 +197,195 @@ def parse_section2_tables(raw_text: str) -> Dict[str, Dict[str, Dict[str, float]
     - 第二十条第（六）项
     - 第二十条第（八）项
 
-    假设：PDF/网页转换后的文本中，所有相关数字都是
-    按 Word 表格“从上到下、从左到右”的顺序出现的。
+    优先按行标签（规章、行政许可……）定位每行的数字；
+    标签不全时退回按顺序填充，即假设 PDF/网页转换后的文本中，所有相关数字都是
+    按 Word 表格“从上到下、从左到右”的顺序出现的；
+    顺序填充数字不够时，再用按标签找到的部分行（缺的单元格为 None）。
     增强预清洗：移除跨页的页码标记（如 "- 4 -"）
     """
     # 【增强预清洗】移除页码标记（跨页时会出现 "- 4 -" 这样的标记）
     cleaned_lines = []
-    for line in raw_text.splitlines():
+    for i, line in enumerate(raw_text.splitlines()):
+        if i % _DEADLINE_CHECK_LINES == 0:
+            check_deadline(deadline, "section2")
         # 跳过整行页码
         if _PAGE_NUMBER_PATTERN.match(line):
             continue
         cleaned_lines.append(line)
     
     cleaned_text = "\n".join(cleaned_lines)
+    order = ["section2_art20_1", "section2_art20_5", "section2_art20_6", "section2_art20_8"]
+
+    anchored, complete, found_any = _fill_by_labels(cleaned_text, order, deadline=deadline)
+    if complete:
+        return anchored
+
+    check_deadline(deadline, "section2")
     nums = _extract_numbers(cleaned_text)
     result: Dict[str, Dict[str, Dict[str, float]]] = {}
-
-    order = ["section2_art20_1", "section2_art20_5", "section2_art20_6", "section2_art20_8"]
     remaining = nums
-    for key in order:
-        cells, remaining = _fill_one_table(remaining, key)
-        result[key] = {"cells": cells}
+    try:
+        for key in order:
+            cells, remaining = _fill_one_table(remaining, key)
+            result[key] = {"cells": cells}
+    except ValueError:
+        if not found_any:
+            raise
+        logger.info("parse_section2_tables: not enough numbers, using label-anchored rows")
+        return anchored
 
     return result
 
 
-def parse_section3_applications(raw_text: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+def _fill_layout(
+    numbers: List[int], layout: TableLayout, row_count: int
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """按版式的行列顺序填入前 row_count 行，数字不够的单元格为 None。"""
+    cells: Dict[str, Dict[str, Optional[float]]] = {}
+    idx = 0
+    for row_key in layout.row_keys[:row_count]:
+        row: Dict[str, Optional[float]] = {}
+        for col_key in layout.col_keys:
+            row[col_key] = float(numbers[idx]) if idx < len(numbers) else None
+            idx += 1
+        cells[row_key] = row
+    return cells
+
+
+def _section3_by_template(raw_text: str, deadline: Optional[Deadline]) -> Dict[str, Dict[str, Any]]:
+    return parse_template_table3(raw_text, deadline=deadline)["cells"]
+
+
+def _section3_by_labels(raw_text: str, deadline: Optional[Deadline]) -> Dict[str, Dict[str, Optional[float]]]:
+    """按行标签（可不带“1.”“（三）”编号）逐行取数，列按表头指纹选出的版式。"""
+    key = "section3_applications"
+    layout = select_layout(key, raw_text) or default_layout(key)
+    segments = segments_by_label(raw_text, [key], strip_numbering=True, deadline=deadline)
+    if not segments:
+        raise ValueError("no row labels found")
+
+    cols = len(layout.col_keys)
+    cells: Dict[str, Dict[str, Optional[float]]] = {}
+    for row_key in layout.row_keys:
+        candidates = [
+            _extract_numbers(_TRAILING_INDEX_PATTERN.sub("", seg))
+            for seg in segments.get((key, row_key), [])
+        ]
+        tokens = _pick_candidate(candidates, cols) if candidates else []
+        cells[row_key] = {
+            col_key: float(tokens[i]) if i < len(tokens) else None
+            for i, col_key in enumerate(layout.col_keys)
+        }
+    return cells
+
+
+def _section3_by_layouts(raw_text: str, deadline: Optional[Deadline]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    逐个已登记版式试填：数字多于版式单元格数时，分别试“取前 N 个”（末尾有多余数字）
+    和“取后 N 个”（开头混入了年份等），返回第一个满足勾稽关系的结果。
+    """
+    key = "section3_applications"
+    region = table_region_text(raw_text, key, deadline=deadline)
+    numbers = _table3_numbers(region if region is not None else raw_text, deadline)
+    for layout in layouts_for(key):
+        n = layout.expected_count
+        if len(numbers) < n:
+            continue
+        windows = [numbers[:n]] if len(numbers) == n else [numbers[:n], numbers[-n:]]
+        for window in windows:
+            cells = _fill_layout(window, layout, len(layout.row_keys))
+            if validate_table(key, cells).ok:
+                return cells
+    raise ValueError(f"no registered layout satisfies the sum checks ({len(numbers)} numbers)")
+
+
+def _section3_lenient(raw_text: str, deadline: Optional[Deadline]) -> Dict[str, Dict[str, Any]]:
+    return _fill_section3_lenient(_extract_numbers(raw_text), TEMPLATE_TABLES["section3_applications"])[0]
+
+
+def _format_source(table_key: str, raw_text: str) -> str:
+    """默认的文档来源：表头指纹（出现了哪些版式标志词），同一格式的文档共享策略统计。"""
+    return table_key + ":" + ",".join(sorted(layout_fingerprint(table_key, raw_text)))
+
+
+def parse_section3_applications(
+    raw_text: str, *, deadline: Optional[Deadline] = None, source: Optional[str] = None
+) -> Dict[str, Dict[str, Dict[str, float]]]:
     """
     解析第三部分"收到和处理政府信息公开申请情况"整张表。
 
-    优先使用标准模板解析（parse_template_table3），
-    若模板匹配失败再退回通用的 lenient 解析。
+    登记的抽取策略（见 strategies）：
+    - template：标准模板解析（parse_template_table3，按表头指纹 / 数字个数选版式）；
+    - labels：按行标签逐行取数；
+    - layouts：逐个登记版式试填，容忍表格前后混入的数字；
+    - lenient：按模板顺序宽松填充。
+    按各策略在同类文档（source，默认取表头指纹）上的成功率和耗时排序，
+    用模板的求和勾稽关系校验，第一个通过的胜出；结果里的 parse_tier 记录由哪个策略得出。
     """
     key = "section3_applications"
-    table_def = TEMPLATE_TABLES[key]
-    
-    cells: Dict[str, Dict[str, float]] = {}
-    warnings: List[str] = []
+    if source is None:
+        source = _format_source(key, raw_text)
+    return {key: run_strategies(key, raw_text, source=source, deadline=deadline)}
+
+
+def _section4_by_labels(raw_text: str, deadline: Optional[Deadline]) -> Dict[str, Dict[str, Any]]:
+    key = "section4_review_litigation"
+    anchored, _, found_any = _fill_by_labels(raw_text, [key], deadline=deadline)
+    if not found_any:
+        raise ValueError("row label not found")
+    return anchored[key]["cells"]
 
-    # 1. 优先尝试标准模板解析
-    try:
-        tmpl_result = parse_template_table3(raw_text)
-        cells_from_tmpl = tmpl_result.get("cells") if isinstance(tmpl_result, dict) else None
-        
-        if cells_from_tmpl and isinstance(cells_from_tmpl, dict) and len(cells_from_tmpl) > 0:
-            cells = cells_from_tmpl
-            logger.info(f"parse_section3_applications: successfully parsed {len(cells)} rows using template")
-        else:
-            warnings.append("parse_template_table3 returned empty or invalid cells")
-    except Exception as e:
-        logger.warning(f"parse_template_table3 failed: {e!r}")
-        warnings.append(f"parse_template_table3 failed: {e!r}")
-
-    # 2. 模板解析失败时，再用 lenient 兜底
-    if not cells:
-        logger.info("Falling back to lenient parsing for section3")
-        nums = _extract_numbers(raw_text)
-        cells2, used, warning = _fill_section3_lenient(nums, table_def)
-        cells = cells2 or {}
-        if warning:
-            warnings.append(f"lenient parsing found {len(nums)} numbers, used {used}")
-
-    result: Dict[str, Dict[str, Any]] = {key: {"cells": cells}}
-    if warnings:
-        result[key]["parse_warnings"] = warnings
-    
-    return result
 
+def _section4_by_order(text: Optional[str], deadline: Optional[Deadline]) -> Dict[str, Dict[str, Any]]:
+    if text is None:
+        raise ValueError("table region not found")
+    check_deadline(deadline, "section4:numbers")
+    cells, _ = _fill_one_table(_extract_numbers(text), "section4_review_litigation")
+    return cells
 
 
-def parse_section4_review_litigation(raw_text: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+def parse_section4_review_litigation(
+    raw_text: str, *, deadline: Optional[Deadline] = None, source: Optional[str] = None
+) -> Dict[str, Dict[str, Dict[str, float]]]:
     """
     解析第四部分“行政复议、行政诉讼情况”整张表。
+    登记的策略：按行标签（案件数量）取数、在表格区域内按顺序填充（避免正文中的年份、
+    “共收到申请 3 件”等混进来）、用整段文本按顺序填充；
+    结果用“总计 = 各结果之和”校验，parse_tier 记录由哪个策略得出。
     """
-    nums = _extract_numbers(raw_text)
     key = "section4_review_litigation"
-    cells, remaining = _fill_one_table(nums, key)
-    return {key: {"cells": cells}}
+    if source is None:
+        source = _format_source(key, raw_text)
+    return {key: run_strategies(key, raw_text, source=source, deadline=deadline)}
 
 
-def parse_template_table3(raw_text: str) -> Dict[str, Any]:
+def _table3_numbers(raw_text: str, deadline: Optional[Deadline] = None) -> List[int]:
+    """第三部分表格的预清洗 + 取数：去掉页码（如 -5-）和行序号（如 1.、2、）后按顺序取整数。"""
+    cleaned_lines = []
+    for i, line in enumerate(normalize_numbers(raw_text).splitlines()):
+        if i % _DEADLINE_CHECK_LINES == 0:
+            check_deadline(deadline, "section3:tokenize")
+        # 整行页码过滤
+        if _PAGE_NUMBER_PATTERN.match(line):
+            continue
+
+        # 移除行内的页码片段（如 -5-）
+        line = re.sub(r"-\s*\d+\s*-", " ", line)
+
+        # 移除行内的小条序号（1.、2、3.等）
+        line = re.sub(r"(?<!\d)([1-9])[\.、]", " ", line)
+
+        # 移除行首的编号前缀
+        line = _LEADING_INDEX_PATTERN.sub("", line)
+
+        cleaned_lines.append(line)
+
+    return [int(num) for num in _TABLE3_NUMBER_PATTERN.findall("\n".join(cleaned_lines))]
+
+
+def parse_template_table3(
+    raw_text: str, *, deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
     """
     解析标准模板的第三张表格（支持多种格式）。
 
@@ -226,115 +406,40 @@ def parse_template_table3(raw_text: str) -> Dict[str, Any]:
     - 只提取 data=True 的行，即第 1 级和第 3 级的行
     """
 
-    # 【增强预清洗】移除行内页码（如 -5-）和行序号（如 1.、2、）
-    cleaned_lines = []
-    for line in raw_text.splitlines():
-        # 整行页码过滤
-        if _PAGE_NUMBER_PATTERN.match(line):
-            continue
-        
-        # 移除行内的页码片段（如 -5-）
-        line = re.sub(r"-\s*\d+\s*-", " ", line)
-        
-        # 移除行内的小条序号（1.、2、3.等）
-        line = re.sub(r"(?<!\d)([1-9])[\.、]", " ", line)
-        
-        # 移除行首的编号前缀
-        line = _LEADING_INDEX_PATTERN.sub("", line)
-        
-        cleaned_lines.append(line)
+    # 【选版式】先看表头指纹（是否有“小计”列等），再按数字个数兜底推断
+    table_key = "section3_applications"
+    preferred = select_layout(table_key, raw_text)
+
+    # 【定位表格区域】只在表头到最后一行数据之间取数字；
+    # 区域内的数字个数对不上任何版式时，再退回整段文本
+    inferred = None
+    region = table_region_text(raw_text, table_key, deadline=deadline)
+    if region is not None:
+        int_numbers = _table3_numbers(region, deadline)
+        num_count = len(int_numbers)
+        inferred = infer_layout_by_count(table_key, num_count, preferred=preferred)
+    if inferred is None:
+        int_numbers = _table3_numbers(raw_text, deadline)
+        num_count = len(int_numbers)
+        inferred = infer_layout_by_count(table_key, num_count, preferred=preferred)
+    if inferred is None:
+        expected = " or ".join(str(l.expected_count) for l in layouts_for(table_key))
+        logger.warning(
+            f"parse_template_table3: unexpected number count {num_count}, expected {expected}"
+        )
+        raise ValueError(f"parse_template_table3: got {num_count} numbers, expected {expected}")
 
-    cleaned_text = "\n".join(cleaned_lines)
-    numbers = _TABLE3_NUMBER_PATTERN.findall(cleaned_text)
-    int_numbers = [int(num) for num in numbers]
-    num_count = len(int_numbers)
-
-    # 获取模板定义的所有 data=True 的行（即应该填数值的行）
-    table_def = TEMPLATE_TABLES["section3_applications"]
-    all_data_rows = _data_rows(table_def)
-    row_keys = [row["key"] for row in all_data_rows]
-    
-    # 定义两种可能的列配置
-    col_keys_7 = [
-        "natural_person",
-        "business_corp",
-        "research_org",
-        "social_org",
-        "legal_service_org",
-        "other_org",
-        "grand_total",
-    ]
-    col_keys_8 = [
-        "natural_person",
-        "business_corp",
-        "research_org",
-        "social_org",
-        "legal_service_org",
-        "other_org",
-        "org_total",
-        "grand_total",
-    ]
-    
-    # 计算期望值
-    expected_count_7 = len(row_keys) * len(col_keys_7)  # 25*7=175
-    expected_count_8 = len(row_keys) * len(col_keys_8)  # 25*8=200
-    
-    # 【智能匹配逻辑】
-    col_keys = None
-    
-    if num_count == expected_count_7:
-        # 25 行 × 7 列数字
-        col_keys = col_keys_7
-        logger.info(f"parse_template_table3: matched 7-column format with 25 data rows (175 numbers)")
-    
-    elif num_count == expected_count_8:
-        # 25 行 × 8 列数字
-        col_keys = col_keys_8
-        logger.info(f"parse_template_table3: matched 8-column format with 25 data rows (200 numbers)")
-    
-    else:
-        # 【推断逻辑】尝试按 7 或 8 列整除
-        if num_count % 7 == 0:
-            col_keys = col_keys_7
-            inferred_rows = num_count // 7
-            logger.info(
-                f"parse_template_table3: inferred 7-column format with {inferred_rows} rows "
-                f"(found {num_count} numbers)"
-            )
-            # 只取前 inferred_rows 行
-            row_keys = row_keys[:inferred_rows]
-        elif num_count % 8 == 0:
-            col_keys = col_keys_8
-            inferred_rows = num_count // 8
-            logger.info(
-                f"parse_template_table3: inferred 8-column format with {inferred_rows} rows "
-                f"(found {num_count} numbers)"
-            )
-            # 只取前 inferred_rows 行
-            row_keys = row_keys[:inferred_rows]
-        else:
-            logger.warning(
-                f"parse_template_table3: unexpected number count {num_count}, "
-                f"expected {expected_count_7} (25x7) or {expected_count_8} (25x8)"
-            )
-            raise ValueError(
-                f"parse_template_table3: got {num_count} numbers, "
-                f"expected {expected_count_7} or {expected_count_8}"
-            )
+    layout, row_count = inferred
+    row_keys = list(layout.row_keys[:row_count])
+    col_keys = list(layout.col_keys)
+    logger.info(
+        f"parse_template_table3: using layout {layout.name} ({layout.version}) with "
+        f"{row_count} rows x {len(col_keys)} cols (found {num_count} numbers, "
+        f"header fingerprint {'matched' if preferred is layout else 'not used'})"
+    )
 
     # 【填充 cells】
-    cells: Dict[str, Dict[str, float]] = {rk: {} for rk in row_keys}
-    idx = 0
-    
-    # 按行按列填充数字
-    for row_key in row_keys:
-        for col_key in col_keys:
-            if idx < len(int_numbers):
-                value = int_numbers[idx]
-                cells[row_key][col_key] = float(value)
-                idx += 1
-            else:
-                cells[row_key][col_key] = None
+    cells = _fill_layout(int_numbers, layout, row_count)
 
     logger.info(
         f"parse_template_table3: filled {len(row_keys)} rows × {len(col_keys)} cols, "
@@ -349,3 +454,28 @@ def parse_template_table3(raw_text: str) -> Dict[str, Any]:
             for row_key in row_keys
         ]
     }
+
+
+def _register_builtin_strategies() -> None:
+    # cost 为预估耗时（毫秒）；lenient 几乎总能“填出”结果但很少正确，放在最后
+    register_strategy("section3_applications", "template", _section3_by_template, cost=1.0)
+    register_strategy("section3_applications", "labels", _section3_by_labels, cost=2.0)
+    register_strategy("section3_applications", "layouts", _section3_by_layouts, cost=4.0)
+    register_strategy("section3_applications", "lenient", _section3_lenient, cost=8.0)
+
+    key = "section4_review_litigation"
+    register_strategy(key, "labels", _section4_by_labels, cost=0.5)
+    register_strategy(
+        key,
+        "region",
+        lambda text, deadline: _section4_by_order(
+            table_region_text(text, key, deadline=deadline), deadline
+        ),
+        cost=1.0,
+    )
+    register_strategy(
+        key, "full_text", lambda text, deadline: _section4_by_order(text, deadline), cost=1.5
+    )
+
+
+_register_builtin_strategies()
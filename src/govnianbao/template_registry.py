@@ -0,0 +1,200 @@
+"""
+表格版式注册表。
+
+同一张模板表格在不同年度 / 不同地区可能有不同版式（例如第三部分表格
+有不带“法人或其他组织小计”列的 7 列版本）。每种版式登记一次、预先编译好
+行列顺序，解析时先从表头文字取一个很便宜的“指纹”（出现了哪些标志词），
+直接选中对应版式，再按数字个数兜底推断，不需要逐个版式试填。
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .template_tables import TEMPLATE_TABLES
+
+# 表头指纹只看表格开头这么多字符（或第一行数据标签之前的部分）
+_HEADER_SCAN_CHARS = 800
+
+
+@dataclass(frozen=True)
+class TableLayout:
+    table_key: str
+    # 版式名称与适用的模板版本（如 "2021"）
+    name: str
+    version: str
+    row_keys: Tuple[str, ...]
+    col_keys: Tuple[str, ...]
+    # 表头中必须出现 / 不能出现的标志词
+    markers: Tuple[str, ...] = ()
+    excludes: Tuple[str, ...] = ()
+    # 第一行数据的标签，用来截取表头区域
+    first_row_label: Optional[str] = field(default=None, compare=False)
+
+    @property
+    def expected_count(self) -> int:
+        return len(self.row_keys) * len(self.col_keys)
+
+    def matches(self, fingerprint: FrozenSet[str]) -> bool:
+        if not self.markers:
+            return False
+        return all(m in fingerprint for m in self.markers) and not any(
+            m in fingerprint for m in self.excludes
+        )
+
+
+_LAYOUTS: Dict[str, List[TableLayout]] = {}
+# 每张表所有版式用到的标志词，算指纹时只查这些
+_VOCABULARY: Dict[str, FrozenSet[str]] = {}
+_LOCK = threading.Lock()
+
+
+def register_layout(layout: TableLayout) -> TableLayout:
+    """登记一种版式；同名版式会被替换。"""
+    with _LOCK:
+        layouts = [l for l in _LAYOUTS.get(layout.table_key, []) if l.name != layout.name]
+        layouts.append(layout)
+        _LAYOUTS[layout.table_key] = layouts
+        _VOCABULARY[layout.table_key] = frozenset(
+            token for l in layouts for token in (*l.markers, *l.excludes)
+        )
+    return layout
+
+
+def unregister_layout(table_key: str, name: str) -> None:
+    with _LOCK:
+        layouts = [l for l in _LAYOUTS.get(table_key, []) if l.name != name]
+        _LAYOUTS[table_key] = layouts
+        _VOCABULARY[table_key] = frozenset(
+            token for l in layouts for token in (*l.markers, *l.excludes)
+        )
+
+
+def layouts_for(table_key: str, version: Optional[str] = None) -> List[TableLayout]:
+    """某张表已登记的版式（按登记顺序），可按模板版本过滤。"""
+    layouts = _LAYOUTS.get(table_key, [])
+    if version is not None:
+        layouts = [l for l in layouts if l.version == version]
+    return list(layouts)
+
+
+def default_layout(table_key: str) -> TableLayout:
+    """模板自带的标准版式（第一个登记的版式）。"""
+    return _LAYOUTS[table_key][0]
+
+
+def _header_region(table_key: str, raw_text: str) -> str:
+    head = raw_text[:_HEADER_SCAN_CHARS]
+    for layout in _LAYOUTS.get(table_key, []):
+        if layout.first_row_label:
+            pos = head.find(layout.first_row_label)
+            if pos >= 0:
+                return head[:pos]
+    return head
+
+
+def layout_fingerprint(table_key: str, raw_text: str) -> FrozenSet[str]:
+    """表头中出现了哪些标志词。只扫描表头区域，代价与文本总长无关。"""
+    vocabulary = _VOCABULARY.get(table_key)
+    if not vocabulary:
+        return frozenset()
+    head = "".join(_header_region(table_key, raw_text).split())
+    return frozenset(token for token in vocabulary if token in head)
+
+
+def select_layout(
+    table_key: str, raw_text: str, *, version: Optional[str] = None
+) -> Optional[TableLayout]:
+    """按表头指纹选版式；表头里没有可区分的标志词时返回 None，由调用方按数字个数推断。"""
+    fingerprint = layout_fingerprint(table_key, raw_text)
+    if not fingerprint:
+        return None
+    candidates = [l for l in layouts_for(table_key, version) if l.matches(fingerprint)]
+    if not candidates:
+        return None
+    # 标志词越多越具体
+    return max(candidates, key=lambda l: len(l.markers) + len(l.excludes))
+
+
+def infer_layout_by_count(
+    table_key: str,
+    count: int,
+    *,
+    preferred: Optional[TableLayout] = None,
+    version: Optional[str] = None,
+) -> Optional[Tuple[TableLayout, int]]:
+    """
+    按数字个数推断版式，返回 (版式, 行数)：
+    1. 数字个数恰好等于某个版式的单元格数；
+    2. 否则能被某个版式的列数整除时，按该列数只填前若干行（最多填满该版式）。
+    preferred（通常是表头指纹选出的版式）在每一步都优先。
+    """
+    candidates = sorted(layouts_for(table_key, version), key=lambda l: len(l.col_keys))
+    if preferred is not None:
+        candidates = [preferred] + [l for l in candidates if l is not preferred]
+
+    for layout in candidates:
+        if count == layout.expected_count:
+            return layout, len(layout.row_keys)
+    for layout in candidates:
+        cols = len(layout.col_keys)
+        if count % cols == 0:
+            return layout, min(count // cols, len(layout.row_keys))
+    return None
+
+
+def _template_layout(table_key: str, version: str = "2021", **overrides) -> TableLayout:
+    table_def = TEMPLATE_TABLES[table_key]
+    rows = [row for row in table_def["rows"] if row.get("data", True)]
+    cols = [col for col in table_def["columns"] if col.get("type") != "label"]
+    params = dict(
+        table_key=table_key,
+        name="template",
+        version=version,
+        row_keys=tuple(row["key"] for row in rows),
+        col_keys=tuple(col["key"] for col in cols),
+        first_row_label=rows[0].get("label") if rows else None,
+    )
+    params.update(overrides)
+    return TableLayout(**params)
+
+
+def _register_builtin_layouts() -> None:
+    for table_key in TEMPLATE_TABLES:
+        if table_key != "section3_applications":
+            register_layout(_template_layout(table_key))
+
+    # 第三部分：标准 8 列（含“法人或其他组织小计”）与不带小计列的 7 列版式
+    full = _template_layout(
+        "section3_applications",
+        name="8col",
+        markers=("小计",),
+        first_row_label="本年新收",
+    )
+    register_layout(full)
+    register_layout(
+        _template_layout(
+            "section3_applications",
+            name="7col",
+            col_keys=tuple(key for key in full.col_keys if key != "org_total"),
+            markers=("法人或其他组织",),
+            excludes=("小计",),
+            first_row_label="本年新收",
+        )
+    )
+
+
+_register_builtin_layouts()
+
+__all__ = [
+    "TableLayout",
+    "default_layout",
+    "infer_layout_by_count",
+    "layout_fingerprint",
+    "layouts_for",
+    "register_layout",
+    "select_layout",
+    "unregister_layout",
+]
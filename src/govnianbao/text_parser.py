@@ -3,25 +3,59 @@ from __future__ import annotations
 from typing import Dict, Optional
 import re
 
+from .deadline import Deadline, check_deadline
+from .normalize import normalize_text
 from .template_tables import SECTION_TITLES
 
 
-def _normalize_text(raw_text: str) -> str:
-    """规范化换行和空格，便于标题匹配。"""
-    normalized = raw_text.replace("\r\n", "\n").replace("\r", "\n")
-    normalized = normalized.replace("\u3000", " ")
-    return normalized
+def _normalize_text(raw_text: str, deadline: Optional[Deadline] = None) -> str:
+    """规范化换行、各种空格、零宽字符和全角数字，便于标题匹配。"""
+    return normalize_text(raw_text, deadline=deadline)
 
 
-def _build_relaxed_pattern(title: str) -> re.Pattern[str]:
-    """生成允许标题字符间有空白的正则模式。"""
-    escaped_chars = [re.escape(ch) for ch in title.strip()]
-    pattern_body = r"\s*".join(escaped_chars)
-    anchored_pattern = rf"(?:^|\n)\s*{pattern_body}"
-    return re.compile(anchored_pattern, re.MULTILINE)
+def _build_title_body(title: str) -> re.Pattern[str]:
+    """标题正文的正则：字符之间允许空白，不含行首锚点。"""
+    return re.compile(r"\s*".join(re.escape(ch) for ch in "".join(title.split())))
 
 
-def split_sections(raw_text: str) -> Dict[int, str]:
+def _find_title(
+    text: str, title: str, *, deadline: Optional[Deadline] = None
+) -> Optional[int]:
+    """
+    标题（字符间可有任意空白）第一次出现在行首时的位置，找不到返回 None。
+    返回值与原来的 (?:^|\\n)\\s*标题 正则的 match.start() 一致：
+    标题前的空白里有换行时取其中第一个换行，标题前只有空白（文本开头）时取 0。
+
+    原正则以 \\s* 开头，search 在每个起点都要把后面的空白吃完再回退，
+    数 MB 空白或大量“二、主动”半截标题即可让它退化为平方级。
+    这里只搜标题正文（每个 \\s* 后面都紧跟一个非空白字符，不会回溯），
+    行首条件用 C 实现的 rfind / isspace 检查；某个候选前面同一行还有正文时，
+    同一行后面的候选也不可能在行首，直接跳到下一行，整体是线性的。
+    """
+    body = _build_title_body(title)
+    if not body.pattern:
+        return None
+    pos = 0
+    while True:
+        check_deadline(deadline, "split_sections")
+        match = body.search(text, pos)
+        if match is None:
+            return None
+        start = match.start()
+        line_start = text.rfind("\n", 0, start) + 1
+        if line_start == start or text[line_start:start].isspace():
+            # 标题前空白区段的起点，取其中第一个换行
+            ws_start = len(text[:line_start].rstrip())
+            if ws_start == 0:
+                return 0
+            return text.find("\n", ws_start, start)
+        next_line = text.find("\n", start)
+        if next_line < 0:
+            return None
+        pos = next_line
+
+
+def split_sections(raw_text: str, *, deadline: Optional[Deadline] = None) -> Dict[int, str]:
     """
     根据固定标题，将整篇年度报告纯文本切成 6 段。
 
@@ -36,16 +70,14 @@ def split_sections(raw_text: str) -> Dict[int, str]:
     - 标题可能前后有空格、换行或全角空格，需要做 strip + 宽松匹配
     - 若某个标题在文本中找不到，split_sections 仍然返回 6 个 key，
       且缺失部分的内容置为空字符串。
+    - 给了 deadline 时，规范化的每一趟替换和每个标题查找前后都会检查，超时抛出 DeadlineExceeded。
     """
 
-    normalized_text = _normalize_text(raw_text)
+    normalized_text = _normalize_text(raw_text, deadline)
 
     positions: Dict[int, Optional[int]] = {}
     for idx in range(1, 7):
-        title = SECTION_TITLES[idx]
-        pattern = _build_relaxed_pattern(title)
-        match = pattern.search(normalized_text)
-        positions[idx] = match.start() if match else None
+        positions[idx] = _find_title(normalized_text, SECTION_TITLES[idx], deadline=deadline)
 
     sections: Dict[int, str] = {}
     prev_end = 0
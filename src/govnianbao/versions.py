@@ -0,0 +1,38 @@
+"""
+解析结果的版本戳。
+
+- PARSER_VERSION：切分 / 取数 / 表格解析逻辑的版本，改动会影响已存结果时手动加一；
+- TEMPLATE_VERSION：TEMPLATE_TABLES 内容的摘要，模板一改自动变化。
+
+每次解析都把两者写进 AnnualReport.versions，后台重解析据此跳过已是最新的结果。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Mapping, Optional
+
+from .template_tables import TEMPLATE_TABLES
+
+PARSER_VERSION = "7"
+
+
+def _template_digest() -> str:
+    payload = json.dumps(TEMPLATE_TABLES, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+TEMPLATE_VERSION = _template_digest()
+
+
+def current_versions() -> Dict[str, str]:
+    return {"parser": PARSER_VERSION, "template": TEMPLATE_VERSION}
+
+
+def is_current(versions: Optional[Mapping[str, Any]]) -> bool:
+    """versions（AnnualReport.versions 或 annual_struct["versions"]）是否与当前解析器一致。"""
+    return bool(versions) and dict(versions) == current_versions()
+
+
+__all__ = ["PARSER_VERSION", "TEMPLATE_VERSION", "current_versions", "is_current"]
@@ -55,3 +55,63 @@ def test_sections_text_and_tables_are_parsed():
     assert len(cells) == len(data_rows)
     # 任意单元格包含数字
     assert any(value is not None for row in cells.values() for value in row.values())
+
+
+def test_expired_budget_returns_partial_report_with_diagnostics():
+    from govnianbao import parse_annual_report_text
+    from govnianbao.deadline import Deadline
+
+    report_text = _build_sample_report_text()
+    unbounded = parse_annual_report_text(report_text, budget_ms=60_000)
+    assert unbounded.parse_diagnostics == {}
+    assert unbounded.section3.tables["section3_applications"]["cells"]
+
+    expired = parse_annual_report_text(report_text, budget_ms=0)
+    assert expired.parse_diagnostics["status"] == "timeout"
+    assert expired.parse_diagnostics["stage"] == "metadata"
+    assert expired.section1.text == ""
+
+    cancelled = Deadline()
+    cancelled.cancel()
+    report = parse_annual_report_text(report_text, deadline=cancelled)
+    assert report.parse_diagnostics["status"] == "cancelled"
+
+
+def test_deadline_stops_between_table_parsers():
+    from govnianbao import parse_annual_report_text
+    from govnianbao.deadline import Deadline, DeadlineExceeded
+
+    class StopAtSection3(Deadline):
+        def check(self, stage: str) -> None:
+            if stage.startswith("section3"):
+                raise DeadlineExceeded(stage)
+
+    report = parse_annual_report_text(_build_sample_report_text(), deadline=StopAtSection3())
+    diagnostics = report.parse_diagnostics
+    assert diagnostics["stage"].startswith("section3")
+    assert diagnostics["completed_stages"] == ["metadata", "split_sections", "section2_tables"]
+    # 已完成的部分保留，第三部分表格停在空表
+    assert "总体情况" in report.section1.text
+    assert report.section3.tables["section3_applications"]["cells"] == {}
+
+
+def test_budget_is_enforced_inside_table_region_scans():
+    import time
+
+    import pytest
+
+    from govnianbao import parse_annual_report_text
+    from govnianbao.deadline import Deadline, DeadlineExceeded
+    from govnianbao.table_region import find_table_region
+
+    # 一大段只有列名的“表格”：不限时要几秒
+    text = "三、收到和处理政府信息公开申请情况\n" + "商业企业\n" * 200_000
+    started = time.perf_counter()
+    report = parse_annual_report_text(text, budget_ms=100)
+    assert time.perf_counter() - started < 0.6
+    assert report.parse_diagnostics["status"] == "timeout"
+
+    cancelled = Deadline()
+    cancelled.cancel()
+    with pytest.raises(DeadlineExceeded):
+        find_table_region(text, "section3_applications", deadline=cancelled)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.report import Report
+from app.services.report_repository import get_anomaly_flags, review_queue, save_report
+
+pytest.importorskip("numpy")
+
+from app.services.anomalies import scan_anomalies  # noqa: E402
+
+client = TestClient(app)
+
+
+def _struct(new_requests: int, natural_person: int):
+    cells = {"new_requests": {"grand_total": new_requests, "natural_person": natural_person}}
+    return {"section3": {"tables": {"section3_applications": {"cells": cells}}}}
+
+
+def _save_group(prefix: str, year: int, overrides):
+    for i in range(25):
+        new_requests, natural_person = overrides.get(i, (100 + i, 90 + i))
+        save_report(
+            Report(
+                id=f"{prefix}-{i:02d}",
+                agency=f"异常测试省第{i}局",
+                region="异常测试省",
+                year=year,
+                annual_struct=_struct(new_requests, natural_person),
+            )
+        )
+
+
+def test_scan_flags_order_of_magnitude_outliers_and_ranks_queue():
+    _save_group("anomaly", 1999, {3: (105_000, 95), 7: (3_000, 97)})
+
+    result = scan_anomalies()
+    assert result["flags"]["anomaly-03"]["cells"][0]["row"] == "new_requests"
+    assert result["flags"]["anomaly-03"]["cells"][0]["col"] == "grand_total"
+    assert "anomaly-00" not in result["flags"]
+
+    _, queue = review_queue(limit=1000)
+    ids = [report.id for report, _ in queue]
+    assert ids.index("anomaly-03") < ids.index("anomaly-07")
+
+    # 重新保存后旧标记清除
+    save_report(Report(id="anomaly-03", region="异常测试省", year=1999, annual_struct=_struct(101, 91)))
+    assert get_anomaly_flags("anomaly-03") is None
+    assert get_anomaly_flags("anomaly-07") is not None
+
+
+def test_small_groups_are_not_scored():
+    save_report(Report(id="anomaly-lonely", year=1899, annual_struct=_struct(10**9, 1)))
+    result = scan_anomalies(write=False)
+    assert "anomaly-lonely" not in result["flags"]
+
+
+def test_admin_anomaly_routes():
+    _save_group("anomaly-api", 1998, {0: (1_000_000, 90)})
+    summary = client.post("/api/admin/anomalies/scan", json={}).json()
+    assert summary["flagged_reports"] >= 1
+    assert "flags" not in summary
+
+    queue = client.get("/api/admin/review-queue", params={"limit": 500}).json()
+    assert "anomaly-api-00" in [item["id"] for item in queue["items"]]
+    assert client.post("/api/admin/anomalies/scan", json={"tables": ["nope"]}).status_code == 400
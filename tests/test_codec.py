@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pickle
+from dataclasses import asdict
+
+import pytest
+
+from govnianbao import parse_annual_report_text
+from govnianbao.codec import CodecError, decode, decode_table, encode
+from govnianbao.template_tables import TEMPLATE_TABLES
+
+
+def _report():
+    table_def = TEMPLATE_TABLES["section3_applications"]
+    rows = [row for row in table_def["rows"] if row.get("data", True)]
+    cols = [col for col in table_def["columns"] if col.get("type") != "label"]
+    numbers = " ".join(str(i) for i in range(1, len(rows) * len(cols) + 1))
+    text = f"""某市财政局2024年政府信息公开工作年度报告
+一、总体情况
+总体情况正文。
+三、收到和处理政府信息公开申请情况
+{numbers}
+五、存在的主要问题及改进情况
+问题正文。
+六、其他需要报告的事项
+其他事项。
+"""
+    return parse_annual_report_text(text)
+
+
+def test_encode_decode_round_trip_is_lossless():
+    report = _report()
+    # 布局之外的内容也要保留
+    report.section3.tables["section3_applications"]["parse_warnings"] = ["示例警告"]
+    report.section3.tables["section3_applications"]["cells"]["new_requests"]["extra_col"] = 1.5
+    report.section2.tables["section2_art20_1"]["cells"]["regulations"] = {"issued_this_year": None}
+    report.section4.tables["custom_table"] = {"cells": {"a": {"b": 1}}}
+
+    data = encode(report)
+    assert asdict(decode(data)) == asdict(report)
+    assert len(data) < len(pickle.dumps(report))
+
+
+def test_decode_table_reads_single_table():
+    report = _report()
+    data = encode(report)
+
+    table = decode_table(data, "section3_applications")
+    assert table == report.section3.tables["section3_applications"]
+    assert decode_table(data, "section4_review_litigation") == {"cells": {}}
+
+    with pytest.raises(CodecError):
+        decode(b"XXXX" + data[4:])
+
+
+def test_batch_parser_can_yield_encoded_reports():
+    from govnianbao import parse_annual_reports_batch
+
+    text = "一、总体情况\n正文。\n六、其他需要报告的事项\n无。\n"
+    encoded = list(parse_annual_reports_batch([text, text], max_workers=2, encoded=True))
+    assert all(isinstance(item, bytes) for item in encoded)
+    assert decode(encoded[0]).section1.text.endswith("正文。")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+
+import pytest
+
+from govnianbao.columnar import ColumnarWriter, load_columnar, read_columnar_meta, write_columnar
+from govnianbao.layout import DEFAULT_LAYOUT, column_name
+
+
+def _struct(new_requests: float, agency: str, year: int):
+    return {
+        "agency": agency,
+        "year": year,
+        "region": None,
+        "section3": {
+            "tables": {
+                "section3_applications": {
+                    "cells": {"new_requests": {"grand_total": new_requests, "natural_person": 1}}
+                }
+            }
+        },
+    }
+
+
+def test_layout_flatten_round_trip():
+    struct = _struct(12, "某市财政局", 2024)
+    values = DEFAULT_LAYOUT.flatten(struct)
+
+    assert len(values) == len(DEFAULT_LAYOUT)
+    pos = DEFAULT_LAYOUT.index[("section3_applications", "new_requests", "grand_total")]
+    assert values[pos] == 12
+    assert math.isnan(values[0])
+
+    tables = DEFAULT_LAYOUT.unflatten(values)
+    assert tables == {
+        "section3_applications": {"new_requests": {"natural_person": 1, "grand_total": 12}}
+    }
+
+
+def test_writer_streams_row_groups(tmp_path):
+    out = str(tmp_path / "cols")
+    with ColumnarWriter(out, row_group_size=2) as writer:
+        for i in range(5):
+            writer.append(f"r{i}", _struct(i, f"机关{i}", 2020 + i))
+
+    meta = read_columnar_meta(out)
+    assert meta["rows"] == 5
+    assert meta["row_groups"] == [2, 2, 1]
+    assert meta["layout"] == DEFAULT_LAYOUT.fingerprint
+
+    key = column_name(("section3_applications", "new_requests", "grand_total"))
+    # 128 字节头 + 5 个 float64
+    assert os.path.getsize(os.path.join(out, key + ".npy")) == 128 + 5 * 8
+    with open(os.path.join(out, "_meta.json"), encoding="utf-8") as f:
+        assert key in json.load(f)["columns"]
+
+
+def test_load_columnar_returns_numpy_arrays(tmp_path):
+    np = pytest.importorskip("numpy")
+    out = str(tmp_path / "cols")
+    with ColumnarWriter(out, row_group_size=2) as writer:
+        for i in range(3):
+            writer.append(f"r{i}", _struct(i * 10, f"机关{i}", 2020 + i))
+        writer.append("r3", {"agency": None, "year": None})
+
+    key = column_name(("section3_applications", "new_requests", "grand_total"))
+    data = load_columnar(out, columns=["id", "agency", "year", key])
+
+    assert isinstance(data[key], np.memmap)
+    assert data[key][:3].tolist() == [0.0, 10.0, 20.0]
+    assert math.isnan(data[key][3])
+    assert data["year"].tolist() == [2020, 2021, 2022, -1]
+    assert data["id"].tolist() == ["r0", "r1", "r2", "r3"]
+    assert data["agency"][1] == "机关1"
+    assert data["agency"][3] == ""
+
+    with pytest.raises(KeyError):
+        load_columnar(out, columns=["nope"])
+
+
+def test_failed_write_leaves_no_meta(tmp_path):
+    out = str(tmp_path / "cols")
+    write_columnar(out, [("r0", _struct(1, "机关", 2024))])
+    with pytest.raises(RuntimeError):
+        with ColumnarWriter(out, row_group_size=1) as writer:
+            writer.append("r1", _struct(2, "机关", 2024))
+            raise RuntimeError("source failed")
+    # 旧的和新的 _meta.json 都不应存在，半截目录不能被当成完整数据读取
+    with pytest.raises(FileNotFoundError):
+        read_columnar_meta(out)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.report import Report
+from app.services import compare
+from app.services.report_repository import save_report
+
+client = TestClient(app)
+
+
+def _struct(new_requests: int, carried_over=None):
+    row = {"grand_total": new_requests, "natural_person": new_requests}
+    cells = {"new_requests": row}
+    if carried_over is not None:
+        cells["carried_over"] = {"grand_total": carried_over}
+    return {"section3": {"tables": {"section3_applications": {"cells": cells}}}}
+
+
+def _save(report_id: str, agency: str, year: int, new_requests: int, carried_over=None) -> None:
+    save_report(
+        Report(id=report_id, agency=agency, year=year, annual_struct=_struct(new_requests, carried_over))
+    )
+
+
+def test_compare_reports_cell_deltas():
+    _save("cmp-2023", "对比测试局", 2023, 40, carried_over=0)
+    _save("cmp-2024", "对比测试局", 2024, 50)
+
+    body = client.get("/api/reports/cmp-2023/compare/cmp-2024").json()
+    cell = body["cells"]["section3_applications"]["new_requests"]["grand_total"]
+    assert cell == {"base": 40, "other": 50, "delta": 10, "pct": 25.0}
+    missing = body["cells"]["section3_applications"]["carried_over"]["grand_total"]
+    assert missing == {"base": 0, "other": None, "delta": None, "pct": None}
+
+    assert client.get("/api/reports/cmp-2023/compare/none").status_code == 404
+    assert client.get("/api/reports/cmp-2023/compare/cmp-2024", params={"table": "x"}).status_code == 400
+
+
+def test_deltas_without_numpy_match(monkeypatch):
+    base = [1.0, 0.0, float("nan"), 4.0]
+    other = [3.0, 5.0, 1.0, 2.0]
+    with_numpy = compare._deltas(base, other)
+    monkeypatch.setattr(compare, "numpy", None)
+    without = compare._deltas(base, other)
+    assert [round(v, 6) for v in with_numpy[0] if v == v] == [round(v, 6) for v in without[0] if v == v]
+    assert without[1][:2] == [200.0, without[1][1]] and without[1][3] == -50.0
+
+
+def test_agency_trend_is_cached_and_invalidated_on_save():
+    _save("trend-2022", "趋势测试局", 2022, 10)
+    _save("trend-2023", "趋势测试局", 2023, 20)
+
+    first = client.get(
+        "/api/trends", params={"agency": "趋势测试局", "table": "section3_applications"}
+    ).json()["items"][0]
+    assert first["years"] == [2022, 2023]
+    cell = first["cells"]["section3_applications"]["new_requests"]["grand_total"]
+    assert cell == {"values": [10, 20], "delta": [None, 10], "pct": [None, 100.0]}
+    assert compare.agency_trend("趋势测试局", table="section3_applications") is compare.agency_trend(
+        "趋势测试局", table="section3_applications"
+    )
+
+    _save("trend-2024", "趋势测试局", 2024, 15)
+    updated = compare.agency_trend("趋势测试局", table="section3_applications")
+    assert updated["years"] == [2022, 2023, 2024]
+    assert updated["cells"]["section3_applications"]["new_requests"]["grand_total"]["delta"] == [None, 10, -5]
+
+
+def test_trend_cache_is_bounded_and_skips_unknown_agencies(monkeypatch):
+    monkeypatch.setattr(compare, "TREND_CACHE_SIZE", 2)
+    for i in range(3):
+        _save(f"trend-lru-{i}", f"趋势缓存局{i}", 2023, i)
+        compare.agency_trend(f"趋势缓存局{i}")
+    assert list(compare._SERIES)[-2:] == ["趋势缓存局1", "趋势缓存局2"]
+    assert len(compare._SERIES) <= 2 and set(compare._TRENDS) == set(compare._SERIES)
+
+    assert compare.agency_trend("没有报告的机关")["years"] == []
+    assert "没有报告的机关" not in compare._SERIES
+    assert "没有报告的机关" not in compare._TRENDS
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from app.models.report import Report
+from app.services import dedup
+from app.services.dedup import DedupIndex
+from app.services.fetch_url import handle_fetched_annual_report_html
+from app.services.import_pdf import handle_uploaded_annual_report
+
+
+def _long_text(seed: str) -> str:
+    return "\n".join(f"{seed}第{i}段，本机关持续推进政务公开工作，编号{i * 7 % 13}。" for i in range(200))
+
+
+def test_exact_and_near_duplicates_are_found():
+    index = DedupIndex()
+    original = _long_text("甲市")
+    index.add("a", original)
+    index.add("b", _long_text("乙县"))
+
+    # 只差空白和页码：精确指纹命中
+    reflowed = original.replace("\n", "\n\n- 3 -\n")
+    match = index.find(reflowed)
+    assert match is not None and match.report_id == "a" and match.exact
+
+    # 改了个别字：近重复命中
+    edited = original.replace("第5段", "第五段").replace("第9段", "第九段")
+    match = index.find(edited)
+    assert match is not None and match.report_id == "a" and not match.exact
+    assert match.similarity >= index.threshold
+
+    assert index.find(_long_text("丙区")) is None
+
+    index.remove("a")
+    assert index.find(original) is None
+    assert len(index) == 1
+
+
+def test_uploaded_duplicate_reuses_existing_parse_result(monkeypatch):
+    monkeypatch.setattr(dedup, "_DEDUP_INDEX", DedupIndex())
+    text = "一、总体情况\n" + _long_text("丁市") + "\n六、其他需要报告的事项\n无。"
+
+    first = handle_uploaded_annual_report(text, Report(id="dedup-first"))
+    second = handle_uploaded_annual_report(text + "\n- 9 -\n", Report(id="dedup-second"))
+
+    assert first.duplicate_of is None
+    assert second.duplicate_of == "dedup-first"
+    assert second.tables_struct == first.tables_struct
+    assert second.annual_struct is not first.annual_struct
+
+
+def test_near_duplicate_with_changed_numbers_is_parsed_again(monkeypatch):
+    monkeypatch.setattr(dedup, "_DEDUP_INDEX", DedupIndex())
+    text = "一、总体情况\n" + _long_text("戊市") + "\n六、其他需要报告的事项\n无。"
+    # 只改了一个数字：文本相似度很高，但表格可能已经更正过，不能复用旧的解析结果
+    edited = text.replace("编号", "编号1", 1)
+    probe = DedupIndex()
+    probe.add("a", text)
+    assert probe.find(edited) is not None
+    assert probe.find(edited, same_numbers=True) is None
+
+    handle_uploaded_annual_report(text, Report(id="dedup-numbers-a"))
+    second = handle_uploaded_annual_report(edited, Report(id="dedup-numbers-b"))
+    assert second.duplicate_of is None
+
+
+def test_duplicate_metadata_comes_from_its_own_text(monkeypatch):
+    monkeypatch.setattr(dedup, "_DEDUP_INDEX", DedupIndex())
+    body = "\n一、总体情况\n" + _long_text("己市") + "\n六、其他需要报告的事项\n无。"
+
+    first = handle_uploaded_annual_report(
+        "甲市人民政府2023年政府信息公开工作年度报告" + body, Report(id="dedup-meta-a")
+    )
+    second = handle_uploaded_annual_report(
+        "乙县人民政府2023年政府信息公开工作年度报告" + body, Report(id="dedup-meta-b")
+    )
+    # 只有机关名称不同：表格可以复用，机关仍按各自的文本
+    assert second.duplicate_of == "dedup-meta-a"
+    assert first.agency == "甲市人民政府"
+    assert (second.agency, second.year) == ("乙县人民政府", 2023)
+
+
+def test_crowded_bucket_still_finds_recent_reports():
+    index = DedupIndex(max_bucket_checks=32)
+    base = _long_text("庚市")
+    # 40 篇只差一行的报告落在同样的桶里
+    for i in range(40):
+        index.add(f"crowded-{i}", base + f"\n附：第{i}号补充说明，共{i * 37}字。")
+
+    latest = base + "\n附：第39号补充说明，共1443字。"
+    match = index.find(latest.replace("第5段", "第五段"))
+    assert match is not None and match.report_id == "crowded-39"
+
+
+def test_fetched_html_duplicate_reuses_existing_parse_result(monkeypatch):
+    monkeypatch.setattr(dedup, "_DEDUP_INDEX", DedupIndex())
+    body = "".join(f"<p>{line}</p>" for line in _long_text("庚市").split("\n"))
+    html = f"<html><body><h2>一、总体情况</h2>{body}<h2>六、其他需要报告的事项</h2><p>无。</p></body></html>"
+
+    first = handle_fetched_annual_report_html(html, Report(id="dedup-html-a"))
+    second = handle_fetched_annual_report_html(html, Report(id="dedup-html-b"))
+
+    assert first.duplicate_of is None
+    assert second.duplicate_of == "dedup-html-a"
+    assert second.tables_struct == first.tables_struct
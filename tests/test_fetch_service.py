@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.fetch_service import AsyncFetchService, CacheEntry, ConditionalCache, FetchJob
+from app.services.report_repository import delete_report, save_report
+
+REPORT_TEXT = """
+一、总体情况
+总体情况正文。
+五、存在的主要问题及改进情况
+问题正文。
+六、其他需要报告的事项
+其他事项正文。
+"""
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.path == "/flaky" and self.server.flaky_failures > 0:
+            self.server.flaky_failures -= 1
+            self._send(503, b"busy")
+            return
+        if self.path.startswith("/slow"):
+            time.sleep(0.3)
+        if self.path == "/missing":
+            self._send(404, b"not found")
+            return
+        if self.path == "/big":
+            self._send(200, b"x" * 4096)
+            return
+        if self.path == "/bomb":
+            # 压缩后很小，解压后 1MB
+            self._send(200, gzip.compress(b"0" * (1 << 20)), encoding="gzip")
+            return
+        if self.path == "/small-gzip":
+            self._send(200, gzip.compress(REPORT_TEXT.encode("utf-8")), encoding="gzip")
+            return
+        if self.path == "/big-eof":
+            # 没有 Content-Length，读到连接关闭为止
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"x" * 4096)
+            self.close_connection = True
+            return
+
+        etag = '"report-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send(200, REPORT_TEXT.encode("utf-8"), etag=etag)
+
+    def _send(self, status, body, etag=None, encoding=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.connections = 0
+    server.requests = 0
+    server.flaky_failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _url(server, path):
+    host, port = server.server_address
+    return f"http://{host}:{port}{path}"
+
+
+def test_conditional_get_skips_unchanged_reports(stand_in_server):
+    handled = []
+
+    def handler(text, report):
+        handled.append(report.id)
+        report.full_text = text
+        return save_report(report)
+
+    cache = ConditionalCache()
+    jobs = [
+        FetchJob(url=_url(stand_in_server, f"/report/{i}"), report_id=f"fetch-r{i}")
+        for i in range(6)
+    ]
+
+    async def run():
+        async with AsyncFetchService(max_per_host=2, cache=cache, handler=handler) as service:
+            first = await service.fetch_many(jobs)
+            second = await service.fetch_many(jobs)
+            return first, second, service.connections_opened
+
+    try:
+        first, second, opened = asyncio.run(run())
+    finally:
+        for job in jobs:
+            delete_report(job.report_id)
+
+    assert [r.status for r in first] == ["parsed"] * 6
+    assert [r.status for r in second] == ["not_modified"] * 6
+    assert all(r.report is not None for r in second)
+    assert sorted(handled) == sorted(job.report_id for job in jobs)
+    assert len(cache) == 6
+    # 12 个请求共用同一 host 的连接池，连接数不超过单 host 上限
+    assert stand_in_server.requests == 12
+    assert opened <= 2
+    assert stand_in_server.connections == opened
+
+
+def test_retries_with_backoff_and_reports_failures(stand_in_server):
+    stand_in_server.flaky_failures = 2
+
+    def handler(text, report):
+        return report
+
+    async def run():
+        async with AsyncFetchService(retries=3, backoff=0.01, handler=handler) as service:
+            return await service.fetch_many(
+                [
+                    FetchJob(url=_url(stand_in_server, "/flaky"), report_id="flaky"),
+                    FetchJob(url=_url(stand_in_server, "/missing"), report_id="missing"),
+                ]
+            )
+
+    flaky, missing = asyncio.run(run())
+
+    assert flaky.status == "parsed"
+    assert missing.status == "failed"
+    assert missing.http_status == 404
+
+
+def test_conditional_headers_need_a_stored_report(stand_in_server):
+    url = _url(stand_in_server, "/report/gone")
+    cache = ConditionalCache()
+    cache.put(url, CacheEntry(etag='"report-v1"'))
+
+    async def run():
+        async with AsyncFetchService(cache=cache, handler=lambda text, report: report) as service:
+            return await service.fetch(FetchJob(url=url, report_id="fetch-never-saved"))
+
+    # 缓存里有 ETag，但报告不在库里：应完整抓取，而不是返回没有报告的 304
+    result = asyncio.run(run())
+    assert result.status == "parsed"
+    assert result.report is not None
+
+
+def test_timeout_excludes_time_queued_for_a_host_slot(stand_in_server):
+    jobs = [
+        FetchJob(url=_url(stand_in_server, f"/slow/{i}"), report_id=f"fetch-slow-{i}")
+        for i in range(3)
+    ]
+
+    async def run():
+        async with AsyncFetchService(
+            max_per_host=1, timeout=0.6, retries=0, handler=lambda text, report: report
+        ) as service:
+            return await service.fetch_many(jobs)
+
+    # 每个请求 0.3s，串行共 0.9s，超过 timeout；排队时间不应算作超时
+    results = asyncio.run(run())
+    assert [r.status for r in results] == ["parsed"] * 3
+
+
+def test_oversized_bodies_fail_the_job(stand_in_server):
+    paths = ["/big", "/bomb", "/big-eof", "/small-gzip"]
+
+    async def run():
+        async with AsyncFetchService(
+            max_body_bytes=1024, retries=2, backoff=0.01, handler=lambda text, report: report
+        ) as service:
+            return await service.fetch_many(
+                [FetchJob(url=_url(stand_in_server, p), report_id=f"fetch-size{p}") for p in paths]
+            )
+
+    big, bomb, big_eof, small = asyncio.run(run())
+    for result in (big, bomb, big_eof):
+        assert result.status == "failed"
+        assert "BodyTooLarge" in result.error
+    assert small.status == "parsed"
+    # 超限不重试
+    assert stand_in_server.requests == len(paths)
+
+
+def test_fetch_many_bounds_jobs_in_flight(stand_in_server):
+    lock = threading.Lock()
+    active = [0, 0]  # 当前 / 峰值
+
+    def handler(text, report):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return report
+
+    jobs = [
+        FetchJob(url=_url(stand_in_server, f"/report/{i}"), report_id=f"fetch-bounded-{i}")
+        for i in range(8)
+    ]
+
+    async def run():
+        async with AsyncFetchService(max_jobs=2, handler=handler) as service:
+            return await service.fetch_many(jobs)
+
+    results = asyncio.run(run())
+    assert [r.status for r in results] == ["parsed"] * 8
+    assert active[1] <= 2
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from govnianbao.columnar import write_columnar
+from govnianbao.frames import frame_columns, to_frame
+
+pytest.importorskip("numpy")
+
+
+def _struct(new_requests, agency: str, year):
+    return {
+        "agency": agency,
+        "year": year,
+        "region": "江苏省",
+        "section3": {
+            "tables": {
+                "section3_applications": {
+                    "cells": {"new_requests": {"grand_total": new_requests, "natural_person": 1}}
+                }
+            }
+        },
+        "section4": {"tables": {"section4_review_litigation": {"cells": {"cases": {"rev_total": 2}}}}},
+    }
+
+
+def test_wide_columns_follow_layout():
+    reports = {"a": _struct(5, "甲局", 2023), "b": _struct(None, "乙局", None)}
+    columns = frame_columns(reports, tables=["section3_applications"])
+
+    assert columns["id"] == ["a", "b"]
+    assert columns["year"].values.tolist()[0] == 2023
+    assert columns["year"].mask.tolist() == [False, True]
+    assert columns["agency"].categories == ["甲局", "乙局"]
+    values = columns["section3_applications.new_requests.grand_total"]
+    assert values[0] == 5 and math.isnan(values[1])
+    assert values.flags["C_CONTIGUOUS"]
+    assert not any(name.startswith("section4") for name in columns)
+
+
+def test_long_columns_list_non_empty_cells():
+    columns = frame_columns([_struct(5, "甲局", 2023), _struct(7, "乙局", 2024)], layout="long")
+
+    assert columns["report"].tolist() == [0, 0, 0, 1, 1, 1]
+    codes, categories = columns["row"]
+    assert [categories[c] for c in codes[:3]] == ["new_requests", "new_requests", "cases"]
+    assert columns["value"].tolist() == [1, 5, 2, 1, 7, 2]
+    agency = columns["agency"]
+    assert agency.categories[agency.codes[3]] == "乙局"
+
+    with pytest.raises(ValueError):
+        frame_columns([], layout="tall")
+    with pytest.raises(ValueError):
+        frame_columns([], tables=["nope"])
+
+
+def test_to_frame_pandas():
+    pd = pytest.importorskip("pandas")
+    wide = to_frame([_struct(5, "甲局", 2023)], tables=["section3_applications"])
+    assert list(wide.columns[:3]) == ["agency", "year", "region"]
+    assert str(wide["year"].dtype) == "Int64"
+    assert wide["section3_applications.new_requests.grand_total"].iloc[0] == 5
+
+    long = to_frame([_struct(5, "甲局", 2023)], layout="long")
+    assert isinstance(long["table"].dtype, pd.CategoricalDtype)
+    assert long["value"].sum() == 8
+
+
+def test_arrow_paths(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    table = to_frame([_struct(5, "甲局", 2023)], engine="arrow")
+    assert table.column("section3_applications.new_requests.grand_total")[0].as_py() == 5
+
+    out = str(tmp_path / "cols")
+    write_columnar(
+        out,
+        [
+            ("r1", _struct(5, "甲局", 2023)),
+            ("r2", _struct(6, "乙局", 2024)),
+            ("r3", _struct(None, "丙局", None)),
+        ],
+    )
+    from govnianbao import columnar_to_arrow
+
+    shared = columnar_to_arrow(out)
+    assert shared.column("id").to_pylist() == ["r1", "r2", "r3"]
+    assert shared.column("agency").type == pa.large_string()
+    # 缺失的年度和单元格是 null，不是 -1 / NaN
+    assert shared.column("year").to_pylist() == [2023, 2024, None]
+    cells = shared.column("section3_applications.new_requests.grand_total")
+    assert cells.to_pylist() == [5.0, 6.0, None]
+    assert cells.null_count == 1
+    assert shared.column("section3_applications.new_requests.natural_person").null_count == 0
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from govnianbao.html_parser import html_to_text, parse_annual_report_html
+from govnianbao.template_tables import TEMPLATE_TABLES
+
+
+def _section3_rows_html() -> str:
+    rows = [
+        row for row in TEMPLATE_TABLES["section3_applications"]["rows"] if row.get("data", True)
+    ]
+    html_rows = []
+    for i, row in enumerate(rows):
+        values = "".join(f"<td>{i * 10 + j}</td>" for j in range(7))
+        html_rows.append(f"<tr><td><p>{row['label']}</p></td>{values}</tr>")
+    return "\n".join(html_rows)
+
+
+def _build_html() -> str:
+    return f"""
+<html><head><title>某市2024年政府信息公开工作年度报告</title>
+<script>var x = "一、总体情况";</script></head>
+<body>
+<h1>某市2024年政府信息公开工作年度报告</h1>
+<p>一、总体情况</p>
+<p>2024年，本机关共收到申请 2811 件。</p>
+<p><strong>二、主动公开政府信息情况</strong></p>
+<table>
+  <tr><td>第二十条第（一）项</td></tr>
+  <tr><td>信息内容</td><td>本年制发件数</td><td>本年废止件数</td><td>现行有效件数</td></tr>
+  <tr><td>规章</td><td>1</td><td>0</td><td>12</td></tr>
+  <tr><td>行政规范性文件</td><td>3</td><td>1</td><td>1,024</td></tr>
+  <tr><td>行政许可</td><td>5678</td></tr>
+  <tr><td>行政处罚</td><td>3985758</td></tr>
+  <tr><td>行政强制</td><td>88283</td></tr>
+  <tr><td>行政事业性收费</td><td>96171.6</td></tr>
+</table>
+<p>三、收到和处理政府信息公开申请情况</p>
+<table>
+  <tr><td rowspan="2">（本列数据的勾稽关系为：第一项加第二项之和，等于第三项加第四项之和）</td>
+      <td colspan="7">申请人情况</td></tr>
+  <tr><td>自然人</td><td>商业企业</td><td>科研机构</td><td>社会公益组织</td>
+      <td>法律服务机构</td><td>其他</td><td>总计</td></tr>
+  {_section3_rows_html()}
+</table>
+<p>四、政府信息公开行政复议、行政诉讼情况</p>
+<table>
+  <tr><td colspan="5">行政复议</td><td colspan="10">行政诉讼</td></tr>
+  <tr>{"".join(f"<td>{i}</td>" for i in range(15))}</tr>
+</table>
+<p>五、存在的主要问题及改进情况</p>
+<p>问题&nbsp;正文。</p>
+<p>六、其他需要报告的事项</p>
+<p>其他事项。</p>
+</body></html>
+"""
+
+
+def test_html_tables_are_mapped_by_row_label():
+    report = parse_annual_report_html(_build_html())
+
+    s2 = report.section2.tables
+    assert s2["section2_art20_1"]["cells"]["normative_docs"] == {
+        "issued_this_year": 3,
+        "abolished_this_year": 1,
+        "effective_now": 1024,
+    }
+    assert s2["section2_art20_6"]["cells"]["admin_penalty"] == {"decisions": 3985758}
+    assert s2["section2_art20_8"]["cells"]["admin_public_fee"] == {"fee_amount": 96171.6}
+
+    cells = report.section3.tables["section3_applications"]["cells"]
+    assert len(cells) == 25
+    assert cells["new_requests"]["natural_person"] == 0.0
+    assert cells["result_not_public_safety"]["grand_total"] == 66.0
+    assert "org_total" not in cells["new_requests"]
+
+    s4 = report.section4.tables["section4_review_litigation"]["cells"]["cases"]
+    assert s4["rev_maintained"] == 0
+    assert s4["lit_after_rev_total"] == 14
+
+
+def test_html_sections_and_flat_text():
+    html = _build_html()
+    report = parse_annual_report_html(html, with_tables=False)
+
+    assert report.section1.text.startswith("一、总体情况")
+    assert "2811" in report.section1.text
+    assert report.section5.text == "五、存在的主要问题及改进情况\n问题 正文。"
+    assert report.section6.text.endswith("其他事项。")
+
+    text = html_to_text(html)
+    assert text.startswith("某市2024年政府信息公开工作年度报告")
+    assert "var x" not in text
+    assert "规章 1 0 12" in text
+
+
+def test_unmapped_tables_fall_back_to_text_path():
+    numbers = " ".join(str(i) for i in range(15))
+    html = f"""
+<p>四、政府信息公开行政复议、行政诉讼情况</p>
+<table><tr><td>{numbers}</td></tr></table>
+"""
+    report = parse_annual_report_html(html)
+    cells = report.section4.tables["section4_review_litigation"]["cells"]["cases"]
+    assert cells["lit_after_rev_total"] == 14
+
+
+def test_partially_mapped_table_is_completed_from_text():
+    html = """
+<p>二、主动公开政府信息情况</p>
+<table>
+  <tr><td>第二十条第（一）项</td></tr>
+  <tr><td>信息内容</td><td>本年制发件数</td><td>本年废止件数</td><td>现行有效件数</td></tr>
+  <tr><td>规章</td><td>1</td><td>0</td><td>12</td><td>注</td></tr>
+  <tr><td>行政规范性文件</td><td>3</td><td>1</td><td>1,024</td></tr>
+</table>
+"""
+    cells = parse_annual_report_html(html).section2.tables["section2_art20_1"]["cells"]
+    # “规章”一行带了备注列，网页映射不上；应由文本解析补上，而不是整张表只剩一行
+    assert cells["regulations"] == {"issued_this_year": 1, "abolished_this_year": 0, "effective_now": 12}
+    assert cells["normative_docs"]["effective_now"] == 1024
+
+
+def test_html_parse_respects_deadline():
+    from govnianbao.deadline import Deadline, DeadlineExceeded
+
+    report = parse_annual_report_html(_build_html(), budget_ms=0)
+    assert report.parse_diagnostics["status"] == "timeout"
+    assert report.parse_diagnostics["stage"] == "metadata"
+
+    class StopAtSection3(Deadline):
+        def check(self, stage: str) -> None:
+            if stage.startswith("section3"):
+                raise DeadlineExceeded(stage)
+
+    report = parse_annual_report_html(_build_html(), deadline=StopAtSection3())
+    assert report.parse_diagnostics["completed_stages"] == [
+        "metadata",
+        "split_sections",
+        "section2_tables",
+    ]
+    assert report.section2.tables["section2_art20_1"]["cells"]
+    assert report.section3.tables["section3_applications"]["cells"] == {}
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from govnianbao import parse_annual_report_text
+from govnianbao.metadata import extract_region_path, extract_report_metadata
+
+
+def test_agency_and_year_from_title_line():
+    meta = extract_report_metadata("上海市徐汇区人民政府2024年政府信息公开工作年度报告\n一、总体情况\n")
+    assert meta.agency == "上海市徐汇区人民政府"
+    assert meta.year == 2024
+    assert meta.title == "上海市徐汇区人民政府2024年政府信息公开工作年度报告"
+
+
+def test_year_first_and_guanyu_titles():
+    meta = extract_report_metadata("", title="2023年苏州市财政局政府信息公开工作年度报告")
+    assert (meta.agency, meta.year) == ("苏州市财政局", 2023)
+
+    meta = extract_report_metadata("", title="某某市生态环境局关于2022年度政府信息公开工作年度报告")
+    assert (meta.agency, meta.year) == ("某某市生态环境局", 2022)
+
+
+def test_fallback_to_section1_text():
+    text = (
+        "一、总体情况\n"
+        "本报告由某县人民政府办公室根据《条例》要求编制。"
+        "本报告中所列数据的统计期限自2021年1月1日起至2021年12月31日止。"
+    )
+    meta = extract_report_metadata(text)
+    assert meta.agency == "某县人民政府办公室"
+    assert meta.year == 2021
+
+
+def test_parser_fills_report_metadata():
+    report = parse_annual_report_text(
+        "某市交通运输局2024年政府信息公开工作年度报告\n一、总体情况\n正文。\n", with_tables=False
+    )
+    assert report.agency == "某市交通运输局"
+    assert report.year == 2024
+
+
+def test_body_sentences_and_generic_names_are_not_agencies():
+    text = (
+        "一、总体情况\n"
+        "2024年，本机关认真贯彻落实《条例》，按要求编制政府2024年政府信息公开工作年度报告并按时发布，现报告如下。\n"
+        "本报告由政府根据《条例》编制。\n"
+    )
+    meta = extract_report_metadata(text)
+    assert meta.agency is None
+    assert meta.year == 2024
+
+    meta = extract_report_metadata("本机关2024年政府信息公开工作年度报告\n某市民政局2024年政府信息公开工作年度报告\n")
+    assert meta.agency == "某市民政局"
+
+
+def test_region_path_stops_at_non_region_words():
+    assert extract_region_path("江苏省苏州市财政局") == ["江苏省", "江苏省苏州市"]
+    assert extract_region_path("上海市徐汇区人民政府") == ["上海市", "上海市徐汇区"]
+    # 以区划单位字结尾的普通词、机关用字、中央垂直管理机关都不是区划
+    assert extract_region_path("广州市城市管理和综合执法局") == ["广州市"]
+    assert extract_region_path("国家税务总局上海市税务局") == []
+    assert extract_region_path("某市地区经济协作办公室") == ["某市"]
+    assert extract_region_path("某市公安局城区分局") == ["某市"]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from govnianbao.normalize import normalize_numbers, normalize_text, normalize_with_offsets
+from govnianbao.tables_parser import _extract_numbers
+
+
+def test_normalize_text_keeps_chinese_punctuation():
+    text = "总体情况\r\n本年\u3000新收 申请\u200b１２件，办结。"
+    assert normalize_text(text) == "总体情况\n本年 新收 申请12件，办结。"
+
+
+def test_normalize_numbers_and_thousands_separators():
+    assert normalize_numbers("１２，３４５ 件") == "12345 件"
+    # 不是千分位：两位数字前的逗号保留，数字仍然分开
+    assert _extract_numbers("12，13 与 1,234,567 以及 ３．５") == ["12", "13", "1234567", "3.5"]
+
+
+def test_offsets_map_back_to_original():
+    text = "a\r\nb\u200bc１２"
+    normalized, offsets = normalize_with_offsets(text)
+    assert normalized == "a\nbc12"
+    assert [text[offsets.to_original(i)] for i in range(len(normalized))] == [
+        "a", "\r", "b", "c", "１", "２"
+    ]
+    start, end = offsets.span_to_original(normalized.index("c"), len(normalized))
+    assert text[start:end] == "c１２"
+
+
+def test_normalize_text_checks_the_deadline():
+    import pytest
+
+    from govnianbao.deadline import Deadline, DeadlineExceeded
+
+    cancelled = Deadline()
+    cancelled.cancel()
+    with pytest.raises(DeadlineExceeded) as exc:
+        normalize_text("本年新收申请１２件。", deadline=cancelled)
+    assert exc.value.stage == "normalize"
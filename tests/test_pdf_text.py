@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from govnianbao.pdf_text import PdfExtractor, PdfTextCache, extract_pdf_pages, extract_pdf_text
+
+
+class _FakeExtractor(PdfExtractor):
+    """每个字节一页，记录实际抽取了哪些页。"""
+
+    def __init__(self, version: str = "fake-1") -> None:
+        self.version = version
+        self.calls = []
+
+    def pages(self, data):
+        def page(i):
+            self.calls.append(i)
+            return f"第{i}页 {data[i]}"
+
+        return [lambda i=i: page(i) for i in range(len(data))]
+
+
+def test_pages_are_cached_by_content_hash(tmp_path):
+    cache = PdfTextCache(tmp_path / "cache")
+    extractor = _FakeExtractor()
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"\x01\x02\x03")
+
+    first = extract_pdf_pages(str(pdf), cache=cache, extractor=extractor)
+    assert extractor.calls == [0, 1, 2]
+
+    # 同样内容、不同文件名：全部命中，不再抽取
+    copy = tmp_path / "b.pdf"
+    copy.write_bytes(pdf.read_bytes())
+    assert extract_pdf_pages(str(copy), cache=cache, extractor=extractor) == first
+    assert extract_pdf_text(b"\x01\x02\x03", cache=cache, extractor=extractor) == "\n".join(first)
+    assert extractor.calls == [0, 1, 2]
+
+
+def test_missing_pages_and_new_extractor_version_are_reextracted(tmp_path):
+    cache = PdfTextCache(tmp_path)
+    extractor = _FakeExtractor()
+    extract_pdf_pages(b"\x05\x06", cache=cache, extractor=extractor)
+
+    for root, _, files in os.walk(tmp_path):
+        for name in files:
+            if name == "1.txt.z":
+                os.remove(os.path.join(root, name))
+    extractor.calls.clear()
+    assert extract_pdf_pages(b"\x05\x06", cache=cache, extractor=extractor) == ["第0页 5", "第1页 6"]
+    assert extractor.calls == [1]
+
+    upgraded = _FakeExtractor("fake-2")
+    extract_pdf_pages(b"\x05\x06", cache=cache, extractor=upgraded)
+    assert upgraded.calls == [0, 1]
+
+
+def test_sample_pdf_extraction_uses_cache(tmp_path):
+    pytest.importorskip("pypdf")
+    sample = os.path.join(os.path.dirname(__file__), "..", "szfgs2024.pdf")
+    if not os.path.exists(sample):
+        pytest.skip("sample pdf not available")
+    cache = PdfTextCache(tmp_path)
+    text = extract_pdf_text(sample, cache=cache)
+    assert "总体情况" in text
+    assert extract_pdf_text(sample, cache=cache) == text
+
+
+def test_extractor_interface_is_abstract():
+    with pytest.raises(TypeError):
+        PdfExtractor()
+
+
+def test_fully_cached_pdf_needs_no_extractor_dependency(tmp_path, monkeypatch):
+    from govnianbao import pdf_text
+
+    cache = PdfTextCache(tmp_path)
+    extract_pdf_pages(b"\x07\x08", cache=cache, extractor=_FakeExtractor("pypdf-9.9"))
+
+    # 模拟未安装 pypdf：默认抽取器给不出版本，也不能真正抽取
+    def missing(name):
+        raise pdf_text.metadata.PackageNotFoundError(name)
+
+    def no_pypdf():
+        raise ImportError("no pypdf")
+
+    monkeypatch.setattr(pdf_text.metadata, "version", missing)
+    monkeypatch.setattr(pdf_text, "_require_pypdf", no_pypdf)
+    monkeypatch.setattr(pdf_text, "_DEFAULT_EXTRACTOR", None)
+
+    assert extract_pdf_pages(b"\x07\x08", cache=cache) == ["第0页 7", "第1页 8"]
+    with pytest.raises(ImportError):
+        extract_pdf_pages(b"\x09", cache=cache)
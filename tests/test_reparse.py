@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.report import Report
+from app.services import reparse
+from app.services.report_repository import (
+    get_report,
+    get_report_with_version,
+    save_report,
+    save_report_if_version,
+)
+from govnianbao import parse_annual_report_html, parse_annual_report_text
+from govnianbao.html_parser import html_to_text
+from govnianbao.versions import current_versions
+from tests.test_annual_report_parser import _build_sample_report_text
+from tests.test_html_parser import _build_html
+
+client = TestClient(app)
+
+
+def _stale_struct(text: str):
+    struct = asdict(parse_annual_report_text(text))
+    struct["versions"] = {"parser": "0", "template": "old"}
+    return struct
+
+
+def test_reparse_job_replaces_stale_reports_and_skips_current():
+    text = _build_sample_report_text()
+    save_report(Report(id="reparse-stale", full_text=text, annual_struct=_stale_struct(text)))
+    save_report(
+        Report(
+            id="reparse-current",
+            full_text=text,
+            annual_struct=asdict(parse_annual_report_text(text)),
+        )
+    )
+    save_report(Report(id="reparse-no-text", annual_struct={"versions": {}}))
+
+    job = reparse.ReparseJob(max_workers=1, batch_size=2)
+    job.run()
+    progress = job.progress()
+
+    assert progress["status"] == "finished"
+    assert progress["reparsed"] >= 1
+    assert progress["skipped_current"] >= 1
+    assert progress["skipped_no_text"] >= 1
+    assert get_report("reparse-stale").tables_struct["versions"] == current_versions()
+
+
+def test_save_report_if_version_rejects_concurrent_update():
+    save_report(Report(id="reparse-cas", title="旧"))
+    _, version = get_report_with_version("reparse-cas")
+    save_report(Report(id="reparse-cas", title="新入库"))
+
+    assert not save_report_if_version(Report(id="reparse-cas", title="重解析"), version)
+    assert get_report("reparse-cas").title == "新入库"
+
+    _, version = get_report_with_version("reparse-cas")
+    assert save_report_if_version(Report(id="reparse-cas", title="重解析"), version)
+
+
+def test_admin_reparse_routes():
+    started = client.post("/api/admin/reparse", json={"max_workers": 1})
+    assert started.status_code == 202
+    reparse.get_reparse_job().wait(timeout=30)
+
+    progress = client.get("/api/admin/reparse").json()
+    assert progress["status"] == "finished"
+    assert progress["versions"] == current_versions()
+    assert client.post("/api/admin/reparse", json={"max_workers": 0}).status_code == 422
+
+
+def test_reparse_refreshes_report_metadata():
+    from app.services.report_repository import list_reports
+
+    text = "某市民政局2024年政府信息公开工作年度报告\n" + _build_sample_report_text()
+    stale = _stale_struct(text)
+    stale.update({"title": "旧标题", "agency": "旧机关", "year": 2020})
+    save_report(
+        Report(
+            id="reparse-meta",
+            title="旧标题",
+            agency="旧机关",
+            year=2020,
+            full_text=text,
+            annual_struct=stale,
+        )
+    )
+
+    job = reparse.ReparseJob(max_workers=1, batch_size=2)
+    job.run()
+
+    report = get_report("reparse-meta")
+    assert (report.agency, report.year) == ("某市民政局", 2024)
+    assert report.title == "某市民政局2024年政府信息公开工作年度报告"
+    assert [r.id for r in list_reports(agency="某市民政局", year=2024)] == ["reparse-meta"]
+    assert not any(r.id == "reparse-meta" for r in list_reports(agency="旧机关"))
+
+
+def test_reparse_uses_the_parser_matching_the_source_format():
+    html = _build_html()
+    stale = asdict(parse_annual_report_html(html))
+    stale["versions"] = {"parser": "0", "template": "old"}
+    save_report(
+        Report(
+            id="reparse-html",
+            full_text=html_to_text(html),
+            annual_struct=stale,
+            source_format="html",
+            source_html=html,
+        )
+    )
+
+    job = reparse.ReparseJob(max_workers=1, batch_size=2)
+    job.run()
+
+    tables = get_report("reparse-html").tables_struct
+    expected = asdict(parse_annual_report_html(html))
+    assert tables["versions"] == current_versions()
+    # 按网页表格结构解析，而不是解析拍平后的文本
+    assert tables["section3"]["tables"] == expected["section3"]["tables"]
+    flattened = asdict(parse_annual_report_text(html_to_text(html)))
+    assert tables["section3"]["tables"] != flattened["section3"]["tables"]
+
+
+def test_reparse_keeps_existing_result_when_budget_runs_out():
+    text = _build_sample_report_text()
+    stale = _stale_struct(text)
+    save_report(Report(id="reparse-budget", full_text=text, annual_struct=stale))
+
+    job = reparse.ReparseJob(max_workers=1, batch_size=2, budget_ms=0)
+    job.run()
+
+    assert job.progress()["timed_out"] >= 1
+    assert get_report("reparse-budget").tables_struct["versions"] == stale["versions"]
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.report import Report
+from app.services.report_repository import list_reports, save_report
+
+client = TestClient(app)
+
+
+def test_list_reports_filters_by_agency_and_year_with_keyset_pages():
+    for i in range(5):
+        save_report(Report(id=f"list-{i}", agency="列表测试局", year=2024))
+    save_report(Report(id="list-old", agency="列表测试局", year=2023))
+
+    first = client.get("/api/reports", params={"agency": "列表测试局", "year": 2024, "limit": 2}).json()
+    assert [item["id"] for item in first["items"]] == ["list-0", "list-1"]
+    assert first["next_cursor"]
+
+    second = client.get(
+        "/api/reports",
+        params={"agency": "列表测试局", "year": 2024, "limit": 10, "cursor": first["next_cursor"]},
+    ).json()
+    assert [item["id"] for item in second["items"]] == ["list-2", "list-3", "list-4"]
+    assert second["next_cursor"] is None
+
+    assert client.get("/api/reports", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_resaving_report_moves_it_between_indexes():
+    report = Report(id="list-move", agency="迁移测试局", year=2022)
+    save_report(report)
+    report.year = 2023
+    save_report(report)
+
+    assert [r.id for r in list_reports(agency="迁移测试局", year=2022)] == []
+    assert [r.id for r in list_reports(agency="迁移测试局", year=2023)] == ["list-move"]
+
+
+def _struct_with_text():
+    return {
+        "agency": "缓存测试局",
+        "section1": {"text": "总体情况正文" * 200},
+        "section3": {
+            "raw_text": "表格原文",
+            "tables": {"section3_applications": {"cells": {"new_requests": {"grand_total": 9}}}},
+        },
+    }
+
+
+def test_annual_struct_etag_compression_and_projection():
+    save_report(Report(id="struct-cache", annual_struct=_struct_with_text()))
+    url = "/api/reports/struct-cache/annual_struct"
+
+    first = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert first.json()["section1"]["text"].startswith("总体情况正文")
+    etag = first.headers["etag"]
+    assert "content-encoding" not in first.headers
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] != etag
+    assert compressed.json() == first.json()
+
+    projected = client.get(url, params={"fields": "section3.tables"}).json()
+    assert projected == {"section3": {"tables": _struct_with_text()["section3"]["tables"]}}
+
+    no_text = client.get(url, params={"omit_text": 1}).json()
+    assert "text" not in no_text["section1"] and "raw_text" not in no_text["section3"]
+    assert no_text["agency"] == "缓存测试局"
+
+    # 重新保存后版本变化，旧 ETag 不再命中
+    changed = _struct_with_text()
+    changed["agency"] = "缓存测试局二"
+    save_report(Report(id="struct-cache", annual_struct=changed))
+    refreshed = client.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["agency"] == "缓存测试局二"
+
+    assert client.get(url, params={"fields": ","}).status_code == 400
+    assert client.get("/api/reports/missing-report/annual_struct").status_code == 404
+
+
+def test_export_ndjson_streams_projected_lines_and_resumes():
+    for i in range(3):
+        save_report(Report(id=f"export-{i}", agency="导出测试局", year=2024,
+                           full_text=f"全文{i}", annual_struct=_struct_with_text()))
+
+    params = {"agency": "导出测试局", "fields": "id,year,annual_struct.section3.tables"}
+    response = client.get("/api/reports/export.ndjson", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["export-0", "export-1", "export-2"]
+    assert lines[0]["annual_struct"] == {"section3": {"tables": _struct_with_text()["section3"]["tables"]}}
+    assert "agency" not in lines[0]
+
+    resumed = client.get(
+        "/api/reports/export.ndjson", params={**params, "cursor": lines[0]["_cursor"]}
+    )
+    assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == ["export-1", "export-2"]
+
+    full = client.get("/api/reports/export.ndjson", params={"agency": "导出测试局", "fields": "full_text"})
+    assert [json.loads(line)["full_text"] for line in full.text.splitlines()] == ["全文0", "全文1", "全文2"]
+
+    bad = client.get("/api/reports/export.ndjson", params={"fields": "id,secret"})
+    assert bad.status_code == 400
+
+
+def test_parse_endpoint_returns_struct_and_diagnostics():
+    text = "一、总体情况\n正文。\n二、主动公开政府信息情况\n说明。"
+    body = client.post("/api/reports/parse", json={"text": text}).json()
+    assert "正文" in body["annual_struct"]["section1"]["text"]
+    assert body["parse_diagnostics"] == {}
+
+    assert client.post("/api/reports/parse", json={"text": text, "budget_ms": 0}).status_code == 422
+
+
+def test_parse_runner_cancels_when_client_disconnects(monkeypatch):
+    import asyncio
+    import time
+
+    from app.services import parse_runner
+    from govnianbao.deadline import DeadlineExceeded
+
+    def slow_parse(full_text, *, deadline):
+        try:
+            while True:
+                deadline.check("test")
+                time.sleep(0.01)
+        except DeadlineExceeded as exc:
+            return {"parse_diagnostics": {"status": "cancelled" if exc.cancelled else "timeout"}}
+
+    async def disconnected() -> bool:
+        return True
+
+    monkeypatch.setattr(parse_runner, "parse_annual_report_from_text", slow_parse)
+    struct = asyncio.run(
+        parse_runner.parse_text_cancellable("x", budget_ms=60_000, is_disconnected=disconnected)
+    )
+    assert struct["parse_diagnostics"]["status"] == "cancelled"
+
+
+def test_parse_runner_stops_work_when_awaiting_task_is_cancelled(monkeypatch):
+    import asyncio
+    import threading
+    import time
+
+    from app.services import parse_runner
+    from govnianbao.deadline import DeadlineExceeded
+
+    stopped = threading.Event()
+
+    def slow_parse(full_text, *, deadline):
+        try:
+            while True:
+                deadline.check("test")
+                time.sleep(0.01)
+        except DeadlineExceeded:
+            stopped.set()
+            return {}
+
+    async def run() -> None:
+        task = asyncio.ensure_future(parse_runner.parse_text_cancellable("x", budget_ms=60_000))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    monkeypatch.setattr(parse_runner, "parse_annual_report_from_text", slow_parse)
+    asyncio.run(run())
+    assert stopped.wait(2)
+
+
+def test_parse_text_rejects_oversized_input():
+    import pytest
+    from pydantic import ValidationError
+
+    from app.api.routes.reports import MAX_PARSE_TEXT_CHARS, ParseTextRequest
+
+    assert ParseTextRequest(text="字" * MAX_PARSE_TEXT_CHARS).budget_ms > 0
+    with pytest.raises(ValidationError):
+        ParseTextRequest(text="字" * (MAX_PARSE_TEXT_CHARS + 1))
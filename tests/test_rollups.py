@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.report import Report
+from app.services.report_repository import delete_report, save_report
+
+client = TestClient(app)
+
+
+def _struct(new_requests_total: float):
+    return {
+        "section3": {
+            "tables": {
+                "section3_applications": {
+                    "cells": {"new_requests": {"grand_total": new_requests_total, "org_total": None}}
+                }
+            }
+        }
+    }
+
+
+def _total(params):
+    items = client.get("/api/rollups", params=params).json()["items"]
+    if not items:
+        return None
+    cells = items[0]["tables"]["section3_applications"]["new_requests"]
+    return items[0]["reports"], cells["grand_total"]
+
+
+def test_rollups_follow_save_replace_and_delete():
+    save_report(Report(id="roll-a", agency="汇总省甲市财政局", region="汇总省甲市", year=2024,
+                       annual_struct=_struct(10)))
+    save_report(Report(id="roll-b", agency="汇总省乙市财政局", region="汇总省乙市", year=2024,
+                       annual_struct=_struct(5)))
+    save_report(Report(id="roll-c", agency="汇总省乙市财政局", region="汇总省乙市", year=2023,
+                       annual_struct=_struct(7)))
+
+    assert _total({"region": "汇总省", "year": 2024}) == (2, 15)
+    assert _total({"region": "汇总省乙市", "year": 2024}) == (1, 5)
+    assert _total({"agency": "汇总省乙市财政局", "year": 2023}) == (1, 7)
+
+    # 覆盖：先扣掉旧贡献再加新的
+    save_report(Report(id="roll-a", agency="汇总省甲市财政局", region="汇总省甲市", year=2024,
+                       annual_struct=_struct(1)))
+    assert _total({"region": "汇总省", "year": 2024}) == (2, 6)
+
+    delete_report("roll-b")
+    assert _total({"region": "汇总省", "year": 2024}) == (1, 1)
+    assert _total({"region": "汇总省乙市", "year": 2024}) is None
+
+    years = client.get("/api/rollups", params={"region": "汇总省"}).json()["items"]
+    assert [item["year"] for item in years] == [2023, 2024]
+
+    assert client.get("/api/rollups").status_code == 400
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.report import Report
+from app.services.report_repository import delete_report, save_report
+from app.services.search_index import search
+
+client = TestClient(app)
+
+
+def _save(report_id: str, section1: str = "", section5: str = "", section6: str = "") -> None:
+    struct = {
+        "section1": {"text": section1},
+        "section5": {"text": section5},
+        "section6": {"text": section6},
+    }
+    save_report(Report(id=report_id, annual_struct=struct))
+
+
+def _ids(q: str):
+    return [item["id"] for item in search(q, limit=50)["items"]]
+
+
+def test_phrase_query_requires_contiguous_match_and_ignores_spaces():
+    _save("search-a", section1="本年度依申请公开办理情况良好。")
+    _save("search-b", section1="依 申 请 公 开 的 申请均已答复。")
+    _save("search-c", section5="申请公开数量增加，依申请办理。")
+
+    assert sorted(_ids('"依申请公开"')) == ["search-a", "search-b"]
+    # 不带引号时只要求所有二元组都出现
+    assert "search-c" in _ids("依申请公开")
+
+    item = search('"依申请公开"')["items"][0]
+    snippet = item["snippets"][0]
+    text = "本年度依申请公开办理情况良好。" if item["id"] == "search-a" else "依 申 请 公 开 的 申请均已答复。"
+    assert snippet["section"] == "section1"
+    assert "".join(text[snippet["start"] : snippet["end"]].split()) == "依申请公开"
+
+
+def test_boolean_queries_and_ranking():
+    _save("search-d", section6="检索布尔测试甲。检索布尔测试甲。检索布尔测试甲。")
+    _save("search-e", section6="检索布尔测试甲，另有检索布尔测试乙。")
+    _save("search-f", section5="检索布尔测试乙。")
+
+    assert _ids('"检索布尔测试甲"')[:2] == ["search-d", "search-e"]
+    assert sorted(_ids('"检索布尔测试甲" "检索布尔测试乙"')) == ["search-e"]
+    assert sorted(_ids('"检索布尔测试甲" OR "检索布尔测试乙"')) == ["search-d", "search-e", "search-f"]
+    assert sorted(_ids('"检索布尔测试甲" -"检索布尔测试乙"')) == ["search-d"]
+    assert sorted(_ids('"检索布尔测试乙" NOT "检索布尔测试甲"')) == ["search-f"]
+
+
+def test_index_follows_saves_and_deletes():
+    _save("search-g", section1="增量索引旧内容")
+    assert _ids('"增量索引旧内容"') == ["search-g"]
+
+    _save("search-g", section1="增量索引新内容")
+    assert _ids('"增量索引旧内容"') == []
+    assert _ids('"增量索引新内容"') == ["search-g"]
+
+    delete_report("search-g")
+    assert _ids('"增量索引新内容"') == []
+
+
+def test_search_route():
+    _save("search-h", section1="检索接口测试正文")
+    body = client.get("/api/search", params={"q": "检索接口测试"}).json()
+    assert body["total"] == 1
+    assert body["items"][0]["id"] == "search-h"
+    assert client.get("/api/search", params={"q": " "}).status_code == 400
+
+
+def test_single_character_query_matches_end_of_word_runs():
+    _save("search-single", section1="本机关依法公开。")
+    assert "search-single" in _ids("开")
+    item = next(i for i in search("开", limit=50)["items"] if i["id"] == "search-single")
+    assert [s["text"][s["start"] : s["end"]] for s in item["snippets"]] == ["开"]
+
+
+def test_save_hooks_run_outside_the_repository_lock(monkeypatch):
+    import threading
+
+    from app.services import report_repository
+
+    readable = []
+
+    def hook(old, report):
+        # 回调执行期间，其他线程仍能读仓库
+        reader = threading.Thread(
+            target=lambda: readable.append(report_repository.get_report_with_version(report.id))
+        )
+        reader.start()
+        reader.join(timeout=2)
+
+    monkeypatch.setattr(report_repository, "_SAVE_HOOKS", report_repository._SAVE_HOOKS + [hook])
+    save_report(Report(id="search-hook-lock"))
+    assert readable and readable[0][0].id == "search-hook-lock"
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from govnianbao.strategies import (
+    ordered_strategies,
+    register_strategy,
+    reset_strategy_stats,
+    run_strategies,
+    strategy_stats,
+    unregister_strategy,
+)
+from govnianbao.tables_parser import parse_section4_review_litigation
+from tests.test_tables_parser import _balanced_section3_rows
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    reset_strategy_stats()
+    yield
+    reset_strategy_stats()
+
+
+def test_registered_strategy_runs_by_cost_and_is_validated():
+    key = "section4_review_litigation"
+    good = {"cases": {"rev_maintained": 1, "rev_corrected": 0, "rev_other": 0, "rev_pending": 0, "rev_total": 1}}
+    register_strategy(key, "fixed", lambda text, deadline: good, cost=0.1)
+    try:
+        assert ordered_strategies(key)[0].name == "fixed"
+        table = parse_section4_review_litigation("无关文字")[key]
+        assert table["parse_tier"] == "fixed"
+        assert strategy_stats(key)["fixed"]["successes"] == 1
+    finally:
+        unregister_strategy(key, "fixed")
+    assert "fixed" not in [s.name for s in ordered_strategies(key)]
+
+
+def test_strategy_choice_does_not_depend_on_history():
+    key = "section3_applications"
+    rows = _balanced_section3_rows()
+    numbers = " ".join(str(v) for _, row in rows for v in row)
+    shifted = "2024\n" + numbers
+    # 每次尝试都计为 1ms，统计不受机器快慢影响
+    ticks = itertools.count(step=0.001)
+
+    def clock() -> float:
+        return next(ticks)
+
+    fresh = run_strategies(key, numbers, source="agency-a", clock=clock)
+    assert fresh["parse_tier"] == "template"
+
+    # 这一来源的文档开头总混着年份：模板按个数推断总是失败，只有逐版式试填能成功
+    for _ in range(6):
+        assert run_strategies(key, shifted, source="agency-a", clock=clock)["parse_tier"] == "layouts"
+    stats = strategy_stats(key, "agency-a")
+    assert stats["layouts"]["successes"] == 6 and stats["template"]["successes"] == 1
+
+    # 之前解析过什么不影响顺序和结果：同一篇文档得到同样的层级和单元格
+    assert [s.name for s in ordered_strategies(key)] == ["template", "labels", "layouts", "lenient"]
+    again = run_strategies(key, numbers, source="agency-a", clock=clock)
+    assert again == fresh
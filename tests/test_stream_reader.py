@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from govnianbao import parse_annual_reports_batch
+from govnianbao.stream_reader import iter_annual_reports, iter_report_texts
+
+
+def _report_text(name: str) -> str:
+    return f"""{name}2024年政府信息公开工作年度报告
+本报告根据《中华人民共和国政府信息公开条例》编制。
+一、总体情况
+{name}的总体情况。
+二、主动公开政府信息情况
+主动公开说明。
+三、收到和处理政府信息公开申请情况
+申请说明。
+四、政府信息公开行政复议、行政诉讼情况
+复议说明。
+五、存在的主要问题及改进情况
+{name}的问题。
+六、其他需要报告的事项
+{name}的其他事项。
+"""
+
+
+def test_iter_report_texts_splits_concatenated_dump(tmp_path):
+    names = ["甲市", "乙县", "丙区"]
+    dump = tmp_path / "dump.txt"
+    dump.write_text("".join(_report_text(n) for n in names), encoding="utf-8")
+
+    texts = list(iter_report_texts(str(dump)))
+
+    assert len(texts) == 3
+    for name, text in zip(names, texts):
+        # 每一篇都从自己的报告标题行开始
+        assert text.startswith(f"{name}2024年政府信息公开工作年度报告")
+        assert f"{name}的其他事项" in text
+
+    reports = list(iter_annual_reports(str(dump), with_tables=False))
+    assert [r.section5.text for r in reports] == [
+        f"五、存在的主要问题及改进情况\n{n}的问题。" for n in names
+    ]
+
+
+def test_repeated_section1_title_without_section6_is_not_split(tmp_path):
+    # 目录里出现的“一、总体情况”不应切出新的一篇
+    text = "目录\n一、总体情况\n二、主动公开政府信息情况\n" + _report_text("甲市")
+    dump = tmp_path / "dump.txt"
+    dump.write_text(text, encoding="utf-8")
+
+    assert len(list(iter_report_texts(str(dump)))) == 1
+
+
+def test_empty_dump_yields_nothing(tmp_path):
+    dump = tmp_path / "empty.txt"
+    dump.write_bytes(b"")
+    assert list(iter_report_texts(str(dump))) == []
+
+
+def test_stream_feeds_batch_parser(tmp_path):
+    dump = tmp_path / "dump.txt"
+    dump.write_text("".join(_report_text(n) for n in ["甲市", "乙县"]), encoding="utf-8")
+
+    reports = list(
+        parse_annual_reports_batch(
+            iter_report_texts(str(dump)), with_tables=False, max_workers=2, chunksize=1
+        )
+    )
+    assert [r.section6.text.splitlines()[-1] for r in reports] == [
+        "甲市的其他事项。",
+        "乙县的其他事项。",
+    ]
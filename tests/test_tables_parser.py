@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import pytest
+
+from govnianbao.strategies import reset_strategy_stats
 from govnianbao.tables_parser import (
     parse_section3_applications,
     parse_template_table3,
 )
 
 
+@pytest.fixture(autouse=True)
+def _fresh_strategy_stats():
+    # 策略顺序会随已解析的文档自适应变化，每个用例从登记顺序开始
+    reset_strategy_stats()
+
+
 def test_parse_section3_applications_prefers_template():
     # 构造标准模板数量的数字（25 行 × 7 列 = 175 个）
     numbers = " ".join(str(i) for i in range(1, 176))
@@ -121,3 +130,260 @@ def test_parse_template_table3_exact_formats():
     assert "org_total" in first_row
     assert "grand_total" in first_row
 
+
+
+def _table3_text(header: str, count: int) -> str:
+    numbers = " ".join(str(i) for i in range(1, count + 1))
+    return "\n".join(["三、收到和处理政府信息公开申请情况", header, "本年新收政府信息公开申请数量", numbers])
+
+
+def test_header_fingerprint_selects_section3_layout():
+    from govnianbao.template_registry import layout_fingerprint, select_layout
+
+    header_8 = "申请人情况 自然人 法人或其他组织 商业企业 科研机构 社会公益组织 法律服务机构 其他 小计 其他 总计"
+    header_7 = "申请人情况 自然人 法人或其他组织 商业企业 科研机构 社会公益组织 法律服务机构 其他 总计"
+
+    assert "小计" in layout_fingerprint("section3_applications", _table3_text(header_8, 1))
+    assert select_layout("section3_applications", _table3_text(header_8, 1)).name == "8col"
+    assert select_layout("section3_applications", _table3_text(header_7, 1)).name == "7col"
+    # 没有表头时不猜，交给数字个数推断
+    assert select_layout("section3_applications", "1 2 3") is None
+
+    # 56 个数字既能按 7 列也能按 8 列整除：有“小计”表头时按 8 列填
+    cells = parse_template_table3(_table3_text(header_8, 56))["cells"]
+    assert len(cells) == 7 and "org_total" in cells["new_requests"]
+    cells = parse_template_table3(_table3_text(header_7, 56))["cells"]
+    assert len(cells) == 8 and "org_total" not in cells["new_requests"]
+
+
+def test_registered_layout_variant_is_used():
+    from govnianbao.template_registry import (
+        TableLayout,
+        layouts_for,
+        register_layout,
+        unregister_layout,
+    )
+
+    base = layouts_for("section3_applications")[0]
+    variant = TableLayout(
+        table_key="section3_applications",
+        name="test-3col",
+        version="test",
+        row_keys=base.row_keys,
+        col_keys=("natural_person", "other_org", "grand_total"),
+        markers=("测试版式",),
+    )
+    register_layout(variant)
+    try:
+        cells = parse_template_table3(_table3_text("测试版式 自然人 其他 总计", 75))["cells"]
+        assert cells["new_requests"] == {"natural_person": 1.0, "other_org": 2.0, "grand_total": 3.0}
+    finally:
+        unregister_layout("section3_applications", "test-3col")
+
+
+def test_row_label_automaton_matches_across_whitespace():
+    from govnianbao.row_labels import automaton_for
+
+    automaton = automaton_for(("section2_art20_1", "section2_art20_6"))
+    text = "规章 1 2 3\n行 政 规 范 性 文 件 4 5 6\n行政处罚 7"
+    matches = automaton.find_all(text)
+    assert [ref for _, _, ref in matches] == [
+        ("section2_art20_1", "regulations"),
+        ("section2_art20_1", "normative_docs"),
+        ("section2_art20_6", "admin_penalty"),
+    ]
+    start, end, _ = matches[1]
+    assert text[start:end] == "行 政 规 范 性 文 件"
+
+
+_SECTION2_TABLES = """二、主动公开政府信息情况
+2024年，本机关主动公开行政许可等信息。
+第二十条第（一）项
+信息内容 本年制发件数 本年废止件数 现行有效件数
+规章 1 0 5
+行政规范性文件 3 1 20
+第二十条第（五）项
+信息内容 本年处理决定数量
+行政许可 100
+第二十条第（六）项
+行政处罚 50
+行政强制 2
+第二十条第（八）项
+信息内容 本年收费金额（单位：万元）
+行政事业性收费 1.5
+"""
+
+
+def test_section2_rows_are_anchored_by_label():
+    from govnianbao.tables_parser import parse_section2_tables
+
+    # 正文里的“2024年”是多出来的数字，按顺序填会整体错位
+    tables = parse_section2_tables(_SECTION2_TABLES)
+    assert tables["section2_art20_1"]["cells"]["regulations"] == {
+        "issued_this_year": 1, "abolished_this_year": 0, "effective_now": 5
+    }
+    assert tables["section2_art20_5"]["cells"]["admin_permission"] == {"decisions": 100}
+    assert tables["section2_art20_8"]["cells"]["admin_public_fee"] == {"fee_amount": 1.5}
+
+    # 缺数字的行按行恢复，其余行不受影响
+    partial = parse_section2_tables(_SECTION2_TABLES.replace("行政规范性文件 3 1 20", "行政规范性文件 3"))
+    assert partial["section2_art20_1"]["cells"]["normative_docs"] == {
+        "issued_this_year": 3, "abolished_this_year": None, "effective_now": None
+    }
+    assert partial["section2_art20_6"]["cells"]["admin_penalty"] == {"decisions": 50}
+    assert partial["section2_art20_1"]["parse_warnings"]
+
+
+def _section3_table_text() -> str:
+    from govnianbao.template_tables import TEMPLATE_TABLES
+
+    lines = [
+        "三、收到和处理政府信息公开申请情况",
+        "2024年，本机关共收到政府信息公开申请2811件，办结2800件。",
+        "申请人情况 自然人 法人或其他组织 总计",
+        "商业企业 科研机构 社会公益组织 法律服务机构 其他 小计",
+    ]
+    for i, row in enumerate(TEMPLATE_TABLES["section3_applications"]["rows"]):
+        if row.get("data", True):
+            lines.append(row["label"] + " " + " ".join(str(i) for _ in range(8)))
+        else:
+            lines.append(row["label"])
+    lines.append("注：本表统计截至2024年12月31日。")
+    return "\n".join(lines)
+
+
+def test_table_region_excludes_surrounding_prose():
+    from govnianbao.table_region import table_region_text
+
+    text = _section3_table_text()
+    region = table_region_text(text, "section3_applications")
+    assert region is not None
+    assert region.startswith("申请人情况")
+    assert "2811" not in region and "注：" not in region
+    # 没有表头时不做截取
+    assert table_region_text("本年共收到申请 3 件。\n1 2 3", "section3_applications") is None
+
+
+def test_table_region_scan_is_linear_in_header_hits():
+    import time
+
+    from govnianbao.table_region import find_table_region
+
+    # 表头之后成千上万行只有列名：每行都命中表头，扫描仍应线性
+    text = "行政复议 行政诉讼 维持 纠正 其他结果 尚未审结\n" + "行政复议\n" * 16000
+    started = time.perf_counter()
+    region = find_table_region(text, "section4_review_litigation")
+    assert time.perf_counter() - started < 1.0
+    assert region is not None and region[1] == len(text)
+
+
+def test_template_table3_ignores_numbers_outside_table():
+    from govnianbao.template_tables import TEMPLATE_TABLES
+
+    text = _section3_table_text()
+    result = parse_template_table3(text)
+    cells = result["cells"]
+    assert cells["new_requests"]["natural_person"] == 0
+    assert cells["carry_next_year"]["grand_total"] == float(
+        len(TEMPLATE_TABLES["section3_applications"]["rows"]) - 1
+    )
+
+
+def test_section4_region_skips_preamble_numbers():
+    from govnianbao.tables_parser import parse_section4_review_litigation
+
+    text = (
+        "四、因政府信息公开工作被申请行政复议、提起行政诉讼情况\n"
+        "2024年共发生行政复议3件。\n"
+        "行政复议 行政诉讼\n"
+        "结果维持 结果纠正 其他结果 尚未审结 总计 未经复议直接起诉 复议后起诉\n"
+        + " ".join(str(i) for i in range(15))
+        + "\n注：2023年结转案件1件。"
+    )
+    cells = parse_section4_review_litigation(text)["section4_review_litigation"]["cells"]
+    row = next(iter(cells.values()))
+    assert row["rev_maintained"] == 0
+    assert row["rev_total"] == 4
+
+
+def _balanced_section3_rows():
+    """满足第三部分全部求和勾稽关系的 25 行 × 8 列数字（按模板行顺序）。"""
+    from govnianbao.template_tables import TEMPLATE_TABLES
+
+    def base(seed):
+        natural = seed % 3
+        orgs = [(seed + i) % 2 for i in range(5)]
+        return [natural, *orgs, sum(orgs), natural + sum(orgs)]
+
+    rows = [r for r in TEMPLATE_TABLES["section3_applications"]["rows"] if r.get("data", True)]
+    results = [r["key"] for r in rows if r.get("indent", 0) > 0 and r["key"] != "result_total"]
+    values = {key: base(i) for i, key in enumerate(results)}
+    values["result_total"] = [sum(col) for col in zip(*values.values())]
+    values["carry_next_year"] = base(7)
+    values["carried_over"] = [0] * 8
+    values["new_requests"] = [a + b for a, b in zip(values["result_total"], values["carry_next_year"])]
+    return [(row["label"], values[row["key"]]) for row in rows]
+
+
+def test_section3_fast_path_is_validated_and_tagged():
+    numbers = " ".join(str(v) for _, row in _balanced_section3_rows() for v in row)
+    table = parse_section3_applications("三、收到和处理政府信息公开申请情况\n" + numbers)[
+        "section3_applications"
+    ]
+    assert table["parse_tier"] == "template"
+    assert "parse_warnings" not in table
+
+    # 数字对不上勾稽关系：所有层级都不通过时保留最便宜的结果并给出警告
+    bad = parse_section3_applications(" ".join(str(i) for i in range(1, 201)))["section3_applications"]
+    assert bad["parse_tier"] == "template"
+    assert any("sum check" in w for w in bad["parse_warnings"])
+
+
+def test_section3_falls_through_to_slower_tiers():
+    rows = _balanced_section3_rows()
+    # 表格前混入年份，且没有表头可定位：模板按个数推断失败，按版式取后 200 个数字
+    numbers = " ".join(str(v) for _, row in rows for v in row)
+    shifted = parse_section3_applications("2024\n" + numbers)["section3_applications"]
+    assert shifted["parse_tier"] == "layouts"
+    assert shifted["cells"]["carry_next_year"]["grand_total"] == rows[-1][1][-1]
+
+    # 带行标签（编号与标签分开）且前后有正文数字：按标签逐行取数
+    lines = ["本年共收到申请2811件。"]
+    lines += [f"{label[:2]} {label[2:]} {' '.join(map(str, row))}" for label, row in rows]
+    lines.append("注：统计截至2024年12月31日。")
+    labelled = parse_section3_applications("\n".join(lines))["section3_applications"]
+    assert labelled["parse_tier"] == "labels"
+    assert labelled["cells"]["new_requests"]["grand_total"] == rows[0][1][-1]
+
+
+def test_section4_tiers_check_totals():
+    from govnianbao.tables_parser import parse_section4_review_litigation
+
+    row = [1, 0, 0, 0, 1, 2, 1, 0, 0, 3, 0, 0, 0, 0, 0]
+    table = parse_section4_review_litigation("案件数量 " + " ".join(map(str, row)))[
+        "section4_review_litigation"
+    ]
+    assert table["parse_tier"] == "labels"
+    assert table["cells"]["cases"]["lit_direct_total"] == 3
+
+
+def test_truncated_section3_is_not_reported_as_complete():
+    import os
+
+    path = os.path.join(os.path.dirname(__file__), "..", "section3_raw_text.txt")
+    if not os.path.exists(path):
+        pytest.skip("sample section3 text not available")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    # 样例只截到第 13 行：各层级都不算填满，结果带警告，不冒充完整表格
+    table = parse_section3_applications(text)["section3_applications"]
+    assert len(table["cells"]) < 25
+    warnings = table["parse_warnings"]
+    assert any("row(s) missing" in w for w in warnings)
+    assert "no strategy produced a complete table" in warnings[-1]
+
+    from govnianbao.invariants import validate_table
+
+    validation = validate_table("section3_applications", table["cells"])
+    assert validation.skipped > 0 and not validation.ok
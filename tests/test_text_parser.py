@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from govnianbao.text_parser import _find_title, split_sections
+
+# 对抗性输入在任何机器上都应远低于这个时限（原正则实现在 4 MB 空白上要数分钟）
+_LATENCY_BOUND = 2.0
+
+
+def test_find_title_matches_line_start_semantics():
+    title = "二、主动公开政府信息情况"
+    assert _find_title("二 、主动公开\n政府信息情况", title) == 0
+    assert _find_title("正文\n  \n  二、主 动公开政府信息情况", title) == 2
+    # 不在行首的标题不算
+    assert _find_title("详见二、主动公开政府信息情况", title) is None
+    assert _find_title("详见二、主动公开政府信息情况\n二、主动公开政府信息情况", title) == 14
+
+
+def test_split_sections_keeps_titles_and_order():
+    text = "一、总体情况\n概述\n二、 主动公开政府信息情况\n主动\n六、其他需要报告的事项\n无"
+    sections = split_sections(text)
+    assert sections[1] == "一、总体情况\n概述"
+    assert sections[2] == "\n二、 主动公开政府信息情况\n主动"
+    assert sections[3] == sections[4] == sections[5] == ""
+    assert sections[6].endswith("无")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        " " * 4_000_000,
+        "\n " * 2_000_000,
+        "\n二、主动 " * 400_000,
+        "x二、主动" * 400_000,
+        "\n二 、 主 动 公 开 政 府" * 200_000,
+        "\t\n" * 2_000_000 + "二、主动公开政府信息情况",
+    ],
+    ids=["spaces", "blank-lines", "title-prefixes", "inline-prefixes", "spaced-prefixes", "late-title"],
+)
+def test_split_sections_adversarial_latency(text):
+    start = time.perf_counter()
+    sections = split_sections(text)
+    assert time.perf_counter() - start < _LATENCY_BOUND
+    assert len(sections) == 6
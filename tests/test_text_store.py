@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from app.models import text_store
+from app.models.report import Report
+from app.models.text_store import (
+    compress_text,
+    decompress_text,
+    register_dictionary,
+    train_dictionary,
+)
+
+
+def _struct():
+    return {
+        "agency": "某市财政局",
+        "section1": {"text": "一、总体情况\n本机关认真贯彻落实政府信息公开条例。"},
+        "section3": {
+            "raw_text": "三、收到和处理政府信息公开申请情况 1 2 3",
+            "tables": {"section3_applications": {"cells": {"new_requests": {"grand_total": 3}}}},
+        },
+    }
+
+
+def test_compress_round_trip_with_and_without_dictionary():
+    text = "三、收到和处理政府信息公开申请情况\n本年新收政府信息公开申请数量 12 件。" * 5
+    assert decompress_text(compress_text(text)) == text
+    assert decompress_text(compress_text(text, dict_id=0)) == text
+
+    # 模板字典让短文本压得更小
+    short = "三、收到和处理政府信息公开申请情况"
+    assert len(compress_text(short)) < len(compress_text(short, dict_id=0))
+
+    zdict = train_dictionary([text, text + "附件"])
+    dict_id = register_dictionary(zdict)
+    assert decompress_text(compress_text(text, dict_id=dict_id)) == text
+    assert register_dictionary(zdict) == dict_id
+
+
+def test_report_texts_are_decompressed_lazily(monkeypatch):
+    calls = []
+    original = text_store.decompress_text
+
+    def counting(blob):
+        calls.append(blob)
+        return original(blob)
+
+    monkeypatch.setattr(text_store, "decompress_text", counting)
+    text_store.clear_hot_cache()
+
+    report = Report(id="ts-1", full_text="全文" * 100, annual_struct=_struct())
+    # 只读表格不解压
+    tables = report.tables_struct
+    assert tables["section3"]["tables"]["section3_applications"]["cells"]["new_requests"] == {
+        "grand_total": 3
+    }
+    assert "text" not in tables["section1"]
+    assert calls == []
+
+    assert report.full_text == "全文" * 100
+    assert report.annual_struct["section1"]["text"].startswith("一、总体情况")
+    assert report.annual_struct["section3"]["raw_text"].endswith("1 2 3")
+    decompressed = len(calls)
+
+    # 热数据直接命中 LRU
+    assert report.full_text == "全文" * 100
+    assert report.annual_struct == report.annual_struct
+    assert len(calls) == decompressed
+
+    # 每次读取都是副本：调用方的修改不会影响其他读者
+    struct = report.annual_struct
+    struct["section1"]["text"] = "改过"
+    struct["section3"]["tables"].clear()
+    assert report.annual_struct["section1"]["text"].startswith("一、总体情况")
+    assert report.tables_struct["section3"]["tables"]
+
+    # 表格视图同样是副本
+    tables = report.tables_struct
+    tables["section3"]["tables"].clear()
+    assert report.tables_struct["section3"]["tables"]
+
+    report.full_text = None
+    assert report.full_text is None
+
+
+def test_compressed_fields_are_serialized():
+    report = Report(id="ts-2", full_text="全文", annual_struct=_struct())
+    dumped = report.model_dump()
+    assert dumped["full_text"] == "全文"
+    assert dumped["annual_struct"] == _struct()
+    assert Report.model_validate(dumped).annual_struct == _struct()
+    assert {"full_text", "annual_struct"} <= set(Report.model_json_schema()["properties"])
+
+
+def test_compressed_fields_are_private_attributes():
+    report = Report(id="ts-3", full_text="全文", annual_struct=_struct())
+    assert "full_text" not in Report.model_fields
+    assert "annual_struct" not in report.__dict__
+
+    # model_copy 共用压缩对象，不解压也不重新压缩；赋值只影响副本
+    copied = report.model_copy()
+    assert copied._full_text is report._full_text
+    copied.full_text = "新全文"
+    assert report.full_text == "全文"
+    assert report.model_dump(exclude={"annual_struct", "source_html"}) == {
+        "id": "ts-3",
+        "title": None,
+        "agency": None,
+        "year": None,
+        "region": None,
+        "duplicate_of": None,
+        "source_format": None,
+        "full_text": "全文",
+    }